@@ -0,0 +1,225 @@
+"""
+Admission control for chat requests.
+
+Chat messages are admitted under a global and a per-agent concurrency cap
+before they reach the backend's LLM path. Waiting requests are queued per
+browser session and admitted round-robin across sessions, so one busy tab
+can't starve the others. Once the queue is full, new requests are rejected
+straight away instead of piling up until everyone hits the chat timeout.
+
+Async handlers submit a ticket, await admission while reporting their
+queue position, and release the ticket when the backend call finishes.
+Requests made from worker threads - the agent comparison and batch
+evaluation fan-outs - hold a slot with the blocking `slot()` instead, so
+they count against the same caps. Caps apply per UI process; in a
+multi-worker deployment, size them per worker.
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, Optional
+
+# Chat requests in flight to the backend
+MAX_CONCURRENT = int(os.getenv("CHAT_MAX_CONCURRENT", "8"))
+
+# Chat requests in flight per agent
+MAX_PER_AGENT = int(os.getenv("CHAT_MAX_PER_AGENT", "4"))
+
+# Requests waiting for a slot before new ones are shed
+MAX_QUEUED = int(os.getenv("CHAT_QUEUE_MAX", "64"))
+
+# Requests a single browser session may have waiting
+MAX_QUEUED_PER_SESSION = int(os.getenv("CHAT_QUEUE_PER_SESSION", "2"))
+
+# Seconds a request may wait for a slot before it is shed
+QUEUE_TIMEOUT = float(os.getenv("CHAT_QUEUE_TIMEOUT", "120"))
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed because the queue is full."""
+
+
+class Ticket:
+    """One chat request's place in the admission queue."""
+
+    __slots__ = ("session", "agent_id", "enqueued_at", "loop", "admitted", "state")
+
+    def __init__(self, session: str, agent_id: str, loop: Optional[asyncio.AbstractEventLoop]):
+        self.session = session
+        self.agent_id = agent_id
+        self.enqueued_at = time.monotonic()
+        self.loop = loop  # event loop of an async waiter; None for a worker thread
+        self.admitted = asyncio.Event() if loop is not None else threading.Event()
+        self.state = "queued"  # queued -> running -> done, or queued -> cancelled
+
+    def admit(self) -> None:
+        self.state = "running"
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.admitted.set)
+        else:
+            self.admitted.set()
+
+
+class AdmissionController:
+    """Concurrency caps plus a fair (round-robin per session) wait queue."""
+
+    def __init__(self, max_concurrent: int = MAX_CONCURRENT, max_per_agent: int = MAX_PER_AGENT,
+                 max_queued: int = MAX_QUEUED, max_queued_per_session: int = MAX_QUEUED_PER_SESSION):
+        self.max_concurrent = max_concurrent
+        self.max_per_agent = max_per_agent
+        self.max_queued = max_queued
+        self.max_queued_per_session = max_queued_per_session
+        # Sessions in round-robin order, each with its own FIFO of tickets
+        self._queues: "OrderedDict[str, Deque[Ticket]]" = OrderedDict()
+        self._queued = 0
+        self._running = 0
+        self._running_per_agent: Counter = Counter()
+        self._shed = 0
+        self._admitted = 0
+        # Async handlers and fan-out threads share the controller
+        self._lock = threading.Lock()
+
+    def submit(self, session: Optional[str], agent_id: str, limit_session: bool = True) -> Ticket:
+        """
+        Queue a request and admit it immediately if a slot is free.
+
+        Args:
+            session: Browser session the request belongs to
+            agent_id: Agent the request goes to
+            limit_session: Apply the per-session share of the queue; fan-outs
+                that bound their own concurrency pass False
+
+        Raises:
+            Overloaded: if the queue, or the session's share of it, is full
+        """
+        session = session or "anonymous"
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        with self._lock:
+            queue = self._queues.get(session)
+            if self._queued >= self.max_queued:
+                self._shed += 1
+                raise Overloaded(f"{self._queued} requests are already waiting")
+            if limit_session and queue is not None and len(queue) >= self.max_queued_per_session:
+                self._shed += 1
+                raise Overloaded("this session already has requests waiting")
+
+            ticket = Ticket(session, agent_id, loop)
+            if queue is None:
+                queue = self._queues[session] = deque()
+            queue.append(ticket)
+            self._queued += 1
+            self._dispatch()
+        return ticket
+
+    async def wait(self, ticket: Ticket, timeout: float) -> bool:
+        """Wait up to `timeout` seconds for admission; True once admitted."""
+        try:
+            await asyncio.wait_for(ticket.admitted.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return ticket.state == "running"
+
+    @contextmanager
+    def slot(self, session: Optional[str], agent_id: str, timeout: float = QUEUE_TIMEOUT) -> Iterator[None]:
+        """
+        Hold an admission slot for the duration of a block, from a worker thread.
+
+        Blocks until the request is admitted; the slot is released when the
+        block exits. Each call is one request to `agent_id`.
+
+        Raises:
+            Overloaded: if the queue is full or no slot frees up within `timeout` seconds
+        """
+        ticket = self.submit(session, agent_id, limit_session=False)
+        try:
+            ticket.admitted.wait(timeout)
+            if ticket.state != "running":
+                with self._lock:
+                    self._shed += 1
+                raise Overloaded(f"no free slot after waiting {timeout:.0f}s")
+            yield
+        finally:
+            self.release(ticket)
+
+    def position(self, ticket: Ticket) -> int:
+        """
+        Estimated 1-based place in line.
+
+        With round-robin admission, a ticket that is n-th in its session's
+        queue goes after up to n tickets of each session ahead of it in the
+        rotation and up to n - 1 of each session behind it.
+        """
+        with self._lock:
+            if ticket.state != "queued":
+                return 0
+            own = self._queues.get(ticket.session)
+            index = own.index(ticket) if own else 0
+            position, ahead = index + 1, 1
+            for session, queue in self._queues.items():
+                if session == ticket.session:
+                    ahead = 0
+                else:
+                    position += min(len(queue), index + ahead)
+            return position
+
+    def release(self, ticket: Ticket) -> None:
+        """Free a ticket's slot (running) or leave the queue (still waiting)."""
+        with self._lock:
+            if ticket.state == "running":
+                self._running -= 1
+                self._running_per_agent[ticket.agent_id] -= 1
+                if not self._running_per_agent[ticket.agent_id]:
+                    del self._running_per_agent[ticket.agent_id]
+                ticket.state = "done"
+            elif ticket.state == "queued":
+                queue = self._queues.get(ticket.session)
+                if queue is not None and ticket in queue:
+                    queue.remove(ticket)
+                    self._queued -= 1
+                    if not queue:
+                        del self._queues[ticket.session]
+                ticket.state = "cancelled"
+            self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Admit waiting tickets round-robin across sessions while slots are free (lock held)."""
+        progress = True
+        while progress and self._queued and self._running < self.max_concurrent:
+            progress = False
+            for session in list(self._queues):
+                if self._running >= self.max_concurrent:
+                    break
+                queue = self._queues[session]
+                ticket = queue[0]
+                if self._running_per_agent[ticket.agent_id] >= self.max_per_agent:
+                    continue  # agent saturated; later sessions may ask other agents
+                queue.popleft()
+                self._queued -= 1
+                # Served sessions go to the back of the rotation
+                del self._queues[session]
+                if queue:
+                    self._queues[session] = queue
+                self._running += 1
+                self._running_per_agent[ticket.agent_id] += 1
+                self._admitted += 1
+                ticket.admit()
+                progress = True
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'running': self._running,
+                'queued': self._queued,
+                'sessions_waiting': len(self._queues),
+                'admitted': self._admitted,
+                'shed': self._shed
+            }
+
+
+chat_admission = AdmissionController()
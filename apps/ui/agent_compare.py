@@ -0,0 +1,78 @@
+"""
+Ask several agents the same question concurrently.
+"""
+import os
+import time
+from concurrent.futures import as_completed
+from contextlib import nullcontext
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from apps.ui import backend_client
+from apps.ui.admission import AdmissionController
+
+# Number of answer panels in the comparison view
+MAX_COMPARE_AGENTS = int(os.getenv("CHAT_COMPARE_MAX_AGENTS", "4"))
+
+
+def ask_agent(agent_id: str, message: str, timeout: float = 120.0,
+              admission: Optional[AdmissionController] = None, session: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Send a single message to an agent in a fresh session and time it.
+
+    Args:
+        agent_id: Agent to ask
+        message: Question text
+        timeout: Request timeout in seconds
+        admission: Controller to wait for a slot from first (the UI's
+            chat_admission); the wait is not part of the latency
+        session: Browser session the request is admitted under
+
+    Returns:
+        Dictionary with agent_id, answer, citations, latency (seconds) and
+        error (None on success)
+    """
+    result = {
+        'agent_id': agent_id,
+        'answer': "",
+        'citations': [],
+        'latency': 0.0,
+        'error': None
+    }
+
+    start = None
+    try:
+        with admission.slot(session, agent_id) if admission is not None else nullcontext():
+            start = time.perf_counter()
+            response = backend_client.post_chat_message(agent_id, message, timeout=timeout)
+        if response.status_code == 200:
+            data = response.json()
+            result['answer'] = data['response']
+            result['citations'] = data.get('citations', [])
+        else:
+            result['error'] = f"HTTP {response.status_code}: {backend_client.error_detail(response)}"
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {str(e)}"
+    if start is not None:
+        result['latency'] = time.perf_counter() - start
+
+    return result
+
+
+def fan_out(agent_ids: List[str], message: str, timeout: float = 120.0,
+            admission: Optional[AdmissionController] = None,
+            session: Optional[str] = None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Ask every agent concurrently.
+
+    Requests are submitted immediately, each admitted through `admission`
+    when given (see ask_agent); iterate the returned iterator to collect
+    results as they complete.
+
+    Returns:
+        Iterator of (index into agent_ids, ask_agent result), fastest agent first
+    """
+    futures = {
+        backend_client.chat_executor.submit(ask_agent, agent_id, message, timeout, admission, session): i
+        for i, agent_id in enumerate(agent_ids)
+    }
+    return ((futures[future], future.result()) for future in as_completed(futures))
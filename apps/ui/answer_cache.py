@@ -0,0 +1,298 @@
+"""
+Near-duplicate answer cache for chat questions.
+
+People ask the same thing in many ways ("what's the refund policy" vs
+"refund policy?"), so an exact-match cache rarely hits. Questions are
+turned into hashed bag-of-features vectors (words plus character trigrams,
+stopwords dropped) and kept per agent in a small NumPy matrix; a new
+question is answered from the cache when its cosine similarity to a cached
+one reaches ANSWER_CACHE_THRESHOLD. Similarity alone can't tell "... in
+2023" from "... in 2024" or "is it waterproof" from "is it not waterproof",
+so a cached question only matches if it also has exactly the same numbers
+and negation words (`key_terms`).
+
+Only questions that open a conversation (an empty transcript) are cached
+or served from the cache - a follow-up depends on the turns before it.
+A served answer never reached the backend, so the session remembers it and
+the follow-up is sent with that exchange as context (see `context_for`). Entries expire after
+ANSWER_CACHE_TTL seconds, each agent keeps at most ANSWER_CACHE_MAX_ENTRIES
+(least recently used go first), and an agent's entries are dropped when it
+is updated or deleted, or when a folder it can read changes (see
+apps.ui.folder_events).
+
+Cached answers stay in each UI process; with a shared state database the
+invalidations reach every worker. The cache is off unless
+ANSWER_CACHE_ENABLED is set.
+"""
+import os
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, List, Optional
+
+import numpy as np
+
+from apps.ui import folder_events, models
+from apps.ui.shared_state import SharedStore, shared_store
+
+ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+
+# Minimum cosine similarity between two questions for a cache hit
+THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.85"))
+
+# Cached answers kept per agent, and their lifetime in seconds
+MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "256"))
+TTL = float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+
+# Width of the hashed feature vectors
+DIMENSIONS = 2048
+
+# Sessions whose served answer is remembered for the follow-up (in-memory mode)
+MAX_CONTEXTS = 1000
+
+STOPWORDS = frozenset("""
+a about an and any are as at be can could do does for from have how i in is it its me my of on or
+please our should tell that the there this to us was we what whats when where which who why will
+with would you your
+""".split())
+
+# Words that flip a question's meaning; apostrophes are dropped before matching
+NEGATIONS = frozenset("""
+no not nor never none nothing nobody nowhere neither without except cannot cant dont doesnt didnt isnt
+arent wasnt werent wont wouldnt shouldnt couldnt hasnt havent hadnt
+""".split())
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokens(text: str) -> List[str]:
+    """Lowercased words and numbers, apostrophes dropped ("isn't" -> "isnt")."""
+    return _TOKEN.findall(text.lower().replace("'", "").replace("\u2019", ""))
+
+
+def key_terms(text: str) -> FrozenSet[str]:
+    """Numbers (and words containing digits, like "q1") and negations, which two matching questions must share."""
+    return frozenset(t for t in tokens(text) if t in NEGATIONS or any(c.isdigit() for c in t))
+
+
+def features(text: str) -> List[str]:
+    """Words (minus stopwords) and their character trigrams."""
+    words = [w for w in tokens(text) if w not in STOPWORDS]
+    grams = []
+    for word in words:
+        padded = f" {word} "
+        grams.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+    return [f"w:{w}" for w in words] + [f"c:{g}" for g in grams]
+
+
+def vectorize(text: str) -> Optional[np.ndarray]:
+    """Unit-length hashed feature vector of a question, or None if it has no content words."""
+    vector = np.zeros(DIMENSIONS, dtype=np.float32)
+    for feature in features(text):
+        # Whole words weigh as much as all of their trigrams together
+        weight = 1.0 if feature.startswith("w:") else 0.35
+        vector[zlib.crc32(feature.encode()) % DIMENSIONS] += weight
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else None
+
+
+class CachedAnswer:
+    __slots__ = ("question", "key_terms", "answer", "citations", "latency", "created_at", "used_at")
+
+    def __init__(self, question: str, answer: str, citations: Any, latency: float):
+        self.question = question
+        self.key_terms = key_terms(question)
+        self.answer = answer
+        self.citations = citations
+        self.latency = latency
+        self.created_at = self.used_at = time.monotonic()
+
+
+class AgentIndex:
+    """Fixed-capacity matrix of question vectors for one agent."""
+
+    def __init__(self, capacity: int, generation: Any):
+        self.vectors = np.zeros((capacity, DIMENSIONS), dtype=np.float32)
+        self.entries: List[Optional[CachedAnswer]] = [None] * capacity
+        self.generation = generation
+
+    def best_match(self, vector: np.ndarray, terms: FrozenSet[str], ttl: float) -> tuple:
+        """(slot, similarity) of the closest live entry with the same key terms, or (None, 0.0)."""
+        now = time.monotonic()
+        live = np.array([
+            entry is not None and now - entry.created_at <= ttl and entry.key_terms == terms
+            for entry in self.entries
+        ])
+        if not live.any():
+            return None, 0.0
+        scores = np.where(live, self.vectors @ vector, -1.0)
+        best = int(np.argmax(scores))
+        return best, float(scores[best])
+
+    def put(self, vector: np.ndarray, entry: CachedAnswer, ttl: float) -> bool:
+        """Store an entry; returns True if a live one was evicted to make room."""
+        now = time.monotonic()
+        free = next((i for i, e in enumerate(self.entries) if e is None or now - e.created_at > ttl), None)
+        evicted = free is None
+        if evicted:
+            free = min(range(len(self.entries)), key=lambda i: self.entries[i].used_at)
+        self.vectors[free] = vector
+        self.entries[free] = entry
+        return evicted
+
+
+class AnswerCache:
+    """Per-agent near-duplicate question cache with shared invalidation."""
+
+    NAMESPACE = "answer_cache"
+    CONTEXT_NAMESPACE = "answer_cache_context"
+
+    def __init__(self, enabled: bool = ENABLED, threshold: float = THRESHOLD, max_entries: int = MAX_ENTRIES,
+                 ttl: float = TTL, store: Optional[SharedStore] = None):
+        self.enabled = enabled
+        self.threshold = threshold
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.store = store
+        self._indexes: Dict[str, AgentIndex] = {}
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._contexts: "OrderedDict[str, dict]" = OrderedDict()
+        self._counters = {"lookups": 0, "hits": 0, "stores": 0, "evictions": 0, "invalidations": 0}
+        self._latency_saved = 0.0
+
+    def _generation(self, agent_id: str) -> Any:
+        """Changes whenever the agent's cached answers become invalid."""
+        if self.store is not None:
+            return (self.store.get(self.NAMESPACE, agent_id), self.store.get(self.NAMESPACE, "*"))
+        return (self._generations.get(agent_id), self._generations.get("*"))
+
+    def _index(self, agent_id: str) -> AgentIndex:
+        generation = self._generation(agent_id)
+        with self._lock:
+            index = self._indexes.get(agent_id)
+            if index is None or index.generation != generation:
+                index = self._indexes[agent_id] = AgentIndex(self.max_entries, generation)
+            return index
+
+    def lookup(self, agent_id: str, question: str) -> Optional[CachedAnswer]:
+        """Cached answer to a question similar enough to `question`, if any."""
+        if not self.enabled:
+            return None
+        vector = vectorize(question)
+        index = self._index(agent_id)
+        with self._lock:
+            self._counters["lookups"] += 1
+            if vector is None:
+                return None
+            slot, similarity = index.best_match(vector, key_terms(question), self.ttl)
+            if slot is None or similarity < self.threshold:
+                return None
+            entry = index.entries[slot]
+            entry.used_at = time.monotonic()
+            self._counters["hits"] += 1
+            self._latency_saved += entry.latency
+            return entry
+
+    def put(self, agent_id: str, question: str, answer: str, citations: Any, latency: float) -> None:
+        """Cache an agent's answer along with how long the backend took to produce it."""
+        if not self.enabled:
+            return
+        vector = vectorize(question)
+        if vector is None:
+            return
+        index = self._index(agent_id)
+        with self._lock:
+            slot, similarity = index.best_match(vector, key_terms(question), self.ttl)
+            if slot is not None and similarity >= 0.999:
+                return  # same question already cached
+            self._counters["stores"] += 1
+            if index.put(vector, CachedAnswer(question, answer, citations, latency), self.ttl):
+                self._counters["evictions"] += 1
+
+    def remember_served(self, session: str, agent_id: str, question: str, answer: str) -> None:
+        """Record that a session's opening question was answered from the cache."""
+        served = {"agent_id": agent_id, "question": question, "answer": answer}
+        if self.store is not None:
+            self.store.put(self.CONTEXT_NAMESPACE, session, served, ttl=self.ttl)
+            return
+        with self._lock:
+            self._contexts[session] = served
+            self._contexts.move_to_end(session)
+            while len(self._contexts) > MAX_CONTEXTS:
+                self._contexts.popitem(last=False)
+
+    def context_for(self, session: str, agent_id: str, message: str) -> Optional[str]:
+        """
+        The message to send the backend for a session's follow-up to a served answer.
+
+        Returns:
+            `message` prefixed with the cached exchange, or None if the
+            session's last answer didn't come from the cache
+        """
+        if not self.enabled:
+            return None
+        if self.store is not None:
+            served = self.store.get(self.CONTEXT_NAMESPACE, session)
+        else:
+            with self._lock:
+                served = self._contexts.get(session)
+        if not served or served["agent_id"] != agent_id:
+            return None
+        return (
+            f"Earlier in this conversation I asked: {served['question']}\n"
+            f"You answered: {served['answer']}\n\n"
+            f"Follow-up question: {message}"
+        )
+
+    def forget_served(self, session: str) -> None:
+        """Drop a session's served answer once the backend has the conversation (or it was cleared)."""
+        if not self.enabled:
+            return
+        if self.store is not None:
+            self.store.delete(self.CONTEXT_NAMESPACE, session)
+            return
+        with self._lock:
+            self._contexts.pop(session, None)
+
+    def _bump(self, key: str) -> None:
+        with self._lock:
+            self._counters["invalidations"] += 1
+            if self.store is None:
+                self._generations[key] = self._generations.get(key, 0) + 1
+                return
+        self.store.put(self.NAMESPACE, key, time.time_ns())
+
+    def invalidate_agent(self, agent_id: str) -> None:
+        """Drop an agent's cached answers, e.g. after its configuration changed."""
+        if self.enabled:
+            self._bump(agent_id)
+
+    def invalidate_folder(self, folder_id: str) -> None:
+        """Drop cached answers of every agent that reads a folder whose content changed."""
+        if not self.enabled:
+            return
+        agents = models.try_get_models("/agents/list", models.Agent)
+        if agents is None:
+            self._bump("*")  # can't tell which agents read the folder
+            return
+        for agent in agents:
+            if folder_id in agent.folder_access:
+                self._bump(agent.agent_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups, hits = self._counters["lookups"], self._counters["hits"]
+            return {
+                "enabled": self.enabled,
+                **self._counters,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+                "latency_saved_s": round(self._latency_saved, 2),
+                "entries": sum(e is not None for index in self._indexes.values() for e in index.entries)
+            }
+
+
+answer_cache = AnswerCache(store=shared_store)
+folder_events.subscribe(answer_cache.invalidate_folder)
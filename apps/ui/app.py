@@ -1,19 +1,60 @@
 """
 Gradio UI for GraphRAG Chatbot.
 """
+import asyncio
+import functools
+import inspect
+import json
 import os
+import re
+import time
 import gradio as gr
 import httpx
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+from apps.ui import admission, agent_compare, archive_upload, auto_index, backend_client, batch_eval, deadline, document_finder, folder_events, folder_sync, history_window, models, rate_limit, reindex_planner
+from apps.ui.admission import Overloaded, chat_admission
+from apps.ui.answer_cache import answer_cache
+from apps.ui.folder_sync import sync_manager
+from apps.ui.index_scheduler import scheduler as index_scheduler
+from apps.ui.backend_client import API_BASE, ADMIN_TOKEN, prefetch_cache
+from apps.ui.cancellation import in_flight
+from apps.ui.document_finder import document_index
+from apps.ui.rate_limit import RateLimited
+from apps.ui.render_cache import render_cache
+from apps.ui.session_store import transcripts
+from apps.ui.temp_storage import temp_storage
+from apps.ui.transcript_index import transcript_index
 
-# API configuration
-# For standalone frontend deployment, use API_BASE_URL environment variable
-# Example: API_BASE_URL=https://graphrag-api.railway.app
-API_BASE = os.getenv('API_BASE_URL', 'http://localhost:8000')
-ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "change-me")
+# Each browser remembers its most recently selected chat agent in
+# localStorage under this key; it is prefetched on the next page load
+LAST_AGENT_STORAGE_KEY = "kv_last_agent_id"
+
+# Passes the selected agent through to select_agent, remembering it
+REMEMBER_AGENT_JS = f"""(agent_id, session_id) => {{
+    if (agent_id) localStorage.setItem("{LAST_AGENT_STORAGE_KEY}", agent_id);
+    return [agent_id, session_id];
+}}"""
+
+# Random ID each browser keeps in localStorage, so state such as indexed
+# chat turns (apps.ui.transcript_index) outlives the per-page-load session hash
+BROWSER_ID_STORAGE_KEY = "kv_browser_id"
+
+# Supplies the remembered agent and the browser ID (created on first visit)
+# to prefetch_initial_data; getRandomValues also works outside HTTPS
+RECALL_BROWSER_JS = f"""() => {{
+    let browserId = localStorage.getItem("{BROWSER_ID_STORAGE_KEY}");
+    if (!browserId) {{
+        browserId = Array.from(crypto.getRandomValues(new Uint8Array(16)),
+                               b => b.toString(16).padStart(2, "0")).join("");
+        localStorage.setItem("{BROWSER_ID_STORAGE_KEY}", browserId);
+    }}
+    return [localStorage.getItem("{LAST_AGENT_STORAGE_KEY}") || "", browserId];
+}}"""
+
+# Agent IDs as issued by the backend; a remembered one comes from the browser
+AGENT_ID = re.compile(r"[\w-]+")
+
+BROWSER_ID = re.compile(r"[0-9a-f]{32}")
 
 print(f"🔗 Frontend connecting to API: {API_BASE}")
 print(f"🔑 Admin token configured: {'Yes' if ADMIN_TOKEN != 'change-me' else 'No (using default)'}")
@@ -52,9 +93,111 @@ print("🔍 Checking backend health...")
 verify_backend_ready()
 
 
+def session_hash(request):
+    """
+    Gradio session hash of the browser tab that triggered an event.
+
+    gr.Request only exposes it from Gradio 4.2x on; on 4.20 it is read from
+    the body of the /queue/join request that queued the event.
+    """
+    value = getattr(request, "session_hash", None)
+    if value:
+        return value
+    body = getattr(getattr(request, "request", None), "_body", None)
+    if not body:
+        return None
+    try:
+        return json.loads(body).get("session_hash")
+    except (ValueError, AttributeError):
+        return None
+
+
+def browser_key(browser_id, request):
+    """
+    Persistent key of the browser that triggered an event: its localStorage
+    ID (see RECALL_BROWSER_JS), or the tab's session hash for callers without
+    one, such as API clients.
+    """
+    if browser_id and BROWSER_ID.fullmatch(browser_id):
+        return browser_id
+    return session_hash(request)
+
+
+def render_if_changed(request, key, data, build=lambda data: data):
+    """
+    Build a component update from plain render data, or a no-op update when
+    this browser session already shows the same data for `key`. Data of None
+    (nothing fetched in time) also leaves the component as it is.
+    """
+    if data is None or not render_cache.changed(session_hash(request), key, data):
+        return gr.update()
+    return build(data)
+
+
+def find_request(args, kwargs):
+    """The gr.Request among a handler's arguments, if it takes one."""
+    return next((arg for arg in (*args, *kwargs.values()) if isinstance(arg, gr.Request)), None)
+
+
+def bounded(fn):
+    """
+    Run a handler as one user action: its backend calls share a single
+    ACTION_DEADLINE_SECONDS budget (see apps.ui.deadline).
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        request = find_request(args, kwargs)
+        with deadline.action(session_hash(request) if request is not None else None):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+def rate_limited(kind, cost=None):
+    """
+    Charge a handler's calls to the caller's `kind` budget (see
+    apps.ui.rate_limit); calls over budget fail with an error toast and
+    leave the outputs unchanged.
+    
+    Args:
+        kind: Budget to charge
+        cost: Function of the handler's arguments returning the tokens a
+            call takes (default one per call)
+    """
+    limiter = rate_limit.limiters[kind]
+    
+    def check(args, kwargs):
+        request = find_request(args, kwargs)
+        try:
+            limiter.check(session_hash(request) if request is not None else None, rate_limit.client_ip(request),
+                          cost(*args, **kwargs) if cost else 1.0)
+        except RateLimited as e:
+            raise gr.Error(f"⏳ {e}")
+    
+    def decorate(fn):
+        if inspect.isasyncgenfunction(fn):
+            async def wrapper(*args, **kwargs):
+                check(args, kwargs)
+                async for update in fn(*args, **kwargs):
+                    yield update
+        elif inspect.isgeneratorfunction(fn):
+            def wrapper(*args, **kwargs):
+                check(args, kwargs)
+                yield from fn(*args, **kwargs)
+        else:
+            def wrapper(*args, **kwargs):
+                check(args, kwargs)
+                return fn(*args, **kwargs)
+        return functools.wraps(fn)(wrapper)
+    return decorate
+
+
 def create_ui():
     """Create Gradio interface."""
     
+    # Resume any indexing jobs queued before a restart
+    index_scheduler.start()
+    temp_storage.start()
+    
     with gr.Blocks(title="GraphRAG Chatbot", theme=gr.themes.Soft()) as app:
         gr.Markdown("# 🤖 GraphRAG Knowledge Chatbot")
         gr.Markdown("Upload documents, create chat profiles, and query your knowledge base with GPT-5 Vision support.")
@@ -96,12 +239,19 @@ def create_ui():
                             info="Choose which folder to upload documents to"
                         )
                         file_upload_multi = gr.File(
-                            label="Upload Documents",
+                            label="Upload Documents or Archives (ZIP/TAR)",
                             file_count="multiple",
-                            file_types=[".pdf", ".docx", ".txt", ".md", ".csv", ".xlsx", ".png", ".jpg"],
+                            file_types=list(backend_client.SUPPORTED_EXTENSIONS) + archive_upload.ARCHIVE_FILE_TYPES,
                             type="filepath"
                         )
-                        upload_to_folder_btn = gr.Button("Upload to Folder", variant="primary")
+                        auto_index_checkbox = gr.Checkbox(
+                            label="Auto-index after upload",
+                            value=auto_index.ENABLED_BY_DEFAULT,
+                            info=f"Index the folder once uploads pause for {auto_index.QUIET_SECONDS:.0f}s"
+                        )
+                        with gr.Row():
+                            upload_to_folder_btn = gr.Button("Upload to Folder", variant="primary")
+                            upload_stop_btn = gr.Button("⏹️ Stop Upload")
                         upload_folder_status = gr.Textbox(label="Upload Status", interactive=False, lines=5)
                         
                         # Text preview section
@@ -123,6 +273,53 @@ def create_ui():
                             wrap=True
                         )
                 
+                with gr.Accordion("📂 Directory Sync", open=False):
+                    gr.Markdown("Mirror a directory on the server's disk into the selected folder. Only new or changed files are uploaded; removed files are deleted from the folder.")
+                    gr.Markdown(
+                        f"Directories must be inside `{folder_sync.SYNC_ROOT}`" if folder_sync.SYNC_ROOT
+                        else "ℹ️ Disabled: set SYNC_ROOT on the server to allow syncing directories below it"
+                    )
+                    sync_dir_input = gr.Textbox(
+                        label="Local Directory",
+                        placeholder="/mnt/shared/legal-docs",
+                        max_lines=1
+                    )
+                    with gr.Row():
+                        sync_now_btn = gr.Button("🔁 Sync Now", variant="secondary")
+                        sync_watch_btn = gr.Button("👁️ Start Watching", variant="primary")
+                        sync_stop_btn = gr.Button("⏹️ Stop Watching", variant="stop")
+                    sync_status = gr.Textbox(label="Sync Status", interactive=False, lines=5)
+                
+                with gr.Accordion("🔍 Find Documents Across Folders", open=False):
+                    gr.Markdown("Search document titles in every folder at once")
+                    with gr.Row():
+                        finder_query = gr.Textbox(
+                            label="Document Title",
+                            placeholder="Part of a filename, e.g. 'contract 2024'",
+                            max_lines=1,
+                            scale=3
+                        )
+                        finder_status_filter = gr.Dropdown(
+                            label="Status",
+                            choices=["All"],
+                            value="All",
+                            scale=1
+                        )
+                    finder_summary = gr.Markdown()
+                    finder_results = gr.Dataframe(
+                        headers=["Folder", "Filename", "Size", "Status", "Uploaded"],
+                        label="Matching Documents",
+                        interactive=False,
+                        wrap=True
+                    )
+                    finder_refresh_btn = gr.Button("🔄 Refresh Index")
+                    finder_stats = gr.Dataframe(
+                        headers=["Folder", "Documents", "Total Size", "Failed", "Statuses"],
+                        label="Folder Statistics",
+                        interactive=False,
+                        wrap=True
+                    )
+                
                 gr.Markdown("---")
                 gr.Markdown("### File Management")
                 gr.Markdown("Delete individual files or entire folders")
@@ -158,6 +355,12 @@ def create_ui():
                 
                 with gr.Row():
                     with gr.Column():
+                        index_priority = gr.Radio(
+                            choices=["high", "normal", "low"],
+                            value="normal",
+                            label="Queue Priority",
+                            info="Jobs run in priority order under a global concurrency limit"
+                        )
                         index_folder_btn = gr.Button("🔄 Index Selected Folder", variant="primary")
                         check_status_btn = gr.Button("📊 Check Folder Status", variant="secondary")
                         test_api_btn = gr.Button("🔍 Test API Connection", variant="secondary")
@@ -169,8 +372,33 @@ def create_ui():
                             placeholder="Select a folder and click 'Index Selected Folder' to start indexing"
                         )
                 
+                gr.Markdown("**Incremental Reindex** - only index folders with new or changed documents")
+                with gr.Row():
+                    plan_reindex_btn = gr.Button("📋 Plan Reindex (Dry Run)", variant="secondary")
+                    run_reindex_btn = gr.Button("▶️ Index Changed Folders", variant="primary")
+                reindex_plan = gr.Dataframe(
+                    headers=["Folder", "Action", "Reason", "Changed Docs", "Changed Size", "Total Docs"],
+                    label="Reindex Plan",
+                    interactive=False,
+                    wrap=True
+                )
+                reindex_status = gr.Textbox(label="Reindex Status", interactive=False, lines=4)
+                
+                gr.Markdown(f"**Indexing Queue** - at most {index_scheduler.max_concurrent} folder(s) index at once; repeated requests for a folder are merged")
+                with gr.Row():
+                    refresh_queue_btn = gr.Button("🔄 Refresh Queue", variant="secondary")
+                    cancel_queued_btn = gr.Button("✖️ Cancel Selected Folder's Queued Job", variant="secondary")
+                    clear_queue_history_btn = gr.Button("🧹 Clear Finished Jobs", variant="secondary")
+                index_queue_view = gr.Dataframe(
+                    headers=["Folder", "State", "Priority", "Queued", "Started", "Finished", "Job ID", "Error"],
+                    label="Indexing Queue",
+                    interactive=False,
+                    wrap=True
+                )
+                
                 # Event handlers for Knowledge Vault tab
-                def create_folder(name):
+                @rate_limited("admin")
+                def create_folder(name, request: gr.Request):
                     if not name or not name.strip():
                         return "❌ Please enter a folder name"
                     
@@ -190,165 +418,267 @@ def create_ui():
                     except Exception as e:
                         return f"❌ Error: {str(e)}"
                 
-                def list_folders():
+                def folder_rows():
                     try:
-                        response = httpx.get(f"{API_BASE}/folders/list", timeout=10.0)
-                        if response.status_code == 200:
-                            folders = response.json()
+                        folders = models.get_models("/folders/list", models.Folder)
+                        if folders is not None:
                             if not folders:
                                 return [["No folders created yet", "0", "not_indexed", ""]]
                             
                             return [[
-                                f['name'],
-                                str(f['document_count']),
-                                f['status'],
-                                f['last_indexed'][:19] if f['last_indexed'] else "Never"
+                                f.name,
+                                str(f.document_count),
+                                f.status,
+                                f.last_indexed[:19] if f.last_indexed else "Never"
                             ] for f in folders]
                         else:
                             return [["Error loading folders", "", "", ""]]
+                    except deadline.DeadlineExceeded:
+                        return None  # out of time: keep what the browser shows
                     except Exception as e:
                         return [[f"Error: {str(e)}", "", "", ""]]
                 
-                def get_folder_choices():
+                @bounded
+                def list_folders(request: gr.Request):
+                    return render_if_changed(request, "folder_list", folder_rows())
+                
+                def folder_choices(folders):
+                    return [(f.name, f.folder_id) for f in folders]
+                
+                def render_folder_selector(request, choices):
+                    return render_if_changed(request, "folder_selector", choices, lambda c: gr.Dropdown(choices=c))
+                
+                @bounded
+                def get_folder_choices(request: gr.Request):
                     try:
-                        response = httpx.get(f"{API_BASE}/folders/list", timeout=10.0)
-                        if response.status_code == 200:
-                            folders = response.json()
-                            return gr.Dropdown(choices=[(f['name'], f['folder_id']) for f in folders])
-                        else:
-                            return gr.Dropdown(choices=[])
+                        folders = models.get_models("/folders/list", models.Folder)
+                        choices = folder_choices(folders) if folders is not None else []
+                    except deadline.DeadlineExceeded:
+                        return gr.update()
                     except Exception as e:
-                        return gr.Dropdown(choices=[])
+                        choices = []
+                    return render_folder_selector(request, choices)
                 
-                def upload_to_folder(folder_id, files):
+                @rate_limited("upload")
+                def upload_to_folder(folder_id, files, auto_index_enabled, request: gr.Request):
+                    """Upload files and archive members in parallel, streaming per-file status."""
                     if not folder_id:
-                        return "❌ Please select a folder first", ""
+                        yield "❌ Please select a folder first", ""
+                        return
                     
                     if not files:
-                        return "❌ Please select files to upload", ""
+                        yield "❌ Please select files to upload", ""
+                        return
+                    
+                    file_list = files if isinstance(files, list) else [files]
                     
+                    token = in_flight.start(session_hash(request), "upload")
+                    try:
+                        yield from upload_progress(folder_id, file_list, auto_index_enabled, token)
+                    finally:
+                        in_flight.finish(token)
+                
+                def upload_progress(folder_id, file_list, auto_index_enabled, token):
                     results = []
                     success_count = 0
                     fail_count = 0
+                    skip_count = 0
                     text_previews = []
+                    failed_origins = set()
                     
-                    file_list = files if isinstance(files, list) else [files]
-                    
-                    for file_path in file_list:
-                        try:
-                            filename = os.path.basename(file_path)
-                            file_ext = filename.lower().split('.')[-1]
+                    for outcome in archive_upload.upload_files(folder_id, file_list, cancel=token):
+                        label = outcome['label']
+                        if outcome['error']:
+                            failed_origins.add(outcome['origin'])
+                        if outcome['skip']:
+                            results.append(f"⏭️ {label}: Skipped ({outcome['skip']})")
+                            skip_count += 1
+                        elif outcome['error']:
+                            results.append(f"❌ {label}: {outcome['error']}")
+                            fail_count += 1
+                        else:
+                            result = outcome['response']
                             
-                            # Show processing indicator based on file type
-                            if file_ext in ['pdf', 'png', 'jpg', 'jpeg']:
-                                processing_indicator = "🤖 AI Vision"
-                            else:
-                                processing_indicator = "📄 Standard"
+                            # Build success message with processing method
+                            msg = f"✅ {label}: Success"
+                            if result.get('processing_method'):
+                                method = result['processing_method']
+                                if method == 'gpt5_vision':
+                                    msg += " (GPT-5 Vision)"
+                                elif method == 'unstructured':
+                                    msg += " (Unstructured)"
+                                else:
+                                    msg += f" ({method})"
                             
-                            with open(file_path, 'rb') as f:
-                                files_data = {'file': (filename, f)}
-                                response = httpx.post(
-                                    f"{API_BASE}/folders/{folder_id}/upload",
-                                    files=files_data,
-                                    timeout=60.0
-                                )
+                            results.append(msg)
+                            success_count += 1
                             
-                            if response.status_code == 200:
-                                result = response.json()
-                                
-                                # Build success message with processing method
-                                msg = f"✅ {filename}: Success"
-                                if result.get('processing_method'):
-                                    method = result['processing_method']
-                                    if method == 'gpt5_vision':
-                                        msg += " (GPT-5 Vision)"
-                                    elif method == 'unstructured':
-                                        msg += " (Unstructured)"
-                                    else:
-                                        msg += f" ({method})"
-                                
-                                results.append(msg)
-                                success_count += 1
-                                
-                                # Collect text preview if available
-                                if result.get('extracted_text_preview'):
-                                    preview = result['extracted_text_preview']
-                                    text_previews.append(f"📄 {filename}:\n{preview}\n")
-                            else:
-                                results.append(f"❌ {filename}: {response.text[:50]}")
-                                fail_count += 1
-                        except Exception as e:
-                            results.append(f"❌ {filename}: {str(e)[:50]}")
-                            fail_count += 1
+                            # Collect text preview if available
+                            if result.get('extracted_text_preview'):
+                                preview = result['extracted_text_preview']
+                                text_previews.append(f"📄 {label}:\n{preview}\n")
+                        
+                        progress = f"⏳ Uploading... {success_count} succeeded, {fail_count} failed, {skip_count} skipped\n\n"
+                        yield progress + "\n".join(results[-50:]), gr.update()
+                    
+                    # Files that went through completely are no longer needed on disk.
+                    # A stopped upload never reports the sources it dropped, so
+                    # nothing is released then; the temp storage sweep expires them.
+                    if not token.cancelled:
+                        temp_storage.release(f for f in file_list if f not in failed_origins)
+                    if success_count:
+                        document_index.mark_stale()
                     
-                    summary = f"Upload complete: {success_count} succeeded, {fail_count} failed\n\n"
-                    if success_count > 0:
+                    summary = "⏹️ Upload stopped" if token.cancelled else "Upload complete"
+                    summary += f": {success_count} succeeded, {fail_count} failed"
+                    summary += f", {skip_count} skipped\n\n" if skip_count else "\n\n"
+                    if success_count > 0 and auto_index_enabled:
+                        delay = auto_index.debouncer.notify(folder_id)
+                        summary += f"🕒 Auto-index: this folder will be indexed once uploads pause for {delay:.0f}s.\n\n"
+                    elif success_count > 0:
                         summary += "⚠️ NEXT STEP: Scroll down and click 'Index Selected Folder' to make documents queryable!\n\n"
                     
                     status_msg = summary + "\n".join(results)
                     preview_msg = "\n\n".join(text_previews) if text_previews else "No text preview available"
                     
-                    return status_msg, preview_msg
+                    yield status_msg, preview_msg
                 
-                def list_folder_documents(folder_id):
+                def stop_upload(request: gr.Request):
+                    """Abort the session's uploads; files already uploaded stay in the folder."""
+                    if not in_flight.cancel(session_hash(request), "upload"):
+                        return gr.update()
+                    return "⏹️ Upload stopped. Files that finished uploading stay in the folder; uploads in progress were aborted."
+                
+                def folder_document_rows(folder_id):
                     if not folder_id:
                         return [["Select a folder to view documents", "", "", ""]]
                     
                     try:
-                        response = httpx.get(f"{API_BASE}/folders/{folder_id}/documents", timeout=10.0)
-                        if response.status_code == 200:
-                            docs = response.json()
+                        docs = models.get_models(f"/folders/{folder_id}/documents", models.Document)
+                        if docs is not None:
                             if not docs:
                                 return [["No documents in this folder", "", "", ""]]
                             
                             return [[
-                                d['title'],
-                                f"{d.get('size', 0) / 1024:.1f} KB" if d.get('size') else "N/A",
-                                d['status'],
-                                d['uploaded_at'][:19] if d.get('uploaded_at') else "N/A"
+                                d.title,
+                                f"{d.size / 1024:.1f} KB" if d.size else "N/A",
+                                d.status,
+                                d.uploaded_at[:19] if d.uploaded_at else "N/A"
                             ] for d in docs]
                         else:
                             return [["Error loading documents", "", "", ""]]
+                    except deadline.DeadlineExceeded:
+                        return None  # out of time: keep what the browser shows
                     except Exception as e:
                         return [[f"Error: {str(e)}", "", "", ""]]
                 
-                def index_folder(folder_id):
+                @bounded
+                def list_folder_documents(folder_id, request: gr.Request):
+                    return render_if_changed(request, "document_list", folder_document_rows(folder_id))
+                
+                def find_documents(query, status):
+                    """Search document titles across all folders from the in-memory index."""
+                    try:
+                        document_index.ensure_fresh()
+                    except Exception as e:
+                        return f"❌ Error loading documents: {str(e)}", [], gr.update(), gr.update()
+                    
+                    started = time.perf_counter()
+                    matches = document_index.search(query, None if status in (None, "All") else status)
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+                    
+                    rows = [[
+                        m['folder_name'],
+                        m['document'].title,
+                        f"{m['document'].size / 1024:.1f} KB" if m['document'].size else "N/A",
+                        m['document'].status,
+                        m['document'].uploaded_at[:19] if m['document'].uploaded_at else "N/A"
+                    ] for m in matches]
+                    index_stats = document_index.stats()
+                    summary = f"{len(rows)} match(es) in {elapsed_ms:.1f} ms - {index_stats['documents']} documents in {index_stats['folders']} folders indexed"
+                    if len(rows) >= document_finder.MAX_RESULTS:
+                        summary += f" (showing the first {document_finder.MAX_RESULTS})"
+                    statuses = ["All"] + document_index.statuses()
+                    return summary, rows, gr.Dropdown(choices=statuses), document_folder_stats()
+                
+                def document_folder_stats():
+                    """Per-folder document counts, sizes and failed parses from the index."""
+                    rows = []
+                    for folder in document_index.folder_stats():
+                        statuses = ", ".join(f"{status}: {count}" for status, count in sorted(folder['statuses'].items()))
+                        rows.append([
+                            folder['name'],
+                            folder['documents'],
+                            f"{folder['total_bytes'] / (1024 * 1024):.1f} MB",
+                            f"⚠️ {folder['failed']}" if folder['failed'] else "0",
+                            statuses
+                        ])
+                    return rows or [["No folders indexed", "", "", "", ""]]
+                
+                def refresh_document_index(query, status):
+                    """Refetch every folder's documents, then rerun the search."""
+                    document_index.mark_stale()
+                    return find_documents(query, status)
+                
+                @rate_limited("admin")
+                def index_folder(folder_id, priority, request: gr.Request):
+                    """Queue the selected folder for indexing."""
                     if not folder_id:
                         return "❌ Please select a folder first"
                     
                     try:
-                        url = f"{API_BASE}/folders/{folder_id}/index"
-                        print(f"[DEBUG] Calling indexing endpoint: {url}")
-                        
-                        response = httpx.post(
-                            url,
-                            json={"method": "fast"},
-                            timeout=30.0  # Increased timeout
-                        )
-                        
-                        print(f"[DEBUG] Response status: {response.status_code}")
-                        print(f"[DEBUG] Response body: {response.text[:500]}")
-                        
-                        if response.status_code == 200:
-                            result = response.json()
-                            return f"✅ Indexing started!\nJob ID: {result.get('job_id', 'N/A')}\nStatus: {result.get('status', 'Processing')}\nMessage: {result.get('message', 'N/A')}\n\nThis may take several minutes. Click 'Check Folder Status' to monitor progress."
-                        elif response.status_code == 202:
-                            # Accepted - job queued
-                            result = response.json()
-                            return f"✅ Indexing job queued!\nJob ID: {result.get('job_id', 'N/A')}\nStatus: {result.get('status', 'Queued')}\n\nClick 'Check Folder Status' to monitor progress."
-                        else:
-                            try:
-                                error_data = response.json()
-                                error_msg = error_data.get('detail', error_data.get('message', error_data.get('error', 'Unknown error')))
-                            except:
-                                error_msg = response.text[:500]
-                            return f"❌ Indexing Failed (HTTP {response.status_code})\n\nError: {error_msg}\n\nURL: {url}"
-                    except httpx.TimeoutException:
-                        return f"❌ Request timed out after 30 seconds\n\nThe API took too long to respond.\nURL: {API_BASE}/folders/{folder_id}/index"
-                    except httpx.ConnectError:
-                        return f"❌ Connection failed\n\nCannot connect to API.\nURL: {API_BASE}/folders/{folder_id}/index"
+                        job = index_scheduler.enqueue(folder_id, priority=priority or "normal")
+                        index_scheduler.start()
+                    except Exception as e:
+                        return f"❌ Failed to queue indexing\n\n{type(e).__name__}: {str(e)}"
+                    
+                    if job['outcome'] == 'merged':
+                        return f"ℹ️ This folder is already queued (job #{job['id']}) - request merged.\nPriority: {priority}"
+                    if job['outcome'] == 'rerun':
+                        return f"ℹ️ This folder is being indexed right now (job #{job['id']}).\nIt will be indexed once more after the current run to pick up new documents."
+                    return f"✅ Indexing queued! (job #{job['id']}, priority: {priority})\n\nJobs start automatically as indexing slots free up. See the Indexing Queue below, or click 'Check Folder Status' to monitor progress."
+                
+                def format_queue_time(timestamp):
+                    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp)) if timestamp else ""
+                
+                def index_queue_rows():
+                    """Rows for running, queued and recently finished indexing jobs."""
+                    try:
+                        jobs = index_scheduler.jobs()
                     except Exception as e:
-                        return f"❌ Unexpected Error\n\n{type(e).__name__}: {str(e)}\n\nURL: {API_BASE}/folders/{folder_id}/index"
+                        return [[f"Error: {str(e)}", "", "", "", "", "", "", ""]]
+                    if not jobs:
+                        return [["Queue is empty", "", "", "", "", "", "", ""]]
+                    
+                    state_emoji = {'queued': '🕒', 'starting': '🚀', 'running': '⏳', 'done': '✅', 'failed': '❌'}
+                    return [[
+                        job['folder_name'] or job['folder_id'][:8],
+                        f"{state_emoji.get(job['state'], '❓')} {job['state']}" + (" (+rerun)" if job['rerun'] and job['state'] in ('starting', 'running') else ""),
+                        index_scheduler.priority_name(job['priority']),
+                        format_queue_time(job['enqueued_at']),
+                        format_queue_time(job['started_at']),
+                        format_queue_time(job['finished_at']),
+                        job['job_id'] or "",
+                        job['error'] or ""
+                    ] for job in jobs]
+                
+                def list_index_queue(request: gr.Request):
+                    """Show running, queued and recently finished indexing jobs."""
+                    return render_if_changed(request, "index_queue_view", index_queue_rows())
+                
+                @rate_limited("admin")
+                def cancel_queued_index(folder_id, request: gr.Request):
+                    """Remove the selected folder's job from the queue if it hasn't started."""
+                    if not folder_id:
+                        return "❌ Please select a folder first"
+                    if index_scheduler.cancel(folder_id):
+                        return "✅ Queued indexing job cancelled"
+                    return "ℹ️ No queued job for this folder (running jobs can't be cancelled)"
+                
+                @rate_limited("admin")
+                def clear_finished_index_jobs(request: gr.Request):
+                    removed = index_scheduler.clear_finished()
+                    return f"✅ Removed {removed} finished job(s) from the queue history"
                 
                 def check_folder_status(folder_id):
                     """Check the current status of a folder's indexing."""
@@ -426,27 +756,129 @@ def create_ui():
                     except Exception as e:
                         return f"❌ Error: {type(e).__name__}\n\n{str(e)}\n\nEndpoint: {API_BASE}"
                 
-                def get_folder_files_for_deletion(folder_id):
-                    """Get list of files in selected folder for deletion dropdown."""
+                def format_reindex_plan(plan):
+                    if not plan:
+                        return [["No folders created yet", "", "", "", "", ""]]
+                    return [[
+                        entry['name'],
+                        "🔄 index" if entry['action'] == 'index' else "⏭️ skip",
+                        entry['reason'],
+                        str(entry['changed_docs']),
+                        f"{entry['changed_bytes'] / 1024:.1f} KB",
+                        str(entry['total_docs'])
+                    ] for entry in plan]
+                
+                def plan_reindex():
+                    """Show which folders would be indexed, without dispatching anything."""
+                    try:
+                        plan = reindex_planner.build_plan()
+                    except Exception as e:
+                        return [[f"Error: {str(e)}", "", "", "", "", ""]], f"❌ Error: {str(e)}"
+                    
+                    to_index = [entry for entry in plan if entry['action'] == 'index']
+                    changed_docs = sum(entry['changed_docs'] for entry in to_index)
+                    changed_kb = sum(entry['changed_bytes'] for entry in to_index) / 1024
+                    status = (
+                        f"📋 Dry run: {len(to_index)} of {len(plan)} folder(s) need indexing\n"
+                        f"Estimated work: {changed_docs} new/changed document(s), {changed_kb:.1f} KB"
+                    )
+                    return format_reindex_plan(plan), status
+                
+                @rate_limited("admin")
+                def run_incremental_reindex(request: gr.Request):
+                    """Index only the folders with new or changed content."""
+                    try:
+                        plan = reindex_planner.build_plan()
+                    except Exception as e:
+                        return [[f"Error: {str(e)}", "", "", "", "", ""]], f"❌ Error: {str(e)}"
+                    
+                    results = reindex_planner.execute_plan(plan)
+                    if not results:
+                        return format_reindex_plan(plan), "✅ All folders are up to date - nothing to index"
+                    index_scheduler.start()
+                    
+                    outcome_text = {
+                        'queued': "queued",
+                        'merged': "already queued (merged)",
+                        'rerun': "indexing now, follow-up run scheduled"
+                    }
+                    lines = [f"✅ {r['name']}: {outcome_text.get(r['outcome'], r['outcome'])}" for r in results]
+                    skipped = len(plan) - len(results)
+                    status = f"Indexing queued for {len(results)} folder(s), {skipped} unchanged folder(s) skipped\n\n" + "\n".join(lines)
+                    return format_reindex_plan(plan), status
+                
+                def format_sync_result(result):
+                    text = (
+                        f"Uploaded: {len(result['uploaded'])} | Deleted: {len(result['deleted'])} | "
+                        f"Unchanged: {result['unchanged']} | Failed: {len(result['failed'])}"
+                    )
+                    for failure in result['failed'][:10]:
+                        text += f"\n❌ {failure['name']}: {failure['error'][:80]}"
+                    return text
+                
+                @rate_limited("admin")
+                def sync_directory_now(folder_id, local_dir, request: gr.Request):
+                    """Run one incremental sync of a directory into the selected folder."""
                     if not folder_id:
-                        return gr.Dropdown(choices=[])
+                        return "❌ Please select a folder first"
+                    if not local_dir or not local_dir.strip():
+                        return "❌ Please enter a local directory"
                     
                     try:
-                        response = httpx.get(f"{API_BASE}/folders/{folder_id}/documents", timeout=10.0)
-                        if response.status_code == 200:
-                            docs = response.json()
-                            if not docs:
-                                return gr.Dropdown(choices=[])
-                            # Return list of tuples (display_name, doc_id)
-                            return gr.Dropdown(
-                                choices=[(f"{d['title']} ({d.get('size', 0) / 1024:.1f} KB)", d['doc_id']) for d in docs]
-                            )
-                        else:
-                            return gr.Dropdown(choices=[])
+                        local_dir = folder_sync.resolve_sync_dir(local_dir.strip())
+                        agent = folder_sync.SyncAgent(local_dir, folder_id, root=folder_sync.SYNC_ROOT)
+                        return "✅ Sync complete\n" + format_sync_result(agent.sync())
+                    except PermissionError as e:
+                        return f"❌ {str(e)}"
+                    except Exception as e:
+                        return f"❌ Sync failed: {str(e)}"
+                
+                @rate_limited("admin")
+                def start_directory_watch(folder_id, local_dir, request: gr.Request):
+                    """Keep the selected folder in sync with a directory in the background."""
+                    if not folder_id:
+                        return "❌ Please select a folder first"
+                    if not local_dir or not local_dir.strip():
+                        return "❌ Please enter a local directory"
+                    
+                    try:
+                        local_dir = folder_sync.resolve_sync_dir(local_dir.strip())
+                        sync_manager.start(local_dir, folder_id, root=folder_sync.SYNC_ROOT)
+                    except PermissionError as e:
+                        return f"❌ {str(e)}"
                     except Exception as e:
-                        return gr.Dropdown(choices=[])
+                        return f"❌ Failed to start watching: {str(e)}"
+                    return f"👁️ Watching {local_dir}\nChanges will be synced to this folder automatically."
                 
-                def delete_file_from_folder(folder_id, doc_id):
+                @rate_limited("admin")
+                def stop_directory_watch(folder_id, request: gr.Request):
+                    """Stop syncing the selected folder."""
+                    if not folder_id:
+                        return "❌ Please select a folder first"
+                    agent = sync_manager.mappings().get(folder_id)
+                    if not sync_manager.stop(folder_id):
+                        return "ℹ️ This folder is not being watched"
+                    summary = f"\nLast sync: {format_sync_result(agent.last_result)}" if agent and agent.last_result else ""
+                    return "⏹️ Stopped watching" + summary
+                
+                @bounded
+                def get_folder_files_for_deletion(folder_id, request: gr.Request):
+                    """Get list of files in selected folder for deletion dropdown."""
+                    choices = []
+                    if folder_id:
+                        try:
+                            docs = models.get_models(f"/folders/{folder_id}/documents", models.Document)
+                            if docs:
+                                # List of tuples (display_name, doc_id)
+                                choices = [(f"{d.title} ({d.size / 1024:.1f} KB)", d.doc_id) for d in docs]
+                        except deadline.DeadlineExceeded:
+                            return gr.update()
+                        except Exception as e:
+                            pass
+                    return render_if_changed(request, "delete_file_selector", choices, lambda c: gr.Dropdown(choices=c))
+                
+                @rate_limited("admin")
+                def delete_file_from_folder(folder_id, doc_id, request: gr.Request):
                     """Delete a specific file from a folder."""
                     if not folder_id:
                         return "❌ Please select a folder first"
@@ -462,6 +894,8 @@ def create_ui():
                         
                         if response.status_code == 200:
                             result = response.json()
+                            document_index.mark_stale()
+                            folder_events.folder_changed(folder_id)
                             return f"✅ File deleted successfully!\n{result.get('message', '')}"
                         else:
                             error_data = response.json() if response.headers.get('content-type') == 'application/json' else {"detail": response.text}
@@ -469,24 +903,23 @@ def create_ui():
                     except Exception as e:
                         return f"❌ Error: {str(e)}"
                 
-                def get_folders_for_deletion():
+                @bounded
+                def get_folders_for_deletion(request: gr.Request):
                     """Get list of folders for deletion dropdown."""
+                    choices = []
                     try:
-                        response = httpx.get(f"{API_BASE}/folders/list", timeout=10.0)
-                        if response.status_code == 200:
-                            folders = response.json()
-                            if not folders:
-                                return gr.Dropdown(choices=[])
-                            # Return list of tuples (display_name, folder_id)
-                            return gr.Dropdown(
-                                choices=[(f"{f['name']} ({f['document_count']} docs)", f['folder_id']) for f in folders]
-                            )
-                        else:
-                            return gr.Dropdown(choices=[])
+                        folders = models.get_models("/folders/list", models.Folder)
+                        if folders:
+                            # List of tuples (display_name, folder_id)
+                            choices = [(f"{f.name} ({f.document_count} docs)", f.folder_id) for f in folders]
+                    except deadline.DeadlineExceeded:
+                        return gr.update()
                     except Exception as e:
-                        return gr.Dropdown(choices=[])
+                        pass
+                    return render_if_changed(request, "delete_folder_selector", choices, lambda c: gr.Dropdown(choices=c))
                 
-                def delete_entire_folder(folder_id):
+                @rate_limited("admin")
+                def delete_entire_folder(folder_id, request: gr.Request):
                     """Delete an entire folder and all its contents."""
                     if not folder_id:
                         return "❌ Please select a folder to delete"
@@ -499,6 +932,8 @@ def create_ui():
                         
                         if response.status_code == 200:
                             result = response.json()
+                            document_index.mark_stale()
+                            folder_events.folder_changed(folder_id)
                             return f"✅ Folder deleted successfully!\n{result.get('message', 'Folder and all its contents have been removed.')}"
                         else:
                             error_data = response.json() if response.headers.get('content-type') == 'application/json' else {"detail": response.text}
@@ -507,6 +942,25 @@ def create_ui():
                         return f"❌ Error: {str(e)}"
                 
                 # Wire up event handlers
+                finder_query.change(
+                    find_documents,
+                    inputs=[finder_query, finder_status_filter],
+                    outputs=[finder_summary, finder_results, finder_status_filter, finder_stats],
+                    trigger_mode="always_last"
+                )
+                
+                finder_status_filter.input(
+                    find_documents,
+                    inputs=[finder_query, finder_status_filter],
+                    outputs=[finder_summary, finder_results, finder_status_filter, finder_stats]
+                )
+                
+                finder_refresh_btn.click(
+                    refresh_document_index,
+                    inputs=[finder_query, finder_status_filter],
+                    outputs=[finder_summary, finder_results, finder_status_filter, finder_stats]
+                )
+                
                 create_folder_btn.click(
                     create_folder,
                     inputs=[folder_name_input],
@@ -515,7 +969,7 @@ def create_ui():
                     list_folders,
                     outputs=[folder_list]
                 ).then(
-                    get_folder_choices,
+                    deadline.continues(get_folder_choices),
                     outputs=[folder_selector]
                 )
                 
@@ -523,23 +977,33 @@ def create_ui():
                     list_folders,
                     outputs=[folder_list]
                 ).then(
-                    get_folder_choices,
+                    deadline.continues(get_folder_choices),
                     outputs=[folder_selector]
                 )
                 
-                upload_to_folder_btn.click(
+                upload_event = upload_to_folder_btn.click(
                     upload_to_folder,
-                    inputs=[folder_selector, file_upload_multi],
+                    inputs=[folder_selector, file_upload_multi, auto_index_checkbox],
                     outputs=[upload_folder_status, upload_text_preview]
                 ).then(
                     list_folder_documents,
                     inputs=[folder_selector],
                     outputs=[document_list]
                 ).then(
-                    list_folders,
+                    deadline.continues(list_folders),
                     outputs=[folder_list]
                 )
                 
+                upload_stop_btn.click(
+                    stop_upload,
+                    outputs=[upload_folder_status],
+                    cancels=[upload_event]
+                ).then(
+                    list_folder_documents,
+                    inputs=[folder_selector],
+                    outputs=[document_list]
+                )
+                
                 folder_selector.change(
                     list_folder_documents,
                     inputs=[folder_selector],
@@ -554,13 +1018,38 @@ def create_ui():
                 
                 index_folder_btn.click(
                     index_folder,
-                    inputs=[folder_selector],
+                    inputs=[folder_selector, index_priority],
                     outputs=[indexing_status]
+                ).then(
+                    list_index_queue,
+                    outputs=[index_queue_view]
                 ).then(
                     list_folders,
                     outputs=[folder_list]
                 )
                 
+                refresh_queue_btn.click(
+                    list_index_queue,
+                    outputs=[index_queue_view]
+                )
+                
+                cancel_queued_btn.click(
+                    cancel_queued_index,
+                    inputs=[folder_selector],
+                    outputs=[indexing_status]
+                ).then(
+                    list_index_queue,
+                    outputs=[index_queue_view]
+                )
+                
+                clear_queue_history_btn.click(
+                    clear_finished_index_jobs,
+                    outputs=[indexing_status]
+                ).then(
+                    list_index_queue,
+                    outputs=[index_queue_view]
+                )
+                
                 check_status_btn.click(
                     check_folder_status,
                     inputs=[folder_selector],
@@ -575,6 +1064,44 @@ def create_ui():
                     outputs=[indexing_status]
                 )
                 
+                sync_now_btn.click(
+                    sync_directory_now,
+                    inputs=[folder_selector, sync_dir_input],
+                    outputs=[sync_status]
+                ).then(
+                    list_folder_documents,
+                    inputs=[folder_selector],
+                    outputs=[document_list]
+                )
+                
+                sync_watch_btn.click(
+                    start_directory_watch,
+                    inputs=[folder_selector, sync_dir_input],
+                    outputs=[sync_status]
+                )
+                
+                sync_stop_btn.click(
+                    stop_directory_watch,
+                    inputs=[folder_selector],
+                    outputs=[sync_status]
+                )
+                
+                plan_reindex_btn.click(
+                    plan_reindex,
+                    outputs=[reindex_plan, reindex_status]
+                )
+                
+                run_reindex_btn.click(
+                    run_incremental_reindex,
+                    outputs=[reindex_plan, reindex_status]
+                ).then(
+                    list_index_queue,
+                    outputs=[index_queue_view]
+                ).then(
+                    list_folders,
+                    outputs=[folder_list]
+                )
+                
                 # File deletion handlers
                 folder_selector.change(
                     get_folder_files_for_deletion,
@@ -597,11 +1124,11 @@ def create_ui():
                     inputs=[folder_selector],
                     outputs=[document_list]
                 ).then(
-                    get_folder_files_for_deletion,
+                    deadline.continues(get_folder_files_for_deletion),
                     inputs=[folder_selector],
                     outputs=[delete_file_selector]
                 ).then(
-                    list_folders,
+                    deadline.continues(list_folders),
                     outputs=[folder_list]
                 )
                 
@@ -619,10 +1146,10 @@ def create_ui():
                     list_folders,
                     outputs=[folder_list]
                 ).then(
-                    get_folder_choices,
+                    deadline.continues(get_folder_choices),
                     outputs=[folder_selector]
                 ).then(
-                    get_folders_for_deletion,
+                    deadline.continues(get_folders_for_deletion),
                     outputs=[delete_folder_selector]
                 )
             
@@ -649,7 +1176,8 @@ def create_ui():
                             interactive=False
                         )
                 
-                def upload_document(file_path):
+                @rate_limited("upload")
+                def upload_document(file_path, request: gr.Request):
                     if not file_path:
                         return "Please select a file"
                     
@@ -660,6 +1188,7 @@ def create_ui():
                         
                         if response.status_code == 200:
                             result = response.json()
+                            temp_storage.release([file_path])
                             return f"✅ Uploaded successfully! Doc ID: {result['doc_id']}\nStatus: {result['status']}"
                         else:
                             return f"❌ Upload failed: {response.text}"
@@ -787,8 +1316,9 @@ def create_ui():
                         
                         agent_status = gr.Textbox(label="Status", interactive=False, lines=3)
                         
-                        # Hidden field to store selected agent ID for editing
-                        selected_agent_id = gr.State(value=None)
+                        # Hidden field to store selected agent ID for editing. Kept in
+                        # the browser (not gr.State) so any frontend worker can serve the edit
+                        selected_agent_id = gr.Textbox(visible=False)
                     
                     with gr.Column():
                         refresh_agents_btn = gr.Button("🔄 Refresh Agent List")
@@ -809,23 +1339,61 @@ def create_ui():
                             load_agent_btn = gr.Button("Load Agent", variant="secondary")
                             delete_agent_btn = gr.Button("Delete Agent", variant="stop")
                 
+                gr.Markdown("---")
+                with gr.Accordion("🧪 Batch Evaluation", open=False):
+                    gr.Markdown("Run a CSV/JSONL question set against one or more agents and compare latency and citations")
+                    with gr.Row():
+                        with gr.Column():
+                            eval_question_file = gr.File(
+                                label="Question File",
+                                file_types=[".csv", ".jsonl"],
+                                type="filepath"
+                            )
+                            eval_agent_selector = gr.CheckboxGroup(
+                                label="Agents to Evaluate",
+                                choices=[]
+                            )
+                            eval_concurrency = gr.Slider(
+                                minimum=1,
+                                maximum=32,
+                                value=batch_eval.DEFAULT_CONCURRENCY,
+                                step=1,
+                                label="Concurrency",
+                                info="Chat requests in flight at once"
+                            )
+                            run_eval_btn = gr.Button("Run Evaluation", variant="primary")
+                        with gr.Column():
+                            eval_status = gr.Textbox(label="Evaluation Status", interactive=False, lines=4)
+                            eval_summary = gr.Dataframe(
+                                headers=["Agent", "Questions", "Errors", "Mean (s)", "P50 (s)", "P95 (s)", "Avg Citations", "Throughput (q/s)"],
+                                label="Summary",
+                                interactive=False,
+                                wrap=True
+                            )
+                            eval_results_file = gr.File(label="Results (JSONL)", interactive=False)
+                
                 # Event handlers for Agents tab
-                def get_folder_choices_for_agents():
+                def folder_access_choices(folders):
+                    # List of tuples (display_name, folder_id)
+                    return [(f"{f.name} ({f.document_count} docs)", f.folder_id) for f in folders]
+                
+                def render_folder_access(request, choices):
+                    return render_if_changed(request, "agent_folder_access", choices, lambda c: gr.CheckboxGroup(choices=c))
+                
+                @bounded
+                def get_folder_choices_for_agents(request: gr.Request):
                     """Get list of folders for checkbox group."""
                     try:
-                        response = httpx.get(f"{API_BASE}/folders/list", timeout=10.0)
-                        if response.status_code == 200:
-                            folders = response.json()
-                            # Return list of tuples (display_name, folder_id)
-                            return gr.CheckboxGroup(
-                                choices=[(f"{f['name']} ({f['document_count']} docs)", f['folder_id']) for f in folders]
-                            )
-                        else:
-                            return gr.CheckboxGroup(choices=[])
+                        folders = models.get_models("/folders/list", models.Folder)
+                        choices = folder_access_choices(folders) if folders is not None else []
+                    except deadline.DeadlineExceeded:
+                        return gr.update()
                     except Exception as e:
-                        return gr.CheckboxGroup(choices=[])
+                        choices = []
+                    return render_folder_access(request, choices)
                 
-                def create_agent(name, role_instructions, folder_access, llm_model, temperature, retrieval_method, top_k):
+                @rate_limited("admin")
+                def create_agent(name, role_instructions, folder_access, llm_model, temperature, retrieval_method, top_k, request: gr.Request):
                     """Create a new agent."""
                     if not name or not name.strip():
                         return "❌ Please enter an agent name (minimum 3 characters)", None
@@ -863,35 +1431,40 @@ def create_ui():
                     except Exception as e:
                         return f"❌ Error: {str(e)}", None
                 
-                def list_agents():
-                    """List all agents."""
+                def agent_rows():
+                    """Rows for the agents table."""
                     try:
-                        response = httpx.get(f"{API_BASE}/agents/list", timeout=10.0)
-                        if response.status_code == 200:
-                            agents = response.json()
+                        agents = models.get_models("/agents/list", models.Agent)
+                        if agents is not None:
                             if not agents:
                                 return [["No agents created yet", "", "", "", "", ""]]
                             
-                            # Get folder names for display
-                            folders_response = httpx.get(f"{API_BASE}/folders/list", timeout=10.0)
+                            # Folder names are optional: short IDs are shown if they don't arrive in time
+                            folders = models.try_get_models("/folders/list", models.Folder)
                             folder_map = {}
-                            if folders_response.status_code == 200:
-                                folders = folders_response.json()
-                                folder_map = {f['folder_id']: f['name'] for f in folders}
+                            if folders is not None:
+                                folder_map = {f.folder_id: f.name for f in folders}
                             
                             return [[
-                                a['name'],
-                                ", ".join([folder_map.get(fid, fid[:8]) for fid in a['folder_access']]),
-                                a['retrieval_method'],
-                                a['llm_model'],
-                                a['created_at'][:19] if a.get('created_at') else "N/A",
-                                a['agent_id']
+                                a.name,
+                                ", ".join([folder_map.get(fid, fid[:8]) for fid in a.folder_access]),
+                                a.retrieval_method,
+                                a.llm_model,
+                                a.created_at[:19] if a.created_at else "N/A",
+                                a.agent_id
                             ] for a in agents]
                         else:
                             return [["Error loading agents", "", "", "", "", ""]]
+                    except deadline.DeadlineExceeded:
+                        return None  # out of time: keep what the browser shows
                     except Exception as e:
                         return [[f"Error: {str(e)}", "", "", "", "", ""]]
                 
+                @bounded
+                def list_agents(request: gr.Request):
+                    """List all agents."""
+                    return render_if_changed(request, "agent_list", agent_rows())
+                
                 def load_agent(agent_id):
                     """Load agent configuration for editing."""
                     if not agent_id or not agent_id.strip():
@@ -921,7 +1494,8 @@ def create_ui():
                     except Exception as e:
                         return f"❌ Error: {str(e)}", "", "", [], "gpt-4o-mini", 0.7, "global", 10, None
                 
-                def update_agent(agent_id, name, role_instructions, folder_access, llm_model, temperature, retrieval_method, top_k):
+                @rate_limited("admin")
+                def update_agent(agent_id, name, role_instructions, folder_access, llm_model, temperature, retrieval_method, top_k, request: gr.Request):
                     """Update an existing agent."""
                     if not agent_id:
                         return "❌ No agent loaded for editing. Please load an agent first.", agent_id
@@ -955,6 +1529,7 @@ def create_ui():
                         
                         if response.status_code == 200:
                             result = response.json()
+                            answer_cache.invalidate_agent(agent_id)
                             return f"✅ Agent '{result['name']}' updated successfully!", None
                         else:
                             error_data = response.json() if response.headers.get('content-type') == 'application/json' else {"detail": response.text}
@@ -962,7 +1537,8 @@ def create_ui():
                     except Exception as e:
                         return f"❌ Error: {str(e)}", agent_id
                 
-                def delete_agent(agent_id):
+                @rate_limited("admin")
+                def delete_agent(agent_id, request: gr.Request):
                     """Delete an agent."""
                     if not agent_id or not agent_id.strip():
                         return "❌ Please enter an agent ID to delete"
@@ -972,6 +1548,7 @@ def create_ui():
                         
                         if response.status_code == 200:
                             result = response.json()
+                            answer_cache.invalidate_agent(agent_id.strip())
                             return f"✅ {result.get('message', 'Agent deleted successfully')}"
                         else:
                             error_data = response.json() if response.headers.get('content-type') == 'application/json' else {"detail": response.text}
@@ -983,6 +1560,74 @@ def create_ui():
                     """Clear the agent form."""
                     return "", "", [], "gpt-4o-mini", 0.7, "global", 10, "Form cleared", None
                 
+                def agent_checkbox_choices(agents):
+                    return [(a.name, a.agent_id) for a in agents or []]
+                
+                def render_agent_checkboxes(request, key, choices):
+                    return render_if_changed(request, key, choices, lambda c: gr.CheckboxGroup(choices=c))
+                
+                @bounded
+                def get_agent_checkbox_choices(request: gr.Request):
+                    """Get list of agents for the evaluation checkbox group."""
+                    agents = models.try_get_models("/agents/list", models.Agent)
+                    return render_agent_checkboxes(request, "eval_agent_selector", agent_checkbox_choices(agents))
+                
+                @rate_limited("admin")
+                def run_batch_evaluation(question_file, agent_ids, concurrency, request: gr.Request):
+                    """Run the question set against the selected agents, reporting progress."""
+                    if not question_file:
+                        yield "❌ Please upload a question file", gr.update(), None
+                        return
+                    
+                    if not agent_ids:
+                        yield "❌ Please select at least one agent", gr.update(), None
+                        return
+                    
+                    try:
+                        questions = batch_eval.load_questions(question_file)
+                    except Exception as e:
+                        yield f"❌ Error reading questions: {str(e)}", gr.update(), None
+                        return
+                    
+                    if not questions:
+                        yield "❌ No questions found in file", gr.update(), None
+                        return
+                    
+                    total = len(questions) * len(agent_ids)
+                    results = []
+                    errors = 0
+                    start = time.perf_counter()
+                    yield f"⏳ Running {len(questions)} questions x {len(agent_ids)} agents...", gr.update(), None
+                    
+                    for result in batch_eval.run_batch(questions, agent_ids, int(concurrency),
+                                                       admission=chat_admission, session=session_hash(request)):
+                        results.append(result)
+                        errors += 1 if result['error'] else 0
+                        # Throttle progress updates on large runs
+                        if len(results) % 10 == 0 and len(results) < total:
+                            yield f"⏳ {len(results)}/{total} done ({errors} errors)", gr.update(), None
+                    
+                    wall_time = time.perf_counter() - start
+                    output_path = batch_eval.write_results(results)
+                    
+                    agent_names = {a.agent_id: a.name for a in models.try_get_models("/agents/list", models.Agent) or []}
+                    rows = [[
+                        agent_names.get(row['agent_id'], row['agent_id'][:8]),
+                        str(row['questions']),
+                        str(row['errors']),
+                        f"{row['mean_latency']:.2f}",
+                        f"{row['p50_latency']:.2f}",
+                        f"{row['p95_latency']:.2f}",
+                        f"{row['avg_citations']:.1f}",
+                        f"{row['throughput']:.2f}"
+                    ] for row in batch_eval.summarize(results, wall_time)]
+                    
+                    yield (
+                        f"✅ Evaluation complete: {total} requests in {wall_time:.1f}s ({errors} errors)",
+                        rows,
+                        output_path
+                    )
+                
                 # Wire up event handlers
                 create_agent_btn.click(
                     create_agent,
@@ -1078,6 +1723,15 @@ def create_ui():
                 ).then(
                     get_folder_choices_for_agents,
                     outputs=[agent_folder_access]
+                ).then(
+                    get_agent_checkbox_choices,
+                    outputs=[eval_agent_selector]
+                )
+                
+                run_eval_btn.click(
+                    run_batch_evaluation,
+                    inputs=[eval_question_file, eval_agent_selector, eval_concurrency],
+                    outputs=[eval_status, eval_summary, eval_results_file]
                 )
             
             # Tab 3: Chat Playground
@@ -1116,7 +1770,9 @@ def create_ui():
                         
                         with gr.Row():
                             chat_send_btn = gr.Button("Send", variant="primary")
+                            chat_stop_btn = gr.Button("⏹️ Stop")
                             chat_clear_btn = gr.Button("Clear History")
+                            chat_load_older_btn = gr.Button("⬆️ Load Older Messages")
                         
                         # Citations accordion
                         with gr.Accordion("📚 Citations", open=False) as citations_accordion:
@@ -1127,121 +1783,284 @@ def create_ui():
                                 wrap=True
                             )
                 
-                # Hidden state for session management
-                chat_session_id = gr.State(value=None)
+                # Comparison mode: one question, several agents side by side
+                with gr.Accordion("⚖️ Compare Agents", open=False):
+                    gr.Markdown("Send one message to several agents at once and compare speed, citations and answers")
+                    with gr.Row():
+                        compare_agent_selector = gr.CheckboxGroup(
+                            label="Agents to Compare",
+                            choices=[],
+                            info=f"Select up to {agent_compare.MAX_COMPARE_AGENTS} agents"
+                        )
+                    compare_msg_input = gr.Textbox(
+                        label="Question",
+                        placeholder="Ask every selected agent the same question...",
+                        lines=2,
+                        max_lines=5
+                    )
+                    compare_send_btn = gr.Button("Ask Selected Agents", variant="primary")
+                    compare_summary = gr.Dataframe(
+                        headers=["Agent", "Model", "Method", "Top K", "Latency (s)", "Citations"],
+                        label="Comparison Summary",
+                        interactive=False,
+                        wrap=True
+                    )
+                    with gr.Row():
+                        compare_panels = [
+                            gr.Markdown(visible=False)
+                            for _ in range(agent_compare.MAX_COMPARE_AGENTS)
+                        ]
+                
+                # Full-text search over past answers, served from the local transcript index
+                with gr.Accordion("🔎 Search Past Conversations", open=False):
+                    gr.Markdown(
+                        "Find earlier questions and answers asked from this browser without asking the agent again. "
+                        f"Turns are kept until the browser hasn't chatted for {transcript_index.retention / 86400:g} days."
+                        if transcript_index is not None else
+                        "Find earlier questions and answers asked from this browser without asking the agent again."
+                    )
+                    with gr.Row():
+                        transcript_query = gr.Textbox(
+                            label="Search",
+                            placeholder="Words from a question, answer or cited document...",
+                            scale=4
+                        )
+                        transcript_selected_only = gr.Checkbox(
+                            label="Selected agent only",
+                            value=True,
+                            scale=1
+                        )
+                    with gr.Row():
+                        transcript_search_btn = gr.Button("🔎 Search")
+                        transcript_forget_btn = gr.Button("🗑️ Forget This Browser's Turns", variant="stop")
+                    transcript_search_status = gr.Markdown()
+                    transcript_results = gr.Dataframe(
+                        headers=["Time", "Agent", "Question", "Match", "Sources"],
+                        label="Matching Turns",
+                        interactive=False,
+                        wrap=True
+                    )
+                
+                # Hidden backend chat session ID, kept in the browser (not gr.State)
+                # so requests don't depend on which frontend worker serves them
+                chat_session_id = gr.Textbox(visible=False)
+                
+                # Hidden persistent browser ID, filled in on page load
+                browser_id = gr.Textbox(visible=False)
                 
                 # Event handlers for Chat Playground
-                def get_agent_choices_for_chat():
+                def agent_choices(agents):
+                    # List of tuples (display_name, agent_id)
+                    return [(a.name, a.agent_id) for a in agents]
+                
+                def render_chat_agents(request, choices, **kwargs):
+                    return render_if_changed(request, "chat_agent_selector", choices, lambda c: gr.Dropdown(choices=c, **kwargs))
+                
+                @bounded
+                def get_agent_choices_for_chat(request: gr.Request):
                     """Get list of agents for dropdown."""
                     try:
-                        response = httpx.get(f"{API_BASE}/agents/list", timeout=10.0)
-                        if response.status_code == 200:
-                            agents = response.json()
-                            if not agents:
-                                return gr.Dropdown(choices=[])
-                            # Return list of tuples (display_name, agent_id)
-                            return gr.Dropdown(
-                                choices=[(a['name'], a['agent_id']) for a in agents]
-                            )
-                        else:
-                            return gr.Dropdown(choices=[])
+                        agents = models.get_models("/agents/list", models.Agent)
+                        choices = agent_choices(agents) if agents is not None else []
+                    except deadline.DeadlineExceeded:
+                        return gr.update()
                     except Exception as e:
-                        return gr.Dropdown(choices=[])
+                        choices = []
+                    return render_chat_agents(request, choices)
+                
+                @bounded
+                def get_compare_agent_choices(request: gr.Request):
+                    """Get list of agents for the comparison checkbox group."""
+                    agents = models.try_get_models("/agents/list", models.Agent)
+                    return render_agent_checkboxes(request, "compare_agent_selector", agent_checkbox_choices(agents))
+                
+                def format_agent_info(agent, folders):
+                    """Render agent information as markdown."""
+                    folder_map = {f.folder_id: f.name for f in folders or []}
+                    folder_names = [folder_map.get(fid, fid[:8]) for fid in agent.folder_access]
+                    
+                    return f"""
+**Agent:** {agent.name}
+
+**Accessible Folders:** {', '.join(folder_names)}
+
+**Model:** {agent.llm_model} | **Method:** {agent.retrieval_method} | **Top K:** {agent.top_k}
+"""
                 
+                @bounded
                 def display_agent_info(agent_id):
                     """Display selected agent information."""
                     if not agent_id:
                         return "**No agent selected**"
                     
                     try:
-                        response = httpx.get(f"{API_BASE}/agents/{agent_id}", timeout=10.0)
-                        if response.status_code == 200:
-                            agent = response.json()
-                            
-                            # Get folder names
-                            folders_response = httpx.get(f"{API_BASE}/folders/list", timeout=10.0)
-                            folder_map = {}
-                            if folders_response.status_code == 200:
-                                folders = folders_response.json()
-                                folder_map = {f['folder_id']: f['name'] for f in folders}
-                            
-                            folder_names = [folder_map.get(fid, fid[:8]) for fid in agent['folder_access']]
-                            
-                            info = f"""
-**Agent:** {agent['name']}
-
-**Accessible Folders:** {', '.join(folder_names)}
-
-**Model:** {agent['llm_model']} | **Method:** {agent['retrieval_method']} | **Top K:** {agent['top_k']}
-"""
-                            return info
-                        else:
+                        # Agent config and folder names are independent - fetch both at once
+                        agent, folders = backend_client.run_parallel(
+                            lambda: models.get_model(f"/agents/{agent_id}", models.Agent),
+                            lambda: models.try_get_models("/folders/list", models.Folder)
+                        )
+                        if agent is None:
                             return "**Error loading agent information**"
+                        return format_agent_info(agent, folders)
+                    except deadline.DeadlineExceeded:
+                        return "**⏱️ Agent information did not load in time - select the agent again to retry**"
                     except Exception as e:
                         return f"**Error:** {str(e)}"
                 
-                def send_chat_message(agent_id, message, chat_history, session_id):
-                    """Send message to agent and get response."""
+                def record_turn(session_key, message, reply):
+                    """Append a turn to the server-side transcript and return the bounded render."""
+                    window = transcripts.get(session_key) or history_window.HistoryWindow()
+                    window.append(message, reply)
+                    # Snap back to the latest page so each response stays constant-size
+                    window.collapse()
+                    transcripts.put(session_key, window)
+                    return window.rendered()
+                
+                def index_turn(browser, agent_id, session_id, message, answer, citations_data):
+                    """Add an answered turn to the browser's transcript search index (best effort)."""
+                    if transcript_index is None:
+                        return
+                    try:
+                        transcript_index.record(browser, agent_id, session_id, message, answer, citations_data)
+                    except Exception as e:
+                        print(f"⚠️ Could not index chat turn: {e}")
+                
+                def rendered_history(session_key):
+                    window = transcripts.get(session_key)
+                    return window.rendered() if window else []
+                
+                @rate_limited("chat")
+                async def send_chat_message(agent_id, message, session_id, browser_id, request: gr.Request):
+                    """
+                    Send message to agent and get response.
+                    
+                    The request first waits for an admission slot; meanwhile the
+                    chatbot shows the message with its place in line. A Stop click,
+                    Clear History or a newer message cancels it, closing the backend
+                    connection.
+                    """
                     if not agent_id:
-                        return chat_history, [["Please select an agent first", "", ""]], session_id, ""
+                        yield gr.update(), [["Please select an agent first", "", ""]], session_id, ""
+                        return
                     
                     if not message or not message.strip():
-                        return chat_history, [["Please enter a message", "", ""]], session_id, ""
+                        yield gr.update(), [["Please enter a message", "", ""]], session_id, ""
+                        return
+                    
+                    session_key = session_hash(request)
+                    browser = browser_key(browser_id, request)
                     
-                    # Add user message to chat history
-                    chat_history.append((message, None))
+                    history = await asyncio.to_thread(rendered_history, session_key)
+                    opening = not session_id and not history
+                    backend_message = message
+                    
+                    # A new conversation may be answered from a near-duplicate question
+                    if opening:
+                        cached = await asyncio.to_thread(answer_cache.lookup, agent_id, message)
+                        if cached is not None:
+                            reply = f"{cached.answer}\n\n_♻️ Cached answer to a similar question: \"{cached.question}\"_"
+                            chat_history = await asyncio.to_thread(record_turn, session_key, message, reply)
+                            await asyncio.to_thread(answer_cache.remember_served, session_key, agent_id, message, cached.answer)
+                            await asyncio.to_thread(index_turn, browser, agent_id, session_id, message, cached.answer, cached.citations)
+                            yield chat_history, cached.citations, session_id, ""
+                            return
+                    elif not session_id:
+                        # The backend never saw a cached answer; send it along with the follow-up
+                        backend_message = await asyncio.to_thread(answer_cache.context_for, session_key, agent_id, message) or message
                     
                     try:
-                        # Prepare request payload
-                        payload = {
-                            "message": message.strip(),
-                            "stream": False
-                        }
-                        
-                        if session_id:
-                            payload["session_id"] = session_id
+                        ticket = chat_admission.submit(session_key, agent_id)
+                    except Overloaded as e:
+                        reply = f"⚠️ The assistant is at capacity right now ({e}). Please try again in a minute."
+                        chat_history = await asyncio.to_thread(record_turn, session_key, message, reply)
+                        yield chat_history, [["Server busy - message not sent", "", ""]], session_id, ""
+                        return
+                    
+                    token = in_flight.start(session_key, "chat", supersede=True)
+                    token.bind_current_task()
+                    try:
+                        wait_until = time.monotonic() + admission.QUEUE_TIMEOUT
+                        position = None
+                        while ticket.state != "running":
+                            if time.monotonic() > wait_until:
+                                reply = f"⚠️ No free slot after waiting {admission.QUEUE_TIMEOUT:.0f}s. Please try again in a minute."
+                                chat_history = await asyncio.to_thread(record_turn, session_key, message, reply)
+                                yield chat_history, [["Server busy - message not sent", "", ""]], session_id, ""
+                                return
+                            if chat_admission.position(ticket) != position:
+                                position = chat_admission.position(ticket)
+                                status = f"⏳ Waiting for a free slot - #{position} in line"
+                                yield history + [(message, status)], gr.update(), session_id, ""
+                            await chat_admission.wait(ticket, 1.0)
                         
-                        # Call chat API
-                        response = httpx.post(
-                            f"{API_BASE}/chat/{agent_id}/message",
-                            json=payload,
-                            timeout=120.0
-                        )
+                        yield history + [(message, "💭 Thinking...")], gr.update(), session_id, ""
                         
+                        try:
+                            response = await backend_client.post_chat_message_async(agent_id, backend_message, session_id)
+                        except httpx.HTTPError as e:
+                            chat_history = await asyncio.to_thread(record_turn, session_key, message, f"❌ Error: {str(e)}")
+                            yield chat_history, [["Error occurred", "", str(e)]], session_id, ""
+                            return
+                        yield await asyncio.to_thread(chat_reply, session_key, browser, agent_id, message, session_id, response, opening)
+                    except asyncio.CancelledError:
+                        record_turn(session_key, message, "⏹️ Stopped")
+                        raise
+                    finally:
+                        chat_admission.release(ticket)
+                        in_flight.finish(token)
+                
+                def chat_reply(session_key, browser, agent_id, message, session_id, response, opening):
+                    """Record the backend's answer to a chat message; returns the handler outputs."""
+                    try:
                         if response.status_code == 200:
                             result = response.json()
                             answer = result['response']
-                            citations = result.get('citations', [])
+                            citations = models.parse_list(models.Citation, result.get('citations') or [])
                             new_session_id = result.get('session_id', session_id)
                             
                             # Update chat history with response
-                            chat_history[-1] = (message, answer)
+                            chat_history = record_turn(session_key, message, answer)
                             
                             # Format citations for dataframe
                             if citations:
                                 citations_data = []
                                 for citation in citations:
-                                    folder_name = citation.get('folder_name', 'Unknown')
-                                    doc_title = citation.get('title', 'Unknown')
-                                    snippet = citation.get('snippet', '')[:200] + "..." if len(citation.get('snippet', '')) > 200 else citation.get('snippet', '')
-                                    citations_data.append([folder_name, doc_title, snippet])
+                                    snippet = citation.snippet[:200] + "..." if len(citation.snippet) > 200 else citation.snippet
+                                    citations_data.append([citation.folder_name, citation.title, snippet])
                             else:
                                 citations_data = [["No citations", "", ""]]
                             
+                            if opening:
+                                answer_cache.put(agent_id, message, answer, citations_data, response.elapsed.total_seconds())
+                            elif not session_id:
+                                answer_cache.forget_served(session_key)  # the backend session has the context now
+                            index_turn(browser, agent_id, new_session_id, message, answer, citations_data)
                             return chat_history, citations_data, new_session_id, ""
                         else:
-                            error_data = response.json() if response.headers.get('content-type') == 'application/json' else {"detail": response.text}
-                            error_msg = f"❌ Error: {error_data.get('detail', 'Unknown error')}"
-                            chat_history[-1] = (message, error_msg)
+                            error_msg = f"❌ Error: {backend_client.error_detail(response)}"
+                            chat_history = record_turn(session_key, message, error_msg)
                             return chat_history, [["Error occurred", "", ""]], session_id, ""
                     
                     except Exception as e:
                         error_msg = f"❌ Error: {str(e)}"
-                        chat_history[-1] = (message, error_msg)
+                        chat_history = record_turn(session_key, message, error_msg)
                         return chat_history, [["Error occurred", "", str(e)]], session_id, ""
                 
-                def clear_chat_history(agent_id, session_id):
-                    """Clear conversation history."""
+                async def stop_chat(request: gr.Request):
+                    """Stop the session's chat request and re-render the transcript."""
+                    session_key = session_hash(request)
+                    await in_flight.cancel_and_wait(session_key, "chat")
+                    return await asyncio.to_thread(rendered_history, session_key)
+                
+                async def clear_chat_history(agent_id, session_id, request: gr.Request):
+                    """Stop any chat request still running, then clear conversation history."""
+                    session_key = session_hash(request)
+                    await in_flight.cancel_and_wait(session_key, "chat")
+                    return await asyncio.to_thread(clear_history, session_key, agent_id, session_id)
+                
+                def clear_history(session_key, agent_id, session_id):
+                    transcripts.discard(session_key)
+                    answer_cache.forget_served(session_key)
                     if not agent_id:
                         return [], [["No agent selected", "", ""]], None
                     
@@ -1260,81 +2079,303 @@ def create_ui():
                         return [], [[f"Error clearing history: {str(e)}", "", ""]], None
                 
                 def load_chat_history(agent_id, session_id):
-                    """Load existing chat history when agent is selected."""
+                    """Load the most recent page of chat history when agent is selected."""
                     if not agent_id:
-                        return [], [["No agent selected", "", ""]]
+                        return [], [["No agent selected", "", ""]], None
                     
                     try:
-                        # Try to load recent history
-                        params = {}
-                        if session_id:
-                            params["session_id"] = session_id
+                        window = history_window.open_window(agent_id, session_id)
+                        if window is None:
+                            return [], [["No previous history", "", ""]], None
                         
-                        response = httpx.get(
-                            f"{API_BASE}/chat/{agent_id}/history",
-                            params=params,
-                            timeout=10.0
+                        status = "History loaded"
+                        if window.has_older():
+                            status += " (click 'Load Older Messages' for earlier turns)"
+                        return window.rendered(), [[status, "", ""]], window
+                    except Exception as e:
+                        return [], [[f"Error loading history: {str(e)}", "", ""]], None
+                
+                def load_older_history(agent_id, session_id, request: gr.Request):
+                    """Reveal the next page of older turns in the open conversation."""
+                    window = transcripts.get(session_hash(request))
+                    if not agent_id or window is None:
+                        return gr.update()
+                    
+                    try:
+                        window = history_window.load_older(window, agent_id, session_id)
+                        transcripts.put(session_hash(request), window)
+                        return window.rendered()
+                    except Exception as e:
+                        return gr.update()
+                
+                def fetch_agent_view(agent_id, session_id):
+                    """Fetch agent info and the latest history page concurrently."""
+                    if not agent_id:
+                        return (display_agent_info(agent_id), *load_chat_history(agent_id, session_id))
+                    
+                    agent, folders, history = backend_client.run_parallel(
+                        lambda: models.try_get_model(f"/agents/{agent_id}", models.Agent),
+                        lambda: models.try_get_models("/folders/list", models.Folder),
+                        lambda: load_chat_history(agent_id, session_id)
+                    )
+                    if agent is None:
+                        return ("**Error loading agent information**", *history)
+                    return (format_agent_info(agent, folders), *history)
+                
+                @bounded
+                def select_agent(agent_id, session_id, request: gr.Request):
+                    """Load agent info and chat history for the selected agent."""
+                    # Served from this page's load prefetch when available
+                    view = prefetch_cache.pop(("agent", session_hash(request), agent_id, session_id or None))
+                    if view is None:
+                        view = fetch_agent_view(agent_id, session_id)
+                    
+                    info, chat_history, citations, window = view
+                    if window is None:
+                        transcripts.discard(session_hash(request))
+                    else:
+                        transcripts.put(session_hash(request), window)
+                    return info, chat_history, citations
+                
+                def search_transcripts(query, agent_id, selected_only, browser_id, request: gr.Request):
+                    """Search this browser's indexed chat turns, from any visit; never calls the backend."""
+                    if transcript_index is None:
+                        return "ℹ️ Transcript search is disabled (TRANSCRIPT_INDEX_DB is empty)", []
+                    if not query or not query.strip():
+                        return "Please enter words to search for", []
+                    if selected_only and not agent_id:
+                        return "Please select an agent first, or untick 'Selected agent only'", []
+                    
+                    started = time.perf_counter()
+                    try:
+                        matches = transcript_index.search(query, browser_key(browser_id, request), agent_id if selected_only else None)
+                    except Exception as e:
+                        return f"❌ Search failed: {str(e)}", []
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+                    
+                    rows = []
+                    for match in matches:
+                        sources = ", ".join(
+                            citation[1] for citation in match['citations'] if len(citation) > 1 and citation[1]
                         )
-                        
-                        if response.status_code == 200:
-                            result = response.json()
-                            messages = result.get('messages', [])
-                            
-                            # Convert to chat history format
-                            chat_history = []
-                            for i in range(0, len(messages), 2):
-                                if i + 1 < len(messages):
-                                    user_msg = messages[i]['content']
-                                    assistant_msg = messages[i + 1]['content']
-                                    chat_history.append((user_msg, assistant_msg))
-                            
-                            return chat_history, [["History loaded", "", ""]]
-                        else:
-                            return [], [["No previous history", "", ""]]
+                        rows.append([
+                            time.strftime("%Y-%m-%d %H:%M", time.localtime(match['created_at'])),
+                            match['agent_id'],
+                            match['question'],
+                            match['snippet'],
+                            sources
+                        ])
+                    if not rows:
+                        return f"No matching turns ({elapsed_ms:.1f} ms)", []
+                    return f"✅ Found {len(rows)} matching turn(s) in {elapsed_ms:.1f} ms", rows
+                
+                def forget_transcripts(browser_id, request: gr.Request):
+                    """Remove this browser's turns from the transcript search index."""
+                    if transcript_index is None:
+                        return "ℹ️ Transcript search is disabled (TRANSCRIPT_INDEX_DB is empty)", []
+                    try:
+                        removed = transcript_index.forget_session(browser_key(browser_id, request))
                     except Exception as e:
-                        return [], [[f"Error loading history: {str(e)}", "", ""]]
+                        return f"❌ Could not remove indexed chat turns: {str(e)}", gr.update()
+                    return f"✅ Forgot {removed} indexed turn(s) from this browser", []
+                
+                def format_compare_panel(agent, result):
+                    """Render one agent's answer with its latency and citation count."""
+                    if result is None:
+                        return f"#### 🤖 {agent.name}\n\n⏳ Waiting for response..."
+                    
+                    header = f"#### 🤖 {agent.name}\n\n⏱️ {result['latency']:.2f} s | 📚 {len(result['citations'])} citations"
+                    if result['error']:
+                        return f"{header}\n\n❌ Error: {result['error']}"
+                    return f"{header}\n\n{result['answer']}"
+                
+                # One chat message per agent asked
+                @rate_limited("chat", cost=lambda agent_ids, *_, **__: max(1, len((agent_ids or [])[:len(compare_panels)])))
+                def compare_agents(agent_ids, message, request: gr.Request):
+                    """Ask the selected agents concurrently, updating each panel as its answer arrives."""
+                    hidden = [gr.Markdown(visible=False) for _ in compare_panels]
+                    if not agent_ids:
+                        yield [["Please select at least one agent", "", "", "", "", ""]], *hidden
+                        return
+                    
+                    if not message or not message.strip():
+                        yield [["Please enter a question", "", "", "", "", ""]], *hidden
+                        return
+                    
+                    agent_ids = agent_ids[:len(compare_panels)]
+                    pending = agent_compare.fan_out(agent_ids, message, admission=chat_admission,
+                                                    session=session_hash(request))
+                    agent_map = {a.agent_id: a for a in models.try_get_models("/agents/list", models.Agent) or []}
+                    agents = [agent_map.get(agent_id) or models.Agent(agent_id, agent_id[:8]) for agent_id in agent_ids]
+                    results = [None] * len(agent_ids)
+                    
+                    def render():
+                        rows = [[
+                            agent.name,
+                            agent.llm_model,
+                            agent.retrieval_method,
+                            str(agent.top_k or "?"),
+                            f"{result['latency']:.2f}" if result else "...",
+                            ("error" if result['error'] else str(len(result['citations']))) if result else "..."
+                        ] for agent, result in zip(agents, results)]
+                        panels = [
+                            gr.Markdown(value=format_compare_panel(agent, result), visible=True)
+                            for agent, result in zip(agents, results)
+                        ]
+                        return [rows, *panels, *hidden[len(panels):]]
+                    
+                    yield render()
+                    for i, result in pending:
+                        results[i] = result
+                        yield render()
                 
                 # Wire up event handlers
                 refresh_chat_agents_btn.click(
                     get_agent_choices_for_chat,
                     outputs=[chat_agent_selector]
+                ).then(
+                    get_compare_agent_choices,
+                    outputs=[compare_agent_selector]
+                )
+                
+                compare_send_btn.click(
+                    compare_agents,
+                    inputs=[compare_agent_selector, compare_msg_input],
+                    outputs=[compare_summary, *compare_panels]
                 )
                 
                 chat_agent_selector.change(
-                    display_agent_info,
-                    inputs=[chat_agent_selector],
-                    outputs=[agent_info_display]
-                ).then(
-                    load_chat_history,
+                    select_agent,
                     inputs=[chat_agent_selector, chat_session_id],
-                    outputs=[chat_playground_chatbot, citations_dataframe]
+                    outputs=[agent_info_display, chat_playground_chatbot, citations_dataframe],
+                    js=REMEMBER_AGENT_JS
                 )
                 
-                chat_send_btn.click(
+                chat_send_event = chat_send_btn.click(
                     send_chat_message,
-                    inputs=[chat_agent_selector, chat_msg_input, chat_playground_chatbot, chat_session_id],
-                    outputs=[chat_playground_chatbot, citations_dataframe, chat_session_id, chat_msg_input]
+                    inputs=[chat_agent_selector, chat_msg_input, chat_session_id, browser_id],
+                    outputs=[chat_playground_chatbot, citations_dataframe, chat_session_id, chat_msg_input],
+                    concurrency_limit=None  # chat_admission enforces the caps
                 )
                 
-                chat_msg_input.submit(
+                chat_submit_event = chat_msg_input.submit(
                     send_chat_message,
-                    inputs=[chat_agent_selector, chat_msg_input, chat_playground_chatbot, chat_session_id],
-                    outputs=[chat_playground_chatbot, citations_dataframe, chat_session_id, chat_msg_input]
+                    inputs=[chat_agent_selector, chat_msg_input, chat_session_id, browser_id],
+                    outputs=[chat_playground_chatbot, citations_dataframe, chat_session_id, chat_msg_input],
+                    concurrency_limit=None  # chat_admission enforces the caps
+                )
+                
+                chat_stop_btn.click(
+                    stop_chat,
+                    outputs=[chat_playground_chatbot],
+                    cancels=[chat_send_event, chat_submit_event]
                 )
                 
                 chat_clear_btn.click(
                     clear_chat_history,
                     inputs=[chat_agent_selector, chat_session_id],
-                    outputs=[chat_playground_chatbot, citations_dataframe, chat_session_id]
+                    outputs=[chat_playground_chatbot, citations_dataframe, chat_session_id],
+                    cancels=[chat_send_event, chat_submit_event]
+                )
+                
+                chat_load_older_btn.click(
+                    load_older_history,
+                    inputs=[chat_agent_selector, chat_session_id],
+                    outputs=[chat_playground_chatbot]
+                )
+                
+                transcript_search_btn.click(
+                    search_transcripts,
+                    inputs=[transcript_query, chat_agent_selector, transcript_selected_only, browser_id],
+                    outputs=[transcript_search_status, transcript_results]
+                )
+                
+                transcript_query.submit(
+                    search_transcripts,
+                    inputs=[transcript_query, chat_agent_selector, transcript_selected_only, browser_id],
+                    outputs=[transcript_search_status, transcript_results]
+                )
+                
+                transcript_forget_btn.click(
+                    forget_transcripts,
+                    inputs=[browser_id],
+                    outputs=[transcript_search_status, transcript_results]
                 )
         
         gr.Markdown("---")
         gr.Markdown("💡 **Tip:** Upload documents → Index them → Create agents → Start chatting!")
         
+        with gr.Accordion("📈 Frontend Status", open=False):
+            gr.Markdown("Counters of the UI process serving this page: rate limiting, chat admission and caches.")
+            frontend_stats_view = gr.JSON(label="Counters")
+            refresh_stats_btn = gr.Button("🔄 Refresh Counters")
+        
+        def frontend_stats():
+            """Rate limiting, chat admission and cache counters of this UI process."""
+            return {
+                'rate_limits': rate_limit.stats(),
+                'chat_admission': chat_admission.stats(),
+                'answer_cache': answer_cache.stats(),
+                'document_index': document_index.stats(),
+                'render_cache': render_cache.stats(),
+                'transcripts': transcripts.stats(),
+                'transcript_index': transcript_index.stats() if transcript_index else None
+            }
+        
+        refresh_stats_btn.click(frontend_stats, outputs=[frontend_stats_view])
+        
+        @bounded
+        def prefetch_initial_data(last_agent_id, browser, request: gr.Request):
+            """
+            Warm folders, agents and the browser's last-used agent in a single round-trip.
+            
+            The last-used agent and the browser ID come from the browser's
+            localStorage (see RECALL_BROWSER_JS); the ID is stored in the hidden
+            browser_id field for later events. Its info and history are parked in the prefetch
+            cache, keyed by this page's session, so the selector's change event
+            renders them without refetching.
+            """
+            agent_id = last_agent_id if last_agent_id and AGENT_ID.fullmatch(last_agent_id) else None
+            calls = [
+                lambda: models.try_get_models("/folders/list", models.Folder),
+                lambda: models.try_get_models("/agents/list", models.Agent)
+            ]
+            if agent_id:
+                calls += [
+                    lambda: models.try_get_model(f"/agents/{agent_id}", models.Agent),
+                    lambda: load_chat_history(agent_id, None)
+                ]
+            folders, agents, *agent_data = backend_client.run_parallel(*calls)
+            
+            selected = None
+            if agent_data and agents and agent_data[0] is not None:
+                if any(a.agent_id == agent_id for a in agents):
+                    agent, history = agent_data
+                    prefetch_cache.put(
+                        ("agent", session_hash(request), agent_id, None),
+                        (format_agent_info(agent, folders), *history)
+                    )
+                    selected = agent_id
+            
+            # Recording these renders lets later refreshes skip unchanged lists
+            agent_checkboxes = agent_checkbox_choices(agents)
+            return (
+                render_folder_selector(request, folder_choices(folders or [])),
+                render_folder_access(request, folder_access_choices(folders or [])),
+                render_chat_agents(request, agent_choices(agents or []), value=selected),
+                render_agent_checkboxes(request, "compare_agent_selector", agent_checkboxes),
+                render_agent_checkboxes(request, "eval_agent_selector", agent_checkboxes),
+                browser if browser and BROWSER_ID.fullmatch(browser) else ""
+            )
+        
         # Load initial data when the app starts
+        last_agent_id = gr.Textbox(visible=False)
         app.load(
-            fn=lambda: (get_folder_choices(), get_folder_choices_for_agents()),
-            outputs=[folder_selector, agent_folder_access]
+            fn=prefetch_initial_data,
+            inputs=[last_agent_id, browser_id],
+            js=RECALL_BROWSER_JS,
+            outputs=[folder_selector, agent_folder_access, chat_agent_selector, compare_agent_selector, eval_agent_selector,
+                     browser_id]
         )
     
     return app
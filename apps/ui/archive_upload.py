@@ -0,0 +1,216 @@
+"""
+Parallel upload pipeline for plain files and ZIP/TAR archives.
+
+Archives are read member by member: each supported member is copied into a
+spooled temp file (in memory up to a threshold, on disk beyond it) and
+handed to an upload worker, so an archive is never unpacked in full.
+Members are read lazily, only a few ahead of the uploads, which keeps
+memory and disk use bounded by the concurrency rather than the archive size.
+"""
+import os
+import tarfile
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional
+
+from apps.ui import backend_client
+from apps.ui.cancellation import CancellableReader, Cancelled, CancelToken
+
+ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+
+# Extensions offered by the upload widget (browsers match the last suffix only)
+ARCHIVE_FILE_TYPES = [".zip", ".tar", ".gz", ".tgz", ".bz2", ".tbz2", ".xz", ".txz"]
+
+# Uploads in flight per upload request
+UPLOAD_CONCURRENCY = int(os.getenv("UPLOAD_CONCURRENCY", "4"))
+
+# Guards against archive bombs
+MAX_MEMBER_BYTES = int(os.getenv("ARCHIVE_MAX_MEMBER_MB", "100")) * 1024 * 1024
+MAX_MEMBERS = int(os.getenv("ARCHIVE_MAX_MEMBERS", "5000"))
+
+# Members smaller than this stay in memory while they wait for a worker
+SPOOL_BYTES = 8 * 1024 * 1024
+
+
+def is_archive(name: str) -> bool:
+    return name.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def _spool(stream: BinaryIO, limit: int) -> BinaryIO:
+    """Copy at most `limit` bytes of a member stream into a spooled temp file."""
+    spooled = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+    copied = 0
+    while True:
+        chunk = stream.read(1024 * 1024)
+        if not chunk:
+            break
+        copied += len(chunk)
+        if copied > limit:
+            spooled.close()
+            raise ValueError(f"Member exceeds {limit // (1024 * 1024)} MB limit")
+        spooled.write(chunk)
+    spooled.seek(0)
+    return spooled
+
+
+def _member_source(archive_name: str, member_name: str, size: int, opener) -> Optional[Dict[str, Any]]:
+    """Build an upload source for one archive member, or None if it isn't a document."""
+    filename = os.path.basename(member_name)
+    if not filename or filename.startswith('.') or '__MACOSX' in member_name:
+        return None
+
+    label = f"{archive_name}/{member_name}"
+    if not filename.lower().endswith(backend_client.SUPPORTED_EXTENSIONS):
+        return {'label': label, 'filename': filename, 'skip': "unsupported file type"}
+    if size > MAX_MEMBER_BYTES:
+        return {'label': label, 'filename': filename, 'skip': f"larger than {MAX_MEMBER_BYTES // (1024 * 1024)} MB"}
+
+    try:
+        with opener() as stream:
+            return {'label': label, 'filename': filename, 'file': _spool(stream, MAX_MEMBER_BYTES)}
+    except Exception as e:
+        return {'label': label, 'filename': filename, 'error': f"Could not extract: {str(e)}"}
+
+
+def iter_archive(archive_path: str, archive_name: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Stream upload sources out of a ZIP or TAR archive.
+
+    TAR files (optionally gzip/bzip2/xz compressed) are opened in stream
+    mode and read strictly front to back; ZIP members are decompressed
+    one at a time from the central directory.
+
+    Yields:
+        Source dictionaries with label and filename plus either 'file'
+        (an open spooled copy), 'skip' (reason) or 'error'
+    """
+    archive_name = archive_name or os.path.basename(archive_path)
+    count = 0
+
+    if zipfile.is_zipfile(archive_path):
+        with zipfile.ZipFile(archive_path) as zf:
+            for info in zf.infolist():
+                if info.is_dir():
+                    continue
+                source = _member_source(archive_name, info.filename, info.file_size,
+                                        lambda info=info: zf.open(info))
+                if source is None:
+                    continue
+                count += 1
+                if count > MAX_MEMBERS:
+                    yield {'label': archive_name, 'filename': archive_name,
+                           'error': f"Stopped after {MAX_MEMBERS} members"}
+                    return
+                yield source
+        return
+
+    with tarfile.open(archive_path, mode="r|*") as tf:
+        for member in tf:
+            if not member.isfile():
+                continue
+            source = _member_source(archive_name, member.name, member.size,
+                                    lambda member=member: tf.extractfile(member))
+            if source is None:
+                continue
+            count += 1
+            if count > MAX_MEMBERS:
+                yield {'label': archive_name, 'filename': archive_name,
+                       'error': f"Stopped after {MAX_MEMBERS} members"}
+                return
+            yield source
+
+
+def iter_sources(file_paths: List[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Expand uploaded files into upload sources, streaming archives member by
+    member. Every source records the uploaded file it came from as 'origin'.
+    """
+    for file_path in file_paths:
+        filename = os.path.basename(file_path)
+        if not is_archive(filename):
+            yield {'label': filename, 'filename': filename, 'path': file_path, 'origin': file_path}
+            continue
+        try:
+            for source in iter_archive(file_path, filename):
+                source['origin'] = file_path
+                yield source
+        except (tarfile.TarError, zipfile.BadZipFile, OSError) as e:
+            yield {'label': filename, 'filename': filename, 'origin': file_path,
+                   'error': f"Unreadable archive: {str(e)}"}
+
+
+def _upload_source(folder_id: str, source: Dict[str, Any], cancel: Optional[CancelToken] = None) -> Dict[str, Any]:
+    result = {
+        'label': source['label'],
+        'origin': source.get('origin'),
+        'response': None,
+        'error': source.get('error'),
+        'skip': source.get('skip')
+    }
+    if result['error'] or result['skip']:
+        return result
+
+    try:
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+        if 'path' in source:
+            with open(source['path'], 'rb') as f:
+                response = backend_client.upload_stream(folder_id, CancellableReader(f, cancel), source['filename'])
+        else:
+            response = backend_client.upload_stream(folder_id, CancellableReader(source['file'], cancel),
+                                                    source['filename'])
+        if response.status_code == 200:
+            result['response'] = response.json()
+        else:
+            result['error'] = response.text[:50]
+    except Cancelled:
+        result['error'] = "Cancelled"
+    except Exception as e:
+        result['error'] = str(e)[:50]
+    finally:
+        if 'file' in source:
+            source['file'].close()
+    return result
+
+
+def upload_files(folder_id: str, file_paths: List[str], concurrency: int = UPLOAD_CONCURRENCY,
+                 cancel: Optional[CancelToken] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Upload files and archive members in parallel.
+
+    Sources are pulled lazily, at most `concurrency * 2` ahead of the
+    finished uploads, so only that many archive members are spooled at once.
+    Once `cancel` is set, uploads in progress are aborted mid-body and the
+    remaining sources are dropped.
+
+    Yields:
+        One result per source as it finishes, with label, origin (the
+        uploaded file it came from), response (parsed JSON on success),
+        error and skip
+    """
+    pending = iter_sources(file_paths)
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="upload") as pool:
+        futures = {}
+        try:
+            for source in pending:
+                futures[pool.submit(_upload_source, folder_id, source, cancel)] = source
+                if len(futures) >= concurrency * 2:
+                    break
+
+            while futures:
+                done = next(as_completed(futures))
+                futures.pop(done)
+                yield done.result()
+                if cancel is not None and cancel.cancelled:
+                    break
+
+                source = next(pending, None)
+                if source is not None:
+                    futures[pool.submit(_upload_source, folder_id, source, cancel)] = source
+        finally:
+            # Consumer stopped early: drop queued uploads and their spooled members
+            for future, source in futures.items():
+                if future.cancel() and 'file' in source:
+                    source['file'].close()
+            pending.close()
@@ -0,0 +1,219 @@
+"""
+Asyncio variants of the file_utils API.
+
+Blocking filesystem calls run on a dedicated, bounded thread pool so async
+Gradio handlers never stall the event loop, and a burst of file work can't
+take over the backend fan-out pools. Long operations are split into small
+offloaded steps (a batch of directory entries, one file, one directory), so
+cancelling the awaiting task stops them at the next step; a step that is
+already running on the pool finishes, but nothing further is scheduled.
+"""
+import asyncio
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+from apps.ui import file_utils
+
+# Threads reserved for filesystem work
+FILE_IO_WORKERS = int(os.getenv("FILE_IO_WORKERS", "4"))
+
+# Directory entries stat'ed per offloaded step when streaming a listing
+SCAN_BATCH = 256
+
+file_executor = ThreadPoolExecutor(max_workers=FILE_IO_WORKERS, thread_name_prefix="file-io")
+
+
+async def run_blocking(func: Callable[..., Any], *args: Any) -> Any:
+    """Run a blocking call on the file I/O pool."""
+    return await asyncio.get_running_loop().run_in_executor(file_executor, func, *args)
+
+
+async def _bounded_map(func: Callable[[Any], Any], items: Iterable[Any],
+                       concurrency: int) -> AsyncIterator[Tuple[Any, Any, Optional[BaseException]]]:
+    """
+    Apply a blocking function to items with at most `concurrency` calls in flight.
+
+    Yields:
+        (item, result, exception) in completion order
+    """
+    loop = asyncio.get_running_loop()
+    pending = iter(items)
+    in_flight: Dict[asyncio.Future, Any] = {}
+
+    def submit() -> None:
+        for item in pending:
+            in_flight[loop.run_in_executor(file_executor, func, item)] = item
+            return
+
+    for _ in range(max(1, concurrency)):
+        submit()
+    try:
+        while in_flight:
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                item = in_flight.pop(future)
+                error = future.exception()
+                yield item, (None if error else future.result()), error
+                submit()
+    finally:
+        # Cancelled or abandoned: drop calls that haven't started yet
+        for future in in_flight:
+            future.cancel()
+
+
+def _check_dir(folder_path: str) -> None:
+    if not os.path.exists(folder_path):
+        raise FileNotFoundError(f"Folder not found: {folder_path}")
+    if not os.path.isdir(folder_path):
+        raise NotADirectoryError(f"Path is not a directory: {folder_path}")
+
+
+def _scan_batch(entries, batch_size: int) -> List[Dict[str, Any]]:
+    files = []
+    for entry in entries:
+        if entry.is_file():
+            stat = entry.stat()
+            files.append({
+                'name': entry.name,
+                'path': entry.path,
+                'size': stat.st_size,
+                'modified': stat.st_mtime,
+                'extension': os.path.splitext(entry.name)[1]
+            })
+        if len(files) >= batch_size:
+            break
+    return files
+
+
+async def iter_folder_files(folder_path: str, batch_size: int = SCAN_BATCH) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stream the files in a folder, in the format of file_utils.list_folder_files.
+
+    Entries are read and stat'ed `batch_size` at a time, so the first files
+    arrive before a large directory has been scanned in full.
+    """
+    await run_blocking(_check_dir, folder_path)
+    entries = await run_blocking(os.scandir, folder_path)
+    try:
+        while True:
+            batch = await run_blocking(_scan_batch, entries, batch_size)
+            if not batch:
+                break
+            for file_info in batch:
+                yield file_info
+    finally:
+        entries.close()
+
+
+async def list_folder_files(folder_path: str) -> List[Dict[str, Any]]:
+    """Async file_utils.list_folder_files."""
+    return [file_info async for file_info in iter_folder_files(folder_path)]
+
+
+async def iter_delete_files(file_paths: Iterable[str],
+                            concurrency: int = FILE_IO_WORKERS) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Delete files concurrently, streaming one result per file as it finishes.
+
+    Yields:
+        Dictionary with path and error (None on success)
+    """
+    async for path, _, error in _bounded_map(file_utils.delete_file, file_paths, concurrency):
+        yield {'path': path, 'error': str(error) if error else None}
+
+
+async def delete_multiple_files(file_paths: List[str], concurrency: int = FILE_IO_WORKERS) -> Dict[str, Any]:
+    """Async file_utils.delete_multiple_files (same result format)."""
+    results = {
+        'success': [],
+        'failed': [],
+        'success_count': 0,
+        'failed_count': 0
+    }
+
+    async for outcome in iter_delete_files(file_paths, concurrency):
+        if outcome['error']:
+            results['failed'].append(outcome)
+            results['failed_count'] += 1
+        else:
+            results['success'].append(outcome['path'])
+            results['success_count'] += 1
+
+    return results
+
+
+def _dir_usage(directory: str) -> Tuple[int, List[str]]:
+    """Size of the files directly in a directory, plus its subdirectories."""
+    size = 0
+    subdirs = []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.is_file():
+                        size += entry.stat().st_size
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return size, subdirs
+
+
+async def get_folder_size(folder_path: str) -> int:
+    """
+    Async file_utils.get_folder_size.
+
+    Directories are scanned concurrently, one offloaded step per directory.
+    """
+    if not await run_blocking(os.path.exists, folder_path):
+        raise FileNotFoundError(f"Folder not found: {folder_path}")
+
+    total_size = 0
+    level = [folder_path]
+    while level:
+        next_level = []
+        async for _, (size, subdirs), _ in _bounded_map(_dir_usage, level, FILE_IO_WORKERS):
+            total_size += size
+            next_level.extend(subdirs)
+        level = next_level
+    return total_size
+
+
+def _remove_item(item_path: str) -> str:
+    if os.path.isfile(item_path):
+        os.remove(item_path)
+        return 'file'
+    if os.path.isdir(item_path):
+        shutil.rmtree(item_path)
+        return 'folder'
+    return ''
+
+
+async def clear_folder_contents(folder_path: str, concurrency: int = FILE_IO_WORKERS) -> Dict[str, Any]:
+    """Async file_utils.clear_folder_contents (same result format)."""
+    await run_blocking(_check_dir, folder_path)
+    items = await run_blocking(os.listdir, folder_path)
+
+    results = {
+        'files_deleted': 0,
+        'folders_deleted': 0,
+        'errors': []
+    }
+
+    item_paths = [os.path.join(folder_path, item) for item in items]
+    async for item_path, kind, error in _bounded_map(_remove_item, item_paths, concurrency):
+        if error:
+            results['errors'].append({
+                'path': item_path,
+                'error': str(error)
+            })
+        elif kind == 'file':
+            results['files_deleted'] += 1
+        elif kind == 'folder':
+            results['folders_deleted'] += 1
+
+    return results
@@ -0,0 +1,74 @@
+"""
+Debounced auto-indexing after uploads.
+
+Each upload to a folder restarts that folder's quiet-window timer; once no
+uploads have arrived for the whole window, one indexing job is queued for
+the folder. Bursts of uploads are coalesced into a single index run.
+"""
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from apps.ui.index_scheduler import scheduler
+
+# Seconds without new uploads before a folder is indexed
+QUIET_SECONDS = float(os.getenv("AUTO_INDEX_QUIET_SECONDS", "30"))
+
+# Whether the upload form's auto-index checkbox starts ticked
+ENABLED_BY_DEFAULT = os.getenv("AUTO_INDEX_DEFAULT", "false").lower() in ("1", "true", "yes")
+
+
+class UploadDebouncer:
+    """Per-folder trailing-edge debounce of upload notifications."""
+
+    def __init__(self, submit: Callable[[str], None], quiet_seconds: float = QUIET_SECONDS):
+        self.submit = submit
+        self.quiet_seconds = quiet_seconds
+        self._timers: Dict[str, threading.Timer] = {}
+        self._deadlines: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def notify(self, folder_id: str, quiet_seconds: Optional[float] = None) -> float:
+        """
+        Record an upload to a folder and (re)start its quiet window.
+
+        Returns:
+            Seconds until the folder will be indexed if no more uploads arrive
+        """
+        delay = self.quiet_seconds if quiet_seconds is None else quiet_seconds
+        timer = threading.Timer(delay, self._fire, args=(folder_id,))
+        timer.daemon = True
+        with self._lock:
+            previous = self._timers.pop(folder_id, None)
+            if previous is not None:
+                previous.cancel()
+            self._timers[folder_id] = timer
+            self._deadlines[folder_id] = time.monotonic() + delay
+            timer.start()
+        return delay
+
+    def pending(self) -> Dict[str, float]:
+        """Folders waiting for their quiet window, with seconds remaining."""
+        now = time.monotonic()
+        with self._lock:
+            return {folder_id: max(0.0, deadline - now) for folder_id, deadline in self._deadlines.items()}
+
+    def _fire(self, folder_id: str) -> None:
+        with self._lock:
+            if self._timers.get(folder_id) is not threading.current_thread():
+                return
+            del self._timers[folder_id]
+            del self._deadlines[folder_id]
+        try:
+            self.submit(folder_id)
+        except Exception as e:
+            print(f"⚠️ Auto-index failed for folder {folder_id}: {e}")
+
+
+def _queue_index(folder_id: str) -> None:
+    scheduler.enqueue(folder_id, priority='normal')
+    scheduler.start()
+
+
+debouncer = UploadDebouncer(_queue_index)
@@ -0,0 +1,320 @@
+"""
+Shared HTTP client and concurrency helpers for the backend API.
+"""
+import asyncio
+import contextvars
+import os
+import re
+import threading
+import weakref
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, BinaryIO, Callable, Dict, Hashable, List, Optional, Tuple
+
+import httpx
+from dotenv import load_dotenv
+
+from apps.ui import deadline
+
+# Load environment variables
+load_dotenv()
+
+# API configuration
+# For standalone frontend deployment, use API_BASE_URL environment variable
+# Example: API_BASE_URL=https://graphrag-api.railway.app
+API_BASE = os.getenv('API_BASE_URL', 'http://localhost:8000')
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "change-me")
+
+# File types accepted by vault folder uploads
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt", ".md", ".csv", ".xlsx", ".png", ".jpg")
+
+
+
+def _apply_deadline(request: httpx.Request) -> None:
+    """Cap a request's timeouts by the running action's budget and forward what is left."""
+    if deadline.current() is None:
+        return
+    try:
+        remaining = deadline.clamp(None)
+    except deadline.DeadlineExceeded as e:
+        raise deadline.DeadlineExceeded(str(e), request=request) from None
+    timeouts = request.extensions.get("timeout") or {}
+    request.extensions["timeout"] = {
+        name: remaining if value is None else min(value, remaining) for name, value in timeouts.items()
+    }
+    request.headers[deadline.HEADER] = str(int(remaining * 1000))
+
+
+# Pooled client: keeps connections (and TLS sessions) alive between calls so
+# concurrent requests don't each pay a fresh handshake to the backend.
+client = httpx.Client(
+    base_url=API_BASE,
+    timeout=10.0,
+    limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+    event_hooks={"request": [_apply_deadline]}
+)
+
+# Worker pool for fanning out independent backend calls
+executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("BACKEND_FANOUT_WORKERS", "16")),
+    thread_name_prefix="backend"
+)
+
+# Separate pool for slow LLM calls so they can't starve short requests
+chat_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("CHAT_FANOUT_WORKERS", "16")),
+    thread_name_prefix="chat"
+)
+
+
+# Async clients for cancellable calls, one per event loop (pools are bound to their loop)
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def async_client() -> httpx.AsyncClient:
+    """Pooled async client for the running event loop."""
+    loop = asyncio.get_running_loop()
+    async_client = _async_clients.get(loop)
+    if async_client is None:
+        async_client = _async_clients[loop] = httpx.AsyncClient(
+            base_url=API_BASE,
+            timeout=10.0,
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=16)
+        )
+    return async_client
+
+
+# List endpoints fetched with conditional requests (If-None-Match / If-Modified-Since)
+CONDITIONAL_PATHS = re.compile(r"^/(folders/list|agents/list|folders/[^/]+/documents)$")
+
+
+class ResponseStore:
+    """
+    Last validated response per URL for conditional GETs.
+
+    Keeps the ETag / Last-Modified validators together with the decoded
+    body - or, for callers passing a parse hook, only the parsed value -
+    so a 304 reuses it instead of downloading and decoding the list again. Least recently used entries are dropped
+    beyond `max_entries`.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[Dict[str, str], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Tuple[Dict[str, str], Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: Hashable, validators: Dict[str, str], value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (validators, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+response_store = ResponseStore()
+
+
+def get_json(path: str, timeout: float = 10.0, params: Optional[Dict[str, Any]] = None,
+             parse: Optional[Callable[[Any], Any]] = None) -> Any:
+    """
+    GET a backend endpoint and decode the JSON body.
+
+    Paths matching CONDITIONAL_PATHS are revalidated with the validators of
+    the last response; on 304 Not Modified the previously returned value is
+    returned as-is (the same object), so callers must not mutate it.
+
+    Args:
+        path: API path, e.g. "/folders/list"
+        timeout: Request timeout in seconds
+        params: Optional query parameters
+        parse: Converts the decoded body; the result is what gets stored
+            and returned, so the raw JSON isn't kept. Pass the same
+            (hashable) function on every call to share stored responses.
+
+    Returns:
+        Decoded (and parsed) JSON on HTTP 200 (or 304), otherwise None
+    """
+    key = (path, tuple(sorted((params or {}).items())), parse)
+    cached = response_store.get(key) if CONDITIONAL_PATHS.match(path) else None
+
+    headers = {}
+    if cached:
+        validators = cached[0]
+        if 'etag' in validators:
+            headers['If-None-Match'] = validators['etag']
+        if 'last-modified' in validators:
+            headers['If-Modified-Since'] = validators['last-modified']
+
+    try:
+        response = client.get(path, params=params, timeout=timeout, headers=headers)
+    except httpx.TimeoutException as e:
+        budget = deadline.current()
+        if budget is not None and budget.remaining() < 0.1 and not isinstance(e, deadline.DeadlineExceeded):
+            raise deadline.DeadlineExceeded(f"Action deadline exceeded: {e}") from e
+        raise
+    if response.status_code == 304 and cached:
+        return cached[1]
+    if response.status_code == 200:
+        value = response.json()
+        if parse is not None:
+            value = parse(value)
+        if CONDITIONAL_PATHS.match(path):
+            validators = {
+                name: response.headers[name] for name in ('etag', 'last-modified') if name in response.headers
+            }
+            if validators:
+                response_store.put(key, validators, value)
+        return value
+    return None
+
+
+def try_get_json(path: str, timeout: float = 10.0, params: Optional[Dict[str, Any]] = None,
+                 parse: Optional[Callable[[Any], Any]] = None) -> Any:
+    """Like get_json, but returns None on connection errors as well."""
+    try:
+        return get_json(path, timeout=timeout, params=params, parse=parse)
+    except Exception:
+        return None
+
+
+def error_detail(response: httpx.Response) -> str:
+    """Extract the backend's error message from a failed response."""
+    error_data = response.json() if response.headers.get('content-type') == 'application/json' else {"detail": response.text}
+    return error_data.get('detail', 'Unknown error')
+
+
+def post_chat_message(agent_id: str, message: str, session_id: Optional[str] = None,
+                      timeout: float = 120.0) -> httpx.Response:
+    """
+    Send one chat message to an agent.
+
+    Args:
+        agent_id: Agent to ask
+        message: User message
+        session_id: Optional backend chat session to continue
+        timeout: Request timeout in seconds
+
+    Returns:
+        The raw backend response
+    """
+    return client.post(f"/chat/{agent_id}/message", json=_chat_payload(message, session_id), timeout=timeout)
+
+
+async def post_chat_message_async(agent_id: str, message: str, session_id: Optional[str] = None,
+                                  timeout: float = 120.0) -> httpx.Response:
+    """
+    Async variant of post_chat_message.
+
+    Cancelling the awaiting task closes the connection, so the backend sees
+    the client go away instead of finishing an answer nobody will read.
+    """
+    return await async_client().post(
+        f"/chat/{agent_id}/message", json=_chat_payload(message, session_id), timeout=timeout
+    )
+
+
+def _chat_payload(message: str, session_id: Optional[str]) -> Dict[str, Any]:
+    payload = {
+        "message": message.strip(),
+        "stream": False
+    }
+    if session_id:
+        payload["session_id"] = session_id
+    return payload
+
+
+def upload_document(folder_id: str, file_path: str, filename: Optional[str] = None,
+                    timeout: float = 60.0) -> httpx.Response:
+    """
+    Upload one file to a vault folder.
+
+    Args:
+        folder_id: Target folder
+        file_path: Local file to upload
+        filename: Name to upload as (defaults to the file's basename)
+        timeout: Request timeout in seconds
+
+    Returns:
+        The raw backend response
+    """
+    with open(file_path, 'rb') as f:
+        return upload_stream(folder_id, f, filename or os.path.basename(file_path), timeout)
+
+
+def upload_stream(folder_id: str, fileobj: BinaryIO, filename: str, timeout: float = 60.0) -> httpx.Response:
+    """
+    Upload an open binary file object to a vault folder.
+
+    Args:
+        folder_id: Target folder
+        fileobj: Readable binary stream, read from its current position
+        filename: Name to upload as
+        timeout: Request timeout in seconds
+
+    Returns:
+        The raw backend response
+    """
+    files_data = {'file': (filename, fileobj)}
+    return client.post(f"/folders/{folder_id}/upload", files=files_data, timeout=timeout)
+
+
+def delete_document(folder_id: str, doc_id: str, timeout: float = 10.0) -> httpx.Response:
+    """Delete one document from a vault folder."""
+    return client.delete(f"/folders/{folder_id}/documents/{doc_id}", timeout=timeout)
+
+
+def run_parallel(*calls: Callable[[], Any]) -> List[Any]:
+    """
+    Run independent calls concurrently on the shared worker pool.
+
+    Calls must not themselves wait on run_parallel, or a saturated pool
+    can deadlock; fan out leaf requests instead. Each call runs in a copy of
+    the caller's context, so it shares the caller's action deadline.
+
+    Args:
+        calls: Zero-argument callables
+
+    Returns:
+        Results in the same order as the calls. The first exception raised
+        by any call is re-raised after all calls have been submitted.
+    """
+    futures = [executor.submit(contextvars.copy_context().run, call) for call in calls]
+    return [future.result() for future in futures]
+
+
+class PrefetchCache:
+    """
+    Small thread-safe TTL cache for results fetched ahead of a UI event.
+
+    Entries are consumed on read so a prefetched value is only ever shown once.
+    """
+
+    def __init__(self, ttl: float = 60.0, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, tuple] = {}
+        self._lock = threading.Lock()
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+
+    def pop(self, key: Hashable) -> Any:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+
+prefetch_cache = PrefetchCache()
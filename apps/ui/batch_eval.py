@@ -0,0 +1,202 @@
+"""
+Batch evaluation of agents over a question set.
+
+Usage:
+    python -m apps.ui.batch_eval questions.csv --agent AGENT_ID [--agent AGENT_ID ...]
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, List, Optional
+
+from apps.ui.admission import AdmissionController
+from apps.ui.agent_compare import ask_agent
+
+# Default number of in-flight chat requests during a batch run
+DEFAULT_CONCURRENCY = int(os.getenv("BATCH_EVAL_CONCURRENCY", "4"))
+
+
+def load_questions(file_path: str) -> List[Dict[str, str]]:
+    """
+    Load questions from a CSV or JSONL file.
+
+    CSV files use a "question" column (or the first column when there is no
+    such header); JSONL files need a "question" field per line. An optional
+    "id" column/field is kept, otherwise questions are numbered from 1.
+
+    Args:
+        file_path: Path to a .csv or .jsonl file
+
+    Returns:
+        List of {'id', 'question'} dictionaries
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"Question file not found: {file_path}")
+
+    ext = os.path.splitext(file_path)[1].lower()
+    rows = []
+    if ext in ('.jsonl', '.ndjson'):
+        with open(file_path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    rows.append(json.loads(line))
+    elif ext == '.csv':
+        with open(file_path, encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header and 'question' in [h.strip().lower() for h in header]:
+                columns = [h.strip().lower() for h in header]
+                rows = [dict(zip(columns, row)) for row in reader]
+            elif header:
+                rows = [{'question': row[0]} for row in [header, *reader] if row]
+    else:
+        raise ValueError(f"Unsupported question file type: {ext} (use .csv or .jsonl)")
+
+    questions = []
+    for i, row in enumerate(rows, start=1):
+        question = str(row.get('question', '')).strip()
+        if question:
+            questions.append({'id': str(row.get('id') or i), 'question': question})
+    return questions
+
+
+def run_batch(questions: List[Dict[str, str]], agent_ids: List[str],
+              concurrency: int = DEFAULT_CONCURRENCY, timeout: float = 120.0,
+              admission: Optional[AdmissionController] = None,
+              session: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Ask every agent every question with at most `concurrency` requests in flight.
+
+    From the UI, pass its chat_admission controller and the browser session:
+    each request then also waits for an admission slot, so a batch run
+    shares the chat caps with everyone else.
+
+    Yields:
+        One result per (question, agent) pair as it completes, with
+        question_id, question, agent_id, answer, citations, latency and error
+    """
+    jobs = [(q, agent_id) for q in questions for agent_id in agent_ids]
+    pending = iter(jobs)
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="batch-eval") as pool:
+        # Submit lazily so a large question set never queues everything at once
+        futures = {}
+        for q, agent_id in pending:
+            futures[pool.submit(ask_agent, agent_id, q['question'], timeout, admission, session)] = q
+            if len(futures) >= concurrency * 2:
+                break
+
+        while futures:
+            done = next(as_completed(futures))
+            q = futures.pop(done)
+            result = done.result()
+            yield {'question_id': q['id'], 'question': q['question'], **result}
+
+            next_job = next(pending, None)
+            if next_job is not None:
+                q, agent_id = next_job
+                futures[pool.submit(ask_agent, agent_id, q['question'], timeout, admission, session)] = q
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile; 0.0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(results: List[Dict[str, Any]], wall_time: float) -> List[Dict[str, Any]]:
+    """
+    Aggregate latency and citation statistics per agent.
+
+    Args:
+        results: Results yielded by run_batch
+        wall_time: Elapsed seconds for the whole run
+
+    Returns:
+        One summary dictionary per agent
+    """
+    by_agent: Dict[str, List[Dict[str, Any]]] = {}
+    for result in results:
+        by_agent.setdefault(result['agent_id'], []).append(result)
+
+    summary = []
+    for agent_id, agent_results in by_agent.items():
+        ok = [r for r in agent_results if not r['error']]
+        latencies = [r['latency'] for r in ok]
+        summary.append({
+            'agent_id': agent_id,
+            'questions': len(agent_results),
+            'errors': len(agent_results) - len(ok),
+            'mean_latency': sum(latencies) / len(latencies) if latencies else 0.0,
+            'p50_latency': percentile(latencies, 50),
+            'p95_latency': percentile(latencies, 95),
+            'max_latency': max(latencies) if latencies else 0.0,
+            'avg_citations': sum(len(r['citations']) for r in ok) / len(ok) if ok else 0.0,
+            'throughput': len(agent_results) / wall_time if wall_time > 0 else 0.0
+        })
+    return summary
+
+
+def write_results(results: List[Dict[str, Any]], output_path: Optional[str] = None) -> str:
+    """
+    Write results as JSONL.
+
+    Args:
+        results: Results yielded by run_batch
+        output_path: Destination file; a temp file is created when omitted
+
+    Returns:
+        Path of the written file
+    """
+    if output_path is None:
+        fd, output_path = tempfile.mkstemp(prefix="batch_eval_", suffix=".jsonl")
+        os.close(fd)
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        for result in results:
+            f.write(json.dumps(result, ensure_ascii=False) + "\n")
+    return output_path
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run a question set against one or more agents.")
+    parser.add_argument("questions", help="CSV or JSONL file of questions")
+    parser.add_argument("--agent", action="append", required=True, dest="agents", help="Agent ID (repeatable)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Requests in flight")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds")
+    parser.add_argument("--output", default="batch_eval_results.jsonl", help="Results file (JSONL)")
+    args = parser.parse_args(argv)
+
+    questions = load_questions(args.questions)
+    total = len(questions) * len(args.agents)
+    print(f"Running {len(questions)} questions x {len(args.agents)} agents with concurrency {args.concurrency}")
+
+    results = []
+    start = time.perf_counter()
+    for result in run_batch(questions, args.agents, args.concurrency, args.timeout):
+        results.append(result)
+        status = "❌" if result['error'] else "✅"
+        print(f"[{len(results)}/{total}] {status} {result['agent_id']} q{result['question_id']} {result['latency']:.2f}s")
+    wall_time = time.perf_counter() - start
+
+    write_results(results, args.output)
+    print(f"\nResults written to {args.output} ({wall_time:.1f}s total)\n")
+    for row in summarize(results, wall_time):
+        print(
+            f"{row['agent_id']}: {row['questions']} questions, {row['errors']} errors, "
+            f"mean {row['mean_latency']:.2f}s, p50 {row['p50_latency']:.2f}s, p95 {row['p95_latency']:.2f}s, "
+            f"{row['avg_citations']:.1f} citations avg, {row['throughput']:.2f} q/s"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,373 @@
+"""
+Headless bulk ingestion of a document tree into Knowledge Vault folders.
+
+The tree is walked lazily and uploads run with bounded concurrency and
+retries. Every finished upload is appended to a checkpoint file, so an
+interrupted run resumes where it stopped. At the end, every folder that
+received documents since it was last indexed - in this run or an
+interrupted earlier one - is queued for indexing once, through the shared
+index queue (apps.ui.index_scheduler), so a large ingest doesn't start
+more indexing runs at a time than INDEX_MAX_CONCURRENT.
+
+Usage:
+    python -m apps.ui.bulk_ingest ROOT --folder FOLDER_ID
+    python -m apps.ui.bulk_ingest ROOT --folder-per-subdir [--folder FOLDER_ID]
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import httpx
+
+from apps.ui import backend_client, index_scheduler
+from apps.ui.batch_eval import percentile
+
+INGEST_STATE_DIR = os.getenv("INGEST_STATE_DIR", os.path.join("data", "ingest"))
+
+# Status codes worth retrying; anything else is a permanent failure
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+# Seconds between progress lines
+PROGRESS_INTERVAL = 5.0
+
+
+def walk_files(root: str) -> Iterator[Tuple[str, str, os.stat_result]]:
+    """
+    Lazily walk a directory tree for supported files.
+
+    Directories are scanned one at a time, so the first upload starts
+    immediately and memory stays flat however large the tree is.
+
+    Yields:
+        (relative path, absolute path, stat result)
+    """
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                subdirs = []
+                for entry in entries:
+                    if entry.name.startswith('.'):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.is_file() and entry.name.lower().endswith(backend_client.SUPPORTED_EXTENSIONS):
+                        yield os.path.relpath(entry.path, root), entry.path, entry.stat()
+        except OSError as e:
+            print(f"⚠️ Skipping {directory}: {e}")
+            continue
+        stack.extend(sorted(subdirs, reverse=True))
+
+
+class Checkpoint:
+    """
+    Append-only JSONL record of uploaded files and queued indexing.
+
+    A file is skipped on resume when its path, size and mtime match a
+    recorded upload. Failed uploads are never recorded, so they are
+    retried by the next run. Folders that received uploads after their
+    last 'indexed' record still need indexing.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done: Dict[str, Tuple[int, float]] = {}
+        self.unindexed: Set[str] = set()
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line from a killed run
+                    if 'indexed' in record:
+                        self.unindexed.discard(record['indexed'])
+                        continue
+                    self.done[record['path']] = (record['size'], record['mtime'])
+                    if record.get('folder_id'):
+                        self.unindexed.add(record['folder_id'])
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def is_done(self, rel_path: str, size: int, mtime: float) -> bool:
+        return self.done.get(rel_path) == (size, mtime)
+
+    def record(self, rel_path: str, size: int, mtime: float, folder_id: str, doc_id: Optional[str]) -> None:
+        self.done[rel_path] = (size, mtime)
+        self.unindexed.add(folder_id)
+        self._write({'path': rel_path, 'size': size, 'mtime': mtime, 'folder_id': folder_id, 'doc_id': doc_id})
+
+    def mark_indexed(self, folder_id: str) -> None:
+        """Record that a folder's uploads so far have been queued for indexing."""
+        self.unindexed.discard(folder_id)
+        self._write({'indexed': folder_id, 'at': time.time()})
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def upload_with_retry(folder_id: str, file_path: str, retries: int = 3,
+                      backoff: float = 1.0, timeout: float = 120.0) -> Dict[str, Any]:
+    """
+    Upload one file, retrying transport errors and retryable status codes
+    with exponential backoff and jitter.
+
+    Returns:
+        Dictionary with doc_id, latency (seconds for the final attempt),
+        attempts and error (None on success)
+    """
+    error = None
+    for attempt in range(1, retries + 2):
+        start = time.perf_counter()
+        try:
+            response = backend_client.upload_document(folder_id, file_path, timeout=timeout)
+            latency = time.perf_counter() - start
+            if response.status_code == 200:
+                return {'doc_id': response.json().get('doc_id'), 'latency': latency, 'attempts': attempt, 'error': None}
+            error = f"HTTP {response.status_code}: {backend_client.error_detail(response)[:100]}"
+            if response.status_code not in RETRYABLE_STATUS:
+                break
+        except httpx.TransportError as e:
+            latency = time.perf_counter() - start
+            error = f"{type(e).__name__}: {str(e)}"
+        except OSError as e:
+            # Local file vanished or is unreadable: retrying won't help
+            return {'doc_id': None, 'latency': 0.0, 'attempts': attempt, 'error': str(e)}
+        if attempt <= retries:
+            time.sleep(backoff * 2 ** (attempt - 1) * (0.5 + random.random()))
+    return {'doc_id': None, 'latency': latency, 'attempts': attempt, 'error': error}
+
+
+def resolve_subdir_folders(root: str) -> Dict[str, str]:
+    """
+    Map each top-level subdirectory of `root` to a vault folder of the same
+    name, creating folders that don't exist yet.
+    """
+    folders = backend_client.get_json("/folders/list")
+    if folders is None:
+        raise RuntimeError("Failed to load folder list")
+    by_name = {f['name']: f['folder_id'] for f in folders}
+
+    mapping = {}
+    with os.scandir(root) as entries:
+        for entry in sorted(entries, key=lambda e: e.name):
+            if entry.name.startswith('.') or not entry.is_dir(follow_symlinks=False):
+                continue
+            if entry.name not in by_name:
+                response = backend_client.client.post("/folders/create", json={"name": entry.name})
+                if response.status_code != 200:
+                    raise RuntimeError(f"Failed to create folder '{entry.name}': {backend_client.error_detail(response)}")
+                by_name[entry.name] = response.json()['folder_id']
+                print(f"📁 Created folder '{entry.name}'")
+            mapping[entry.name] = by_name[entry.name]
+    return mapping
+
+
+def ingest(root: str, folder_for: Dict[str, str], default_folder: Optional[str], checkpoint: Checkpoint,
+           concurrency: int = 8, retries: int = 3) -> Dict[str, Any]:
+    """
+    Upload every supported file under `root` that the checkpoint hasn't seen.
+
+    Args:
+        root: Directory to ingest
+        folder_for: Top-level subdirectory name -> folder ID
+        default_folder: Folder for files not covered by `folder_for`
+            (None to skip them)
+        checkpoint: Progress record, updated as uploads finish
+        concurrency: Uploads in flight
+        retries: Retries per file after the first attempt
+
+    Returns:
+        Run statistics, including the set of folder IDs that received uploads
+    """
+    stats = {
+        'uploaded': 0, 'skipped': 0, 'failed': 0, 'unmapped': 0, 'bytes': 0,
+        'latencies': [], 'failures': [], 'folders': set()
+    }
+
+    def jobs():
+        for rel_path, abs_path, stat in walk_files(root):
+            top = rel_path.split(os.sep, 1)[0] if os.sep in rel_path else None
+            folder_id = folder_for.get(top, default_folder)
+            if folder_id is None:
+                stats['unmapped'] += 1
+                continue
+            if checkpoint.is_done(rel_path, stat.st_size, stat.st_mtime):
+                stats['skipped'] += 1
+                continue
+            yield rel_path, abs_path, stat.st_size, stat.st_mtime, folder_id
+
+    def collect(future, job):
+        rel_path, _, size, mtime, folder_id = job
+        try:
+            result = future.result()
+        except Exception as e:
+            # e.g. a 200 whose body isn't JSON: this file failed, the run goes on
+            result = {'doc_id': None, 'latency': 0.0, 'attempts': 1, 'error': f"{type(e).__name__}: {e}"}
+
+        if result['error']:
+            stats['failed'] += 1
+            stats['failures'].append({'path': rel_path, 'error': result['error']})
+            print(f"❌ {rel_path}: {result['error']} ({result['attempts']} attempts)")
+        else:
+            checkpoint.record(rel_path, size, mtime, folder_id, result['doc_id'])
+            stats['uploaded'] += 1
+            stats['bytes'] += size
+            stats['latencies'].append(result['latency'])
+            stats['folders'].add(folder_id)
+
+    pending = jobs()
+    futures = {}
+    pool = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="ingest")
+    start = time.perf_counter()
+    last_progress = start
+    try:
+        # Submit lazily so the walk never runs far ahead of the uploads
+        for job in pending:
+            futures[pool.submit(upload_with_retry, job[4], job[1], retries)] = job
+            if len(futures) >= concurrency * 2:
+                break
+
+        while futures:
+            done = next(as_completed(futures))
+            collect(done, futures.pop(done))
+
+            now = time.perf_counter()
+            if now - last_progress >= PROGRESS_INTERVAL:
+                last_progress = now
+                print(f"… {stats['uploaded']} uploaded, {stats['skipped']} skipped, "
+                      f"{stats['failed']} failed ({stats['uploaded'] / (now - start):.1f} files/s)")
+
+            next_job = next(pending, None)
+            if next_job is not None:
+                futures[pool.submit(upload_with_retry, next_job[4], next_job[1], retries)] = next_job
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+        # On Ctrl-C, uploads already in flight still complete: checkpoint them
+        # too, or the next run would upload them again
+        for future, job in futures.items():
+            if not future.cancelled():
+                collect(future, job)
+        stats['wall_time'] = time.perf_counter() - start
+    return stats
+
+
+def queue_indexing(folder_ids: List[str], checkpoint: Checkpoint, method: str = "fast",
+                   scheduler: Optional[index_scheduler.IndexScheduler] = None) -> Dict[str, Any]:
+    """
+    Queue indexing once per folder in the shared index queue.
+
+    Each queued folder is marked indexed in the checkpoint, so a later run
+    doesn't queue it again unless it receives more uploads. The queue
+    dispatches jobs under INDEX_MAX_CONCURRENT and reports finished ones to
+    apps.ui.folder_events.
+
+    Returns:
+        Folder ID -> enqueue result ('id' and 'outcome', see IndexScheduler.enqueue)
+    """
+    scheduler = scheduler or index_scheduler.scheduler
+    results = {}
+    for folder_id in folder_ids:
+        results[folder_id] = scheduler.enqueue(folder_id, 'normal', method)
+        checkpoint.mark_indexed(folder_id)
+    return results
+
+
+def dispatch_queued(job_ids: List[int], scheduler: Optional[index_scheduler.IndexScheduler] = None) -> None:
+    """
+    Run the index queue in this process until every given job has started.
+
+    UI processes sharing INDEX_QUEUE_DB dispatch queued jobs as well; this
+    makes sure they start when no UI is running. Jobs still running on exit
+    are finished by whichever process polls the queue next.
+    """
+    scheduler = scheduler or index_scheduler.scheduler
+    pending = set(job_ids)
+    while pending:
+        scheduler.tick()
+        states = {job['id']: job['state'] for job in scheduler.jobs()}
+        pending = {job_id for job_id in pending if states.get(job_id) in ('queued', 'starting')}
+        if pending:
+            print(f"… {len(pending)} folder(s) waiting to start indexing")
+            time.sleep(scheduler.poll_interval)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    # Subscribes the answer cache to folder_events, so answers cached by UI
+    # workers sharing SHARED_STATE_DB are invalidated by this run's changes
+    from apps.ui import answer_cache  # noqa: F401
+    parser = argparse.ArgumentParser(description="Bulk-upload a document tree into vault folders.")
+    parser.add_argument("root", help="Directory to ingest (walked recursively)")
+    parser.add_argument("--folder", help="Target folder ID (for files outside mapped subdirectories)")
+    parser.add_argument("--folder-per-subdir", action="store_true",
+                        help="Upload each top-level subdirectory into a folder of the same name, creating it if needed")
+    parser.add_argument("--concurrency", type=int, default=8, help="Uploads in flight")
+    parser.add_argument("--retries", type=int, default=3, help="Retries per file after the first attempt")
+    parser.add_argument("--state", help="Checkpoint file (default: derived from ROOT under INGEST_STATE_DIR)")
+    parser.add_argument("--method", default="fast", help="Indexing method")
+    parser.add_argument("--no-index", action="store_true", help="Don't queue indexing after uploading")
+    args = parser.parse_args(argv)
+
+    if not args.folder and not args.folder_per_subdir:
+        parser.error("one of --folder or --folder-per-subdir is required")
+    root = os.path.abspath(args.root)
+    if not os.path.isdir(root):
+        parser.error(f"not a directory: {args.root}")
+
+    state_path = args.state or os.path.join(
+        INGEST_STATE_DIR, hashlib.sha1(root.encode()).hexdigest()[:12] + ".jsonl"
+    )
+    folder_for = resolve_subdir_folders(root) if args.folder_per_subdir else {}
+    checkpoint = Checkpoint(state_path)
+    print(f"Ingesting {root} with concurrency {args.concurrency} "
+          f"({len(checkpoint.done)} files already in checkpoint {state_path})")
+
+    try:
+        stats = ingest(root, folder_for, args.folder, checkpoint, args.concurrency, args.retries)
+    except KeyboardInterrupt:
+        checkpoint.close()
+        print("\nInterrupted; progress is saved, rerun the same command to resume.")
+        return 130
+
+    wall_time = stats['wall_time']
+    megabytes = stats['bytes'] / (1024 * 1024)
+    print(
+        f"\nUploaded {stats['uploaded']} files ({megabytes:.1f} MB), skipped {stats['skipped']} already done, "
+        f"failed {stats['failed']}" + (f", {stats['unmapped']} outside mapped folders" if stats['unmapped'] else "")
+    )
+    if wall_time > 0:
+        print(
+            f"{wall_time:.1f}s total: {stats['uploaded'] / wall_time:.1f} files/s, {megabytes / wall_time:.2f} MB/s, "
+            f"p50 {percentile(stats['latencies'], 50):.2f}s, p95 {percentile(stats['latencies'], 95):.2f}s per file"
+        )
+
+    try:
+        if checkpoint.unindexed and not args.no_index:
+            queued = queue_indexing(sorted(checkpoint.unindexed), checkpoint, args.method)
+            for folder_id, result in queued.items():
+                print(f"🔄 Indexing {folder_id}: {result['outcome']}")
+            dispatch_queued([result['id'] for result in queued.values()])
+    except KeyboardInterrupt:
+        print("\nInterrupted; queued folders will be indexed by the UI's index queue.")
+        return 130
+    finally:
+        checkpoint.close()
+
+    return 1 if stats['failed'] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,144 @@
+"""
+Per-session cancellation of in-flight chat and upload requests.
+
+Gradio's `cancels=` cancels the asyncio task of an event. That reaches an
+async handler at its current `await`, but not a blocking call running in a
+worker thread, which carries on until the backend answers. Handlers
+therefore register a token for their session here:
+
+- async handlers (chat) register their task, so a stop request cancels it
+  and the pending `await` on the backend - closing the HTTP connection so
+  the backend can abort too;
+- threaded handlers (uploads) get a flag that their request bodies check
+  between chunks, so an upload in progress is aborted mid-stream.
+
+A new chat message supersedes (cancels) the session's previous one, while
+several uploads may run side by side until stopped together. Tokens are
+per process; in a multi-worker deployment a session's stop click is routed
+to the worker running its events.
+"""
+import asyncio
+import threading
+from typing import Dict, List, Optional, Tuple
+
+
+class Cancelled(Exception):
+    """Raised in a worker thread when its request has been cancelled."""
+
+
+class CancelToken:
+    """Cancellation flag for one request, optionally bound to its asyncio task."""
+
+    def __init__(self, session: str, kind: str):
+        self.session = session
+        self.kind = kind
+        self.event = threading.Event()
+        self.task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def bind_current_task(self) -> None:
+        """Attach the running asyncio task so `cancel` interrupts it."""
+        self.task = asyncio.current_task()
+        self._loop = asyncio.get_running_loop()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.event.is_set()
+
+    def cancel(self) -> None:
+        self.event.set()
+        if self.task is not None and not self.task.done():
+            self._loop.call_soon_threadsafe(self.task.cancel)
+
+    def raise_if_cancelled(self) -> None:
+        if self.event.is_set():
+            raise Cancelled(f"{self.kind} cancelled")
+
+
+class CancellableReader:
+    """
+    File wrapper whose reads fail once its token is cancelled.
+
+    httpx streams multipart bodies by reading the file in chunks, so
+    wrapping an upload's file aborts the request between two chunks.
+    """
+
+    def __init__(self, fileobj, token: Optional[CancelToken]):
+        self._fileobj = fileobj
+        self._token = token
+
+    def read(self, size: int = -1) -> bytes:
+        if self._token is not None:
+            self._token.raise_if_cancelled()
+        return self._fileobj.read(size)
+
+    def __getattr__(self, name):
+        return getattr(self._fileobj, name)
+
+
+class CancelRegistry:
+    """In-flight requests per (session, kind)."""
+
+    def __init__(self):
+        self._tokens: Dict[Tuple[str, str], List[CancelToken]] = {}
+        self._lock = threading.Lock()
+
+    def start(self, session: Optional[str], kind: str, supersede: bool = False) -> CancelToken:
+        """
+        Register a new request.
+
+        Args:
+            session: Gradio session hash
+            kind: Request kind, e.g. "chat" or "upload"
+            supersede: Cancel the session's requests of this kind still running
+        """
+        token = CancelToken(session or "anonymous", kind)
+        with self._lock:
+            tokens = self._tokens.setdefault((token.session, kind), [])
+            previous = tokens[:] if supersede else []
+            if supersede:
+                tokens.clear()
+            tokens.append(token)
+        for earlier in previous:
+            earlier.cancel()
+        return token
+
+    def finish(self, token: CancelToken) -> None:
+        key = (token.session, token.kind)
+        with self._lock:
+            tokens = self._tokens.get(key, [])
+            if token in tokens:
+                tokens.remove(token)
+            if not tokens:
+                self._tokens.pop(key, None)
+
+    def cancel(self, session: Optional[str], kind: str) -> List[CancelToken]:
+        """
+        Cancel a session's in-flight requests of a kind.
+
+        Returns:
+            The cancelled tokens (empty if nothing was running)
+        """
+        with self._lock:
+            tokens = self._tokens.pop((session or "anonymous", kind), [])
+        for token in tokens:
+            token.cancel()
+        return tokens
+
+    async def cancel_and_wait(self, session: Optional[str], kind: str, timeout: float = 5.0) -> int:
+        """
+        Cancel a session's requests of a kind and wait for their tasks to
+        unwind, so their cleanup runs before the caller continues.
+
+        Returns:
+            Number of requests cancelled
+        """
+        tokens = self.cancel(session, kind)
+        tasks = {token.task for token in tokens
+                 if token.task is not None and token.task is not asyncio.current_task()}
+        if tasks:
+            await asyncio.wait(tasks, timeout=timeout)
+        return len(tokens)
+
+
+in_flight = CancelRegistry()
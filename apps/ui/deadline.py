@@ -0,0 +1,144 @@
+"""
+Deadline budgets for user actions.
+
+A UI action such as refreshing the agents table makes several backend
+calls, and each used to apply its own fixed timeout, so the worst case was
+their sum. Instead, an action now runs under one deadline:
+
+- every backend call made inside it (including calls fanned out with
+  backend_client.run_parallel) has its timeout capped by the time left,
+  and tells the backend how much is left in the X-Deadline-Ms header so it
+  can stop work the UI will not wait for;
+- calls made one after another draw on what the earlier ones left, and
+  optional lookups (such as folder names next to agents) are skipped when
+  nothing is left rather than failing the whole action;
+- once the budget is spent, further calls fail fast with DeadlineExceeded
+  and handlers render what they have.
+
+Gradio `.then()` steps of the same click continue the budget of the step
+that started it (see `continues`), so a whole chain of refreshes is bounded
+by one budget rather than one per step.
+"""
+import contextvars
+import functools
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+import httpx
+
+# Time budget for one user action, shared by all backend calls it makes
+ACTION_BUDGET = float(os.getenv("ACTION_DEADLINE_SECONDS", "10"))
+
+# Header carrying the remaining budget, in milliseconds, to the backend
+HEADER = "X-Deadline-Ms"
+
+# Sessions whose last action deadline is remembered for chained steps
+MAX_SESSIONS = 1000
+
+
+class DeadlineExceeded(httpx.TimeoutException):
+    """Raised when a backend call is made, or times out, after the action's budget ran out."""
+
+
+class Deadline:
+    """Point in (monotonic) time by which an action must have finished."""
+
+    __slots__ = ("expires_at",)
+
+    def __init__(self, expires_at: float):
+        self.expires_at = expires_at
+
+    @classmethod
+    def after(cls, seconds: float) -> "Deadline":
+        return cls(time.monotonic() + seconds)
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+
+_current: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar("deadline", default=None)
+_continuing: contextvars.ContextVar[bool] = contextvars.ContextVar("deadline_continuing", default=False)
+
+# session -> deadline of the action it started last (LRU)
+_sessions: "OrderedDict[str, Deadline]" = OrderedDict()
+_sessions_lock = threading.Lock()
+
+
+def current() -> Optional[Deadline]:
+    """Deadline of the action running in this context, if any."""
+    return _current.get()
+
+
+@contextmanager
+def within(deadline: Optional[Deadline]) -> Iterator[Optional[Deadline]]:
+    """Run the enclosed calls under `deadline` (or the stricter enclosing one)."""
+    outer = _current.get()
+    if deadline is None or (outer is not None and outer.expires_at <= deadline.expires_at):
+        deadline = outer
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def action(session: Optional[str], budget: float = ACTION_BUDGET) -> Iterator[Optional[Deadline]]:
+    """
+    Run one user action under a deadline.
+
+    Starts a new budget for the session, or - inside a step wrapped with
+    `continues` - picks up the budget of the action the session started
+    last, as long as that action could still be running.
+    """
+    deadline = None
+    if _continuing.get() and session:
+        with _sessions_lock:
+            deadline = _sessions.get(session)
+        if deadline is not None and time.monotonic() - deadline.expires_at > budget:
+            deadline = None  # too old to be part of the same click
+    if deadline is None:
+        deadline = Deadline.after(budget)
+        if session:
+            with _sessions_lock:
+                _sessions[session] = deadline
+                _sessions.move_to_end(session)
+                while len(_sessions) > MAX_SESSIONS:
+                    _sessions.popitem(last=False)
+    with within(deadline) as effective:
+        yield effective
+
+
+def continues(fn: Callable) -> Callable:
+    """Mark a `.then()` step as part of the action started by the previous step."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        token = _continuing.set(True)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _continuing.reset(token)
+    return wrapper
+
+
+def clamp(timeout: Optional[float]) -> Optional[float]:
+    """
+    Cap a per-call timeout by the current action's remaining budget.
+
+    Raises:
+        DeadlineExceeded: if the budget is already spent
+    """
+    deadline = _current.get()
+    if deadline is None:
+        return timeout
+    remaining = deadline.remaining()
+    if remaining <= 0:
+        raise DeadlineExceeded("Action deadline exceeded")
+    return remaining if timeout is None else min(timeout, remaining)
@@ -0,0 +1,294 @@
+"""
+Cross-folder document finder.
+
+Finding which folder holds a document used to mean selecting each folder
+in turn and scanning its document list, one backend request per folder.
+This module keeps every folder's document list in one in-memory index:
+
+- all folders' lists are fetched concurrently (backend_client.run_parallel);
+  the requests are conditional, and a folder whose list comes back
+  unchanged (304, same parsed object) is not re-indexed, so a refresh
+  costs little more than the round-trips;
+- titles are indexed by character trigram, so a search intersects a few
+  posting sets and checks the survivors instead of scanning every title;
+  words shorter than a trigram are looked up as word prefixes, which are
+  indexed too;
+- each folder's index is built before it replaces the old one, so a
+  refresh - even of many large folders - never blocks searches;
+- searches are answered from memory. When the index is older than
+  DOC_FINDER_REFRESH_SECONDS a search still answers immediately and a
+  refresh runs in the background; after uploads or deletions in this UI
+  the next search refreshes first, so it sees them.
+
+The index is per UI process and holds titles, status, size and upload
+time only.
+"""
+import heapq
+import os
+import re
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from apps.ui import backend_client, models
+from apps.ui.reindex_planner import UNINDEXABLE_DOC_STATUSES
+
+# Seconds after which a search triggers a background refresh of the index
+REFRESH_SECONDS = float(os.getenv("DOC_FINDER_REFRESH_SECONDS", "60"))
+
+# Results returned by one search
+MAX_RESULTS = 100
+
+# Words of a title or query; underscores separate words as in file names
+_WORD = re.compile(r"[^\W_]+", re.UNICODE)
+
+# Marks word-prefix postings, which can't clash with trigrams of a title
+_PREFIX = "\x00"
+
+
+def trigrams(text: str) -> Set[str]:
+    """Character trigrams of lowercased text."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def index_terms(title: str, words: Tuple[str, ...]) -> Set[str]:
+    """Posting keys of a lowercased title: its trigrams and 1-2 character word prefixes."""
+    terms = trigrams(title)
+    for word in words:
+        terms.add(_PREFIX + word[:1])
+        terms.add(_PREFIX + word[:2])
+    return terms
+
+
+class FolderEntry:
+    """
+    One folder's documents as last fetched, with the title index over them.
+
+    Built in full before it is swapped into the DocumentIndex and never
+    modified afterwards (except for the folder name), so searches can read
+    it without holding the index lock.
+    """
+
+    __slots__ = ("folder_id", "name", "docs", "source", "titles", "words", "postings", "statuses", "total_bytes")
+
+    def __init__(self, folder_id: str, name: str, docs: Dict[str, models.Document], source: list):
+        self.folder_id = folder_id
+        self.name = name
+        self.docs = docs
+        self.source = source  # parsed list it was built from, to spot unchanged refetches
+        self.titles: Dict[str, str] = {}
+        self.words: Dict[str, Tuple[str, ...]] = {}
+        self.postings: Dict[str, Set[str]] = {}
+        for doc_id, doc in docs.items():
+            lowered = doc.title.lower()
+            words = tuple(_WORD.findall(lowered))
+            self.titles[doc_id] = lowered
+            self.words[doc_id] = words
+            for term in index_terms(lowered, words):
+                self.postings.setdefault(term, set()).add(doc_id)
+        self.statuses = Counter(doc.status or "unknown" for doc in docs.values())
+        self.total_bytes = sum(doc.size for doc in docs.values())
+
+    def candidates(self, word: str) -> Iterable[str]:
+        """Documents whose title contains `word` (a word starting with it, for 1-2 characters)."""
+        grams = trigrams(word)
+        if not grams:
+            return self.postings.get(_PREFIX + word, set())
+        postings = sorted((self.postings.get(gram, set()) for gram in grams), key=len)
+        doc_ids = set(postings[0])
+        for other in postings[1:]:
+            doc_ids &= other
+            if not doc_ids:
+                break
+        return [doc_id for doc_id in doc_ids if word in self.titles[doc_id]]
+
+    def matches(self, words: List[str]) -> Iterable[str]:
+        """Documents whose title contains every word (all documents for no words)."""
+        if not words:
+            return self.titles
+        doc_ids = None
+        for word in sorted(words, key=len, reverse=True):
+            matched = set(self.candidates(word))
+            doc_ids = matched if doc_ids is None else doc_ids & matched
+            if not doc_ids:
+                break
+        return doc_ids or set()
+
+
+class DocumentIndex:
+    """
+    Trigram index over the titles of all documents in all folders.
+
+    Each folder's index is built outside the lock during a refresh; the lock
+    is only held to swap finished folders in, so searches never wait for a
+    rebuild.
+    """
+
+    def __init__(self, refresh_seconds: float = REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._folders: Dict[str, FolderEntry] = {}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._refreshed_at = 0.0
+        self._dirty = False
+        self._counters = {"refreshes": 0, "folders_reindexed": 0, "folders_unchanged": 0,
+                          "fetch_errors": 0, "searches": 0}
+
+    def refresh(self) -> bool:
+        """
+        Refetch all folders' document lists and update the index.
+
+        Folders that can't be fetched keep their previous documents. Only
+        one refresh runs at a time; a concurrent call returns straight away.
+
+        Returns:
+            True if a refresh ran, False if one was already running or the
+            folder list could not be loaded
+        """
+        if not self._refresh_lock.acquire(blocking=False):
+            return False
+        try:
+            with self._lock:
+                self._dirty = False  # changes marked from here on need another refresh
+            folders = models.try_get_models("/folders/list", models.Folder)
+            if folders is None:
+                with self._lock:
+                    self._counters["fetch_errors"] += 1
+                    self._dirty = True
+                return False
+
+            doc_lists = backend_client.run_parallel(*[
+                (lambda fid=folder.folder_id: models.try_get_models(f"/folders/{fid}/documents", models.Document))
+                for folder in folders
+            ])
+
+            # Only this thread replaces entries (refresh lock), so reading them here is safe
+            current = dict(self._folders)
+            rebuilt: Dict[str, FolderEntry] = {}
+            fetch_errors = unchanged = 0
+            for folder, docs in zip(folders, doc_lists):
+                entry = current.get(folder.folder_id)
+                if docs is None:
+                    fetch_errors += 1
+                elif entry is not None and entry.source is docs:
+                    unchanged += 1
+                else:
+                    entry = FolderEntry(folder.folder_id, folder.name, {d.doc_id: d for d in docs}, docs)
+                    rebuilt[folder.folder_id] = entry
+                if entry is not None:
+                    entry.name = folder.name
+
+            with self._lock:
+                listed = {f.folder_id for f in folders}
+                self._folders = {
+                    folder_id: entry for folder_id, entry in {**current, **rebuilt}.items() if folder_id in listed
+                }
+                self._counters["fetch_errors"] += fetch_errors
+                self._counters["folders_unchanged"] += unchanged
+                self._counters["folders_reindexed"] += len(rebuilt)
+                self._counters["refreshes"] += 1
+                self._refreshed_at = time.monotonic()
+            return True
+        finally:
+            self._refresh_lock.release()
+
+    def mark_stale(self) -> None:
+        """Have the next search refresh the index first (after uploads or deletions)."""
+        with self._lock:
+            self._dirty = True
+
+    def ensure_fresh(self) -> None:
+        """
+        Refresh before searching when the index is empty or marked stale;
+        refresh merely old data in the background.
+        """
+        with self._lock:
+            required = self._dirty or not self._counters["refreshes"]
+            stale = time.monotonic() - self._refreshed_at > self.refresh_seconds
+        if required:
+            self.refresh()
+        elif stale and not self._refresh_lock.locked():
+            threading.Thread(target=self.refresh, name="document-finder-refresh", daemon=True).start()
+
+    def _snapshot(self) -> List[FolderEntry]:
+        with self._lock:
+            return list(self._folders.values())
+
+    def search(self, query: str, status: Optional[str] = None, limit: int = MAX_RESULTS) -> List[dict]:
+        """
+        Find documents whose title contains every word of `query`.
+
+        Args:
+            query: Words (or parts of words) to look for; empty lists all documents
+            status: Only documents with this status
+            limit: Maximum number of results
+
+        Returns:
+            Matches best first (whole title, then title prefix, then word
+            prefix, then anywhere), each with folder_id, folder_name and document
+        """
+        words = [w.lower() for w in _WORD.findall(query or "")]
+        with self._lock:
+            self._counters["searches"] += 1
+        entries = self._snapshot()
+
+        def rank(item: Tuple[FolderEntry, str]) -> tuple:
+            entry, doc_id = item
+            title, title_words = entry.titles[doc_id], entry.words[doc_id]
+            if not words:
+                return title
+            if list(title_words) == words or list(title_words[:-1]) == words:
+                score = 0  # the whole title, with or without its extension
+            elif len(title_words) >= len(words) and all(map(str.startswith, title_words, words)):
+                score = 1
+            elif all(any(w.startswith(word) for w in title_words) for word in words):
+                score = 2
+            else:
+                score = 3
+            return score, title
+
+        found = (
+            (entry, doc_id) for entry in entries for doc_id in entry.matches(words)
+            if not status or entry.docs[doc_id].status == status
+        )
+        return [
+            {"folder_id": entry.folder_id, "folder_name": entry.name, "document": entry.docs[doc_id]}
+            for entry, doc_id in heapq.nsmallest(limit, found, key=rank)
+        ]
+
+    def statuses(self) -> List[str]:
+        """Document statuses present in the index."""
+        return sorted({
+            doc.status for entry in self._snapshot() for doc in entry.docs.values() if doc.status
+        })
+
+    def folder_stats(self) -> List[dict]:
+        """
+        Per-folder aggregates.
+
+        Returns:
+            One entry per folder with folder_id, name, documents, total_bytes,
+            failed (documents that failed to parse) and status counts
+        """
+        return [{
+            "folder_id": entry.folder_id,
+            "name": entry.name,
+            "documents": len(entry.docs),
+            "total_bytes": entry.total_bytes,
+            "failed": sum(entry.statuses[s] for s in UNINDEXABLE_DOC_STATUSES),
+            "statuses": dict(entry.statuses)
+        } for entry in sorted(self._snapshot(), key=lambda e: e.name.lower())]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self._counters,
+                "folders": len(self._folders),
+                "documents": sum(len(entry.docs) for entry in self._folders.values()),
+                "trigrams": sum(len(entry.postings) for entry in self._folders.values()),
+                "age_s": round(time.monotonic() - self._refreshed_at, 1) if self._refreshed_at else None
+            }
+
+
+document_index = DocumentIndex()
@@ -1,8 +1,13 @@
 """
 File and folder management utilities.
 """
+import errno
 import os
 import shutil
+import sqlite3
+import threading
+import time
+import uuid
 from typing import List, Dict, Optional
 from pathlib import Path
 
@@ -193,7 +198,8 @@ def safe_delete_file(file_path: str, backup_dir: Optional[str] = None) -> bool:
     
     Args:
         file_path: Path to the file to delete
-        backup_dir: Optional directory to move file to instead of deleting
+        backup_dir: Optional trash directory to move the file to instead of
+            deleting it (see TrashStore; restore with get_trash_store(backup_dir))
         
     Returns:
         True if successful
@@ -202,20 +208,204 @@ def safe_delete_file(file_path: str, backup_dir: Optional[str] = None) -> bool:
         raise FileNotFoundError(f"File not found: {file_path}")
     
     if backup_dir:
-        # Move to backup instead of deleting
-        os.makedirs(backup_dir, exist_ok=True)
-        backup_path = os.path.join(backup_dir, os.path.basename(file_path))
-        
-        # Handle duplicate names
-        counter = 1
-        while os.path.exists(backup_path):
-            name, ext = os.path.splitext(os.path.basename(file_path))
-            backup_path = os.path.join(backup_dir, f"{name}_{counter}{ext}")
-            counter += 1
-        
-        shutil.move(file_path, backup_path)
+        # Move to the trash store instead of deleting
+        get_trash_store(backup_dir).put(file_path)
     else:
         # Direct deletion
         os.remove(file_path)
     
     return True
+
+
+# Default retention for trash stores
+TRASH_MAX_AGE = 30 * 24 * 60 * 60
+TRASH_MAX_BYTES = 1024 * 1024 * 1024
+TRASH_EVICT_INTERVAL = 60 * 60
+
+_TRASH_SCHEMA = """
+CREATE TABLE IF NOT EXISTS trash (
+    id TEXT PRIMARY KEY,
+    original_path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    deleted_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_trash_deleted_at ON trash (deleted_at);
+"""
+
+
+class TrashStore:
+    """
+    Restorable trash directory.
+    
+    Each trashed file is renamed to files/<uuid><ext> inside the trash
+    directory, so naming an entry is O(1) no matter how many files with the
+    same name were trashed before, and a trash directory on the same
+    filesystem costs a metadata-only rename. A SQLite index (index.db)
+    records the original path for restore. Entries beyond the retention
+    limits (max age, max total bytes) are evicted oldest first.
+    """
+    
+    def __init__(self, trash_dir: str, max_age: float = TRASH_MAX_AGE, max_bytes: int = TRASH_MAX_BYTES):
+        self.trash_dir = os.path.abspath(trash_dir)
+        self.files_dir = os.path.join(self.trash_dir, "files")
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        os.makedirs(self.files_dir, exist_ok=True)
+        
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            os.path.join(self.trash_dir, "index.db"), check_same_thread=False, isolation_level=None
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(_TRASH_SCHEMA)
+        self._thread = None
+    
+    def _stored_path(self, entry_id: str, original_path: str) -> str:
+        return os.path.join(self.files_dir, entry_id + os.path.splitext(original_path)[1])
+    
+    def put(self, file_path: str) -> str:
+        """
+        Move a file into the trash.
+        
+        Args:
+            file_path: File to trash
+            
+        Returns:
+            Entry ID for restore()
+        """
+        if not os.path.isfile(file_path):
+            raise FileNotFoundError(f"File not found: {file_path}")
+        
+        original_path = os.path.abspath(file_path)
+        entry_id = uuid.uuid4().hex
+        stored_path = self._stored_path(entry_id, original_path)
+        size = os.path.getsize(original_path)
+        
+        try:
+            os.rename(original_path, stored_path)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            # Trash is on another filesystem: copy under a temp name, then
+            # rename so a partial copy never looks like a trashed file
+            tmp_path = stored_path + ".part"
+            shutil.copy2(original_path, tmp_path)
+            os.rename(tmp_path, stored_path)
+            os.remove(original_path)
+        
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO trash (id, original_path, size, deleted_at) VALUES (?, ?, ?, ?)",
+                (entry_id, original_path, size, time.time())
+            )
+        return entry_id
+    
+    def list_entries(self) -> List[Dict[str, any]]:
+        """Trashed files, newest first."""
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM trash ORDER BY deleted_at DESC").fetchall()
+        return [dict(row) for row in rows]
+    
+    def restore(self, entry_id: str, dest_path: Optional[str] = None) -> str:
+        """
+        Move a trashed file back.
+        
+        Args:
+            entry_id: ID returned by put()
+            dest_path: Where to restore to (defaults to the original path)
+            
+        Returns:
+            Path of the restored file
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM trash WHERE id = ?", (entry_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"No trash entry: {entry_id}")
+        
+        dest_path = dest_path or row['original_path']
+        if os.path.exists(dest_path):
+            raise FileExistsError(f"Restore target already exists: {dest_path}")
+        
+        os.makedirs(os.path.dirname(dest_path) or ".", exist_ok=True)
+        shutil.move(self._stored_path(entry_id, row['original_path']), dest_path)
+        with self._lock:
+            self._conn.execute("DELETE FROM trash WHERE id = ?", (entry_id,))
+        return dest_path
+    
+    def evict(self) -> Dict[str, any]:
+        """
+        Permanently delete entries older than max_age, then the oldest
+        entries until the trash fits in max_bytes.
+        
+        Returns:
+            Dictionary with eviction statistics
+        """
+        results = {
+            'evicted': 0,
+            'bytes_freed': 0,
+            'errors': []
+        }
+        
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM trash ORDER BY deleted_at").fetchall()
+            total = sum(row['size'] for row in rows)
+            cutoff = time.time() - self.max_age
+            
+            for row in rows:
+                if row['deleted_at'] >= cutoff and total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(self._stored_path(row['id'], row['original_path']))
+                except FileNotFoundError:
+                    pass
+                except Exception as e:
+                    results['errors'].append({'path': row['original_path'], 'error': str(e)})
+                    continue
+                self._conn.execute("DELETE FROM trash WHERE id = ?", (row['id'],))
+                total -= row['size']
+                results['evicted'] += 1
+                results['bytes_freed'] += row['size']
+        
+        return results
+    
+    def start(self, interval: float = TRASH_EVICT_INTERVAL) -> None:
+        """Start background eviction (idempotent)."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, args=(interval,), name="trash-evict", daemon=True
+            )
+            self._thread.start()
+    
+    def _run(self, interval: float) -> None:
+        while True:
+            try:
+                self.evict()
+            except Exception as e:
+                print(f"Trash eviction error: {e}")
+            time.sleep(interval)
+
+
+_trash_stores: Dict[str, TrashStore] = {}
+_trash_stores_lock = threading.Lock()
+
+
+def get_trash_store(trash_dir: str) -> TrashStore:
+    """
+    Get the shared TrashStore for a directory, starting its background
+    eviction on first use.
+    
+    Args:
+        trash_dir: Trash directory
+        
+    Returns:
+        TrashStore instance
+    """
+    key = os.path.abspath(trash_dir)
+    with _trash_stores_lock:
+        store = _trash_stores.get(key)
+        if store is None:
+            store = _trash_stores[key] = TrashStore(key)
+            store.start()
+    return store
@@ -8,7 +8,8 @@ from file_utils import (
     delete_folder,
     get_folder_size,
     clear_folder_contents,
-    safe_delete_file
+    safe_delete_file,
+    get_trash_store
 )
 
 
@@ -103,6 +104,22 @@ def example_safe_delete():
         print(f"Error: {e}")
 
 
+def example_restore_from_trash():
+    """Example: Restore the most recently trashed file."""
+    try:
+        trash = get_trash_store("./backups")
+        entries = trash.list_entries()
+        if entries:
+            restored = trash.restore(entries[0]['id'])
+            print(f"Restored {restored}")
+        
+        # Permanently remove entries past the retention limits
+        results = trash.evict()
+        print(f"Evicted {results['evicted']} entries ({results['bytes_freed']} bytes)")
+    except Exception as e:
+        print(f"Error: {e}")
+
+
 if __name__ == "__main__":
     print("File Utils Examples")
     print("=" * 50)
@@ -115,3 +132,4 @@ if __name__ == "__main__":
     # example_get_folder_size()
     # example_clear_folder()
     # example_safe_delete()
+    # example_restore_from_trash()
@@ -0,0 +1,39 @@
+"""
+Notifications that a vault folder's content changed.
+
+State derived from a folder's documents - cached chat answers in
+particular (see apps.ui.answer_cache) - has to be dropped when they
+change. Every path that changes a folder reports it here:
+
+- indexing finished through the index scheduler;
+- bulk ingestion started indexing its folders;
+- documents or whole folders were deleted from the UI;
+- a directory sync uploaded or removed files.
+
+Subscribers run in the reporting process. Those that keep state in the
+shared state database (SHARED_STATE_DB) thereby reach every UI worker,
+including when the change comes from a command-line tool such as
+bulk_ingest or folder_sync run against the same database.
+"""
+import threading
+from typing import Callable, List
+
+_subscribers: List[Callable[[str], None]] = []
+_lock = threading.Lock()
+
+
+def subscribe(callback: Callable[[str], None]) -> None:
+    """Call `callback(folder_id)` whenever a folder's content changes."""
+    with _lock:
+        _subscribers.append(callback)
+
+
+def folder_changed(folder_id: str) -> None:
+    """Report that a folder's documents or index changed; subscriber errors are logged, not raised."""
+    with _lock:
+        subscribers = list(_subscribers)
+    for callback in subscribers:
+        try:
+            callback(folder_id)
+        except Exception as e:
+            print(f"⚠️ Folder change subscriber failed for {folder_id}: {e}")
@@ -0,0 +1,481 @@
+"""
+Sync a local directory into a Knowledge Vault folder.
+
+A persisted manifest records path, size, mtime, content hash and backend
+doc_id for every synced file, so only new or changed files are uploaded and
+removed files are deleted from the folder. The manifest is a SQLite table
+updated row by row, so syncing a batch of changes writes only those rows. On Linux, inotify delivers the
+changed names directly; elsewhere the directory is rescanned periodically.
+
+From the UI, only directories inside SYNC_ROOT can be synced (none when it
+is unset), since anyone who can reach the UI could otherwise copy arbitrary
+server files into a folder and read them back through an agent. The
+command line is for operators and is not restricted.
+
+Usage:
+    python -m apps.ui.folder_sync LOCAL_DIR FOLDER_ID [--watch]
+"""
+import argparse
+import ctypes
+import ctypes.util
+import hashlib
+import json
+import os
+import select
+import sqlite3
+import struct
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, Optional, Set, Tuple
+
+from apps.ui import backend_client, folder_events
+from apps.ui.file_utils import list_folder_files
+from apps.ui.shared_state import SharedStore, shared_store
+
+SYNC_STATE_DIR = os.getenv("SYNC_STATE_DIR", os.path.join("data", "sync"))
+
+# Directory under which the UI may sync; empty disables syncing from the UI
+SYNC_ROOT = os.getenv("SYNC_ROOT", "")
+
+# Seconds between full rescans when inotify is unavailable (and as a safety net when it is)
+RESCAN_INTERVAL = float(os.getenv("SYNC_RESCAN_INTERVAL", "300"))
+
+# Seconds of filesystem quiet before a batch of inotify events is synced
+SETTLE_SECONDS = 1.0
+
+
+def is_within(path: str, root: str) -> bool:
+    """True if `path` resolves (following symlinks) to `root` or somewhere below it."""
+    real_root = os.path.realpath(root)
+    return os.path.commonpath([os.path.realpath(path), real_root]) == real_root
+
+
+def resolve_sync_dir(local_dir: str, root: str = SYNC_ROOT) -> str:
+    """
+    Resolve a directory requested from the UI and check it lies inside the sync root.
+
+    Returns:
+        The directory's real path
+
+    Raises:
+        PermissionError: if UI syncing is disabled or the directory is outside `root`
+    """
+    if not root:
+        raise PermissionError("Directory sync from the UI is disabled (SYNC_ROOT is not set)")
+    real_dir = os.path.realpath(local_dir)
+    if not is_within(real_dir, root):
+        raise PermissionError(f"Only directories inside {os.path.realpath(root)} can be synced")
+    return real_dir
+
+
+def file_hash(file_path: str) -> str:
+    """SHA-256 of a file's contents, read in 1 MB chunks."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+_MANIFEST_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    name TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    hash TEXT NOT NULL,
+    doc_id TEXT
+);
+"""
+
+
+class Manifest:
+    """
+    SQLite manifest of synced files, keyed by file name.
+
+    Entries are read and written one row at a time, so neither loading nor
+    updating it scales with the size of the directory. A JSON manifest
+    from earlier versions next to the database is imported once.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_MANIFEST_SCHEMA)
+        self._import_json(os.path.splitext(path)[0] + ".json")
+
+    def _import_json(self, json_path: str) -> None:
+        if not os.path.exists(json_path):
+            return
+        with open(json_path, encoding='utf-8') as f:
+            entries = json.load(f).get('files', {})
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO files (name, size, mtime, hash, doc_id) VALUES (?, ?, ?, ?, ?)",
+                [(name, e['size'], e['mtime'], e['hash'], e.get('doc_id')) for name, e in entries.items()]
+            )
+            self._conn.execute("COMMIT")
+        os.remove(json_path)
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT size, mtime, hash, doc_id FROM files WHERE name = ?", (name,)).fetchone()
+        return dict(row) if row else None
+
+    def put(self, name: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO files (name, size, mtime, hash, doc_id) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET size = excluded.size, mtime = excluded.mtime, "
+                "hash = excluded.hash, doc_id = excluded.doc_id",
+                (name, entry['size'], entry['mtime'], entry['hash'], entry.get('doc_id'))
+            )
+
+    def delete(self, name: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM files WHERE name = ?", (name,))
+
+    def names(self) -> Iterator[str]:
+        """All tracked file names (for full rescans)."""
+        with self._lock:
+            rows = self._conn.execute("SELECT name FROM files").fetchall()
+        return (row['name'] for row in rows)
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class Inotify:
+    """Minimal ctypes binding for watching one directory with inotify."""
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_Q_OVERFLOW = 0x00004000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self, fd: int):
+        self.fd = fd
+
+    @classmethod
+    def watch(cls, directory: str) -> Optional["Inotify"]:
+        """Start watching a directory, or return None if inotify isn't available."""
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fd = libc.inotify_init1(cls.IN_NONBLOCK | cls.IN_CLOEXEC)
+            if fd < 0:
+                return None
+            mask = cls.IN_CLOSE_WRITE | cls.IN_MOVED_FROM | cls.IN_MOVED_TO | cls.IN_DELETE
+            if libc.inotify_add_watch(fd, os.fsencode(directory), mask) < 0:
+                os.close(fd)
+                return None
+        except (OSError, AttributeError):
+            return None
+        return cls(fd)
+
+    def read(self, timeout: float) -> Tuple[Set[str], bool]:
+        """
+        Wait up to `timeout` seconds for events.
+
+        Returns:
+            (changed file names, True if the kernel queue overflowed)
+        """
+        names: Set[str] = set()
+        overflow = False
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return names, overflow
+
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return names, overflow
+
+        offset = 0
+        while offset + self._EVENT.size <= len(data):
+            _, mask, _, length = self._EVENT.unpack_from(data, offset)
+            offset += self._EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if mask & self.IN_Q_OVERFLOW:
+                overflow = True
+            elif name:
+                names.add(os.fsdecode(name))
+        return names, overflow
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class SyncAgent:
+    """
+    Keeps one vault folder in step with one local directory.
+
+    Only files directly inside the directory with a supported extension are
+    synced, matching file_utils.list_folder_files. With `root` set, files
+    that resolve outside it (symlinks) are treated as absent.
+    """
+
+    def __init__(self, local_dir: str, folder_id: str, manifest_path: Optional[str] = None,
+                 root: Optional[str] = None):
+        self.local_dir = os.path.abspath(local_dir)
+        self.folder_id = folder_id
+        self.root = root
+        if manifest_path is None:
+            dir_key = hashlib.sha1(self.local_dir.encode()).hexdigest()[:12]
+            manifest_path = os.path.join(SYNC_STATE_DIR, f"{folder_id}-{dir_key}.db")
+        self.manifest = Manifest(manifest_path)
+        self.last_result: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def is_supported(name: str) -> bool:
+        return name.lower().endswith(backend_client.SUPPORTED_EXTENSIONS)
+
+    def sync(self) -> Dict[str, Any]:
+        """Full rescan: stat every file, upload new/changed ones, delete removed ones."""
+        present = {f['name'] for f in list_folder_files(self.local_dir)}
+        return self.sync_names(present | set(self.manifest.names()))
+
+    def sync_names(self, names: Iterable[str]) -> Dict[str, Any]:
+        """
+        Sync only the given file names.
+
+        Returns:
+            Dictionary with uploaded, deleted and failed name lists and an
+            unchanged count
+        """
+        result = {'uploaded': [], 'deleted': [], 'failed': [], 'unchanged': 0}
+        with self._lock:
+            for name in sorted(names):
+                try:
+                    outcome = self._sync_one(name)
+                except Exception as e:
+                    result['failed'].append({'name': name, 'error': str(e)})
+                    continue
+                if outcome == 'unchanged':
+                    result['unchanged'] += 1
+                elif outcome:
+                    result[outcome].append(name)
+        if result['uploaded'] or result['deleted']:
+            folder_events.folder_changed(self.folder_id)
+        result['finished_at'] = time.time()
+        self.last_result = result
+        return result
+
+    def _sync_one(self, name: str) -> Optional[str]:
+        path = os.path.join(self.local_dir, name)
+        entry = self.manifest.get(name)
+
+        if not (os.path.isfile(path) and self.is_supported(name)) or (self.root and not is_within(path, self.root)):
+            if entry is None:
+                return None
+            self._delete_remote(entry)
+            self.manifest.delete(name)
+            return 'deleted'
+
+        stat = os.stat(path)
+        if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+            return 'unchanged'
+
+        digest = file_hash(path)
+        if entry and entry['hash'] == digest:
+            self.manifest.put(name, {**entry, 'mtime': stat.st_mtime})
+            return 'unchanged'
+
+        response = backend_client.upload_document(self.folder_id, path, name)
+        if response.status_code != 200:
+            raise RuntimeError(f"Upload failed (HTTP {response.status_code}): {response.text[:100]}")
+        doc_id = response.json().get('doc_id')
+
+        # Replace the previous version only once the new one is in, so a
+        # failed upload never leaves the folder without the document
+        if entry and entry.get('doc_id') != doc_id:
+            try:
+                self._delete_remote(entry)
+            except Exception:
+                # Keep tracking the new version; the old one stays behind as a duplicate
+                self.manifest.put(name, self._entry(stat, digest, doc_id))
+                raise
+
+        self.manifest.put(name, self._entry(stat, digest, doc_id))
+        return 'uploaded'
+
+    @staticmethod
+    def _entry(stat: os.stat_result, digest: str, doc_id: Optional[str]) -> Dict[str, Any]:
+        return {'size': stat.st_size, 'mtime': stat.st_mtime, 'hash': digest, 'doc_id': doc_id}
+
+    def _delete_remote(self, entry: Dict[str, Any]) -> None:
+        if not entry.get('doc_id'):
+            return
+        response = backend_client.delete_document(self.folder_id, entry['doc_id'])
+        if response.status_code not in (200, 404):
+            raise RuntimeError(f"Delete failed (HTTP {response.status_code}): {response.text[:100]}")
+
+    def watch(self, stop_event: threading.Event, rescan_interval: float = RESCAN_INTERVAL) -> None:
+        """
+        Sync continuously until `stop_event` is set.
+
+        With inotify, each batch of events costs O(changed files); a full
+        rescan still runs every `rescan_interval` seconds as a safety net.
+        """
+        watcher = Inotify.watch(self.local_dir)
+        self.sync()
+        last_rescan = time.monotonic()
+        pending: Set[str] = set()
+
+        try:
+            while not stop_event.is_set():
+                try:
+                    if watcher is None:
+                        stop_event.wait(rescan_interval)
+                        if not stop_event.is_set():
+                            self.sync()
+                        continue
+
+                    names, overflow = watcher.read(SETTLE_SECONDS)
+                    if overflow or time.monotonic() - last_rescan > rescan_interval:
+                        pending.clear()
+                        self.sync()
+                        last_rescan = time.monotonic()
+                    elif names:
+                        pending |= names
+                    elif pending:
+                        # Quiet for a full settle period: flush the batch
+                        self.sync_names(pending)
+                        pending.clear()
+                except Exception as e:
+                    print(f"⚠️ Sync error for {self.local_dir}: {e}")
+                    stop_event.wait(SETTLE_SECONDS)
+        finally:
+            if watcher is not None:
+                watcher.close()
+
+
+class SyncManager:
+    """
+    Runs watch threads for directory -> folder mappings.
+
+    With a shared state store (multi-worker deployments) each watch is also
+    registered there with the owning process. Any worker can then stop or
+    replace it: the owner notices its registration is gone and stops the
+    thread within a few seconds.
+    """
+
+    NAMESPACE = "sync_watches"
+
+    # Seconds between checks of this process's watch registrations
+    OWNERSHIP_INTERVAL = 2.0
+
+    def __init__(self, store: Optional[SharedStore] = None):
+        self.store = store
+        self._mappings: Dict[str, Tuple[SyncAgent, threading.Thread, threading.Event]] = {}
+        self._lock = threading.Lock()
+        self._monitor: Optional[threading.Thread] = None
+
+    def start(self, local_dir: str, folder_id: str, root: Optional[str] = None) -> SyncAgent:
+        """Start watching a directory for a folder, replacing any existing mapping."""
+        if not os.path.isdir(local_dir):
+            raise NotADirectoryError(f"Path is not a directory: {local_dir}")
+        self.stop(folder_id)
+
+        agent = SyncAgent(local_dir, folder_id, root=root)
+        stop_event = threading.Event()
+        thread = threading.Thread(
+            target=agent.watch, args=(stop_event,), name=f"sync-{folder_id[:8]}", daemon=True
+        )
+        with self._lock:
+            self._mappings[folder_id] = (agent, thread, stop_event)
+        if self.store is not None:
+            self.store.put(self.NAMESPACE, folder_id, {'pid': os.getpid(), 'local_dir': agent.local_dir})
+            self._start_monitor()
+        thread.start()
+        return agent
+
+    def stop(self, folder_id: str) -> bool:
+        """Stop watching for a folder."""
+        with self._lock:
+            mapping = self._mappings.pop(folder_id, None)
+        registered = self.store is not None and self.store.pop(self.NAMESPACE, folder_id) is not None
+        if mapping is None:
+            return registered
+        mapping[2].set()
+        return True
+
+    def mappings(self) -> Dict[str, SyncAgent]:
+        with self._lock:
+            return {folder_id: agent for folder_id, (agent, thread, _) in self._mappings.items() if thread.is_alive()}
+
+    def _start_monitor(self) -> None:
+        with self._lock:
+            if self._monitor is not None and self._monitor.is_alive():
+                return
+            self._monitor = threading.Thread(target=self._check_ownership, name="sync-ownership", daemon=True)
+            self._monitor.start()
+
+    def _check_ownership(self) -> None:
+        """Stop local watches whose registration was removed or taken over by another worker."""
+        while True:
+            time.sleep(self.OWNERSHIP_INTERVAL)
+            with self._lock:
+                local = list(self._mappings.items())
+            for folder_id, (agent, _, stop_event) in local:
+                try:
+                    owner = self.store.get(self.NAMESPACE, folder_id)
+                except Exception as e:
+                    print(f"⚠️ Sync registry error: {e}")
+                    continue
+                if owner is None or owner['pid'] != os.getpid() or owner['local_dir'] != agent.local_dir:
+                    with self._lock:
+                        if self._mappings.get(folder_id, (None,))[0] is agent:
+                            del self._mappings[folder_id]
+                    stop_event.set()
+
+
+sync_manager = SyncManager(shared_store)
+
+
+def main(argv: Optional[list] = None) -> int:
+    # Subscribes the answer cache to folder_events, so answers cached by UI
+    # workers sharing SHARED_STATE_DB are invalidated by this run's changes
+    from apps.ui import answer_cache  # noqa: F401
+    parser = argparse.ArgumentParser(description="Sync a local directory into a vault folder.")
+    parser.add_argument("local_dir", help="Directory to sync")
+    parser.add_argument("folder_id", help="Target vault folder ID")
+    parser.add_argument("--watch", action="store_true", help="Keep syncing changes until interrupted")
+    args = parser.parse_args(argv)
+
+    agent = SyncAgent(args.local_dir, args.folder_id)
+    if not args.watch:
+        result = agent.sync()
+        print(f"Uploaded {len(result['uploaded'])}, deleted {len(result['deleted'])}, "
+              f"unchanged {result['unchanged']}, failed {len(result['failed'])}")
+        for failure in result['failed']:
+            print(f"  ❌ {failure['name']}: {failure['error']}")
+        return 1 if result['failed'] else 0
+
+    print(f"Watching {agent.local_dir} -> folder {args.folder_id} (Ctrl+C to stop)")
+    try:
+        agent.watch(threading.Event())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
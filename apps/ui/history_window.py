@@ -0,0 +1,173 @@
+"""
+Windowed chat history loading.
+
+Opening a conversation fetches and renders only the most recent turns; older
+turns are revealed from the local buffer or paged in from the backend on demand.
+"""
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from apps.ui import backend_client
+from apps.ui.models import ChatMessage, parse_list
+
+# Turns rendered when a conversation is opened, and per "Load Older" click
+HISTORY_PAGE_TURNS = int(os.getenv("CHAT_HISTORY_PAGE_TURNS", "50"))
+
+# Upper bound on characters sent to the chatbot per render
+RENDER_BUDGET_CHARS = int(os.getenv("CHAT_RENDER_BUDGET_CHARS", "200000"))
+
+Turn = Tuple[str, Optional[str]]
+
+
+class HistoryWindow:
+    """
+    Compact per-session history buffer with a visible window.
+
+    `turns` holds every turn fetched so far (oldest first) as plain tuples;
+    only the last `visible` of them are rendered in the chatbot. `cursor` is
+    the backend cursor for the next older page, or None when the buffer
+    already reaches the start of the conversation. `size` tracks the
+    buffered text length in characters.
+    """
+
+    __slots__ = ("turns", "visible", "cursor", "size")
+
+    def __init__(self, turns: Optional[List[Turn]] = None, visible: int = 0, cursor: Optional[str] = None):
+        self.turns = turns if turns is not None else []
+        self.visible = visible
+        self.cursor = cursor
+        self.size = sum(turn_size(turn) for turn in self.turns)
+
+    def rendered(self, budget_chars: int = RENDER_BUDGET_CHARS) -> List[Turn]:
+        """
+        Turns currently shown in the chatbot.
+
+        The newest turn is always included; older visible turns are added
+        until the character budget is spent.
+        """
+        if not self.visible:
+            return []
+
+        shown = 0
+        spent = 0
+        for turn in reversed(self.turns[-self.visible:]):
+            spent += turn_size(turn)
+            if shown and spent > budget_chars:
+                break
+            shown += 1
+        return self.turns[-shown:]
+
+    def has_older(self) -> bool:
+        """True if older turns exist locally or on the backend."""
+        return self.visible < len(self.turns) or self.cursor is not None
+
+    def append(self, user_msg: str, assistant_msg: Optional[str]) -> None:
+        """Record a new turn; new turns are always visible."""
+        self.turns.append((user_msg, assistant_msg))
+        self.visible += 1
+        self.size += turn_size(self.turns[-1])
+
+    def prepend(self, turns: List[Turn]) -> None:
+        """Add an older page in front of the buffer and show it."""
+        self.turns[:0] = turns
+        self.visible += len(turns)
+        self.size += sum(turn_size(turn) for turn in turns)
+
+    def collapse(self, max_turns: int = HISTORY_PAGE_TURNS) -> None:
+        """Shrink the visible window back to the latest `max_turns` turns."""
+        self.visible = min(self.visible, max_turns)
+
+    def trim(self, max_chars: int) -> None:
+        """
+        Drop the oldest buffered turns until the buffer fits in `max_chars`.
+
+        The cursor is cleared: it pointed behind the dropped turns, so older
+        pages can no longer be stitched on seamlessly.
+        """
+        dropped = 0
+        while self.size > max_chars and len(self.turns) - dropped > 1:
+            self.size -= turn_size(self.turns[dropped])
+            dropped += 1
+        if dropped:
+            del self.turns[:dropped]
+            self.visible = min(self.visible, len(self.turns))
+            self.cursor = None
+
+
+def turn_size(turn: Turn) -> int:
+    """Approximate in-memory weight of a turn, in characters."""
+    return len(turn[0] or "") + len(turn[1] or "")
+
+
+def pair_messages(messages: List[Dict[str, Any]]) -> List[Turn]:
+    """
+    Convert backend messages into (user, assistant) turns.
+
+    Args:
+        messages: Alternating user/assistant messages, oldest first
+
+    Returns:
+        List of turns; a trailing unanswered message is dropped
+    """
+    messages = parse_list(ChatMessage, messages)
+    turns = []
+    for i in range(0, len(messages), 2):
+        if i + 1 < len(messages):
+            turns.append((messages[i].content, messages[i + 1].content))
+    return turns
+
+
+def fetch_page(agent_id: str, session_id: Optional[str], before: Optional[str] = None,
+               limit: int = HISTORY_PAGE_TURNS) -> Optional[Tuple[List[Turn], Optional[str]]]:
+    """
+    Fetch one page of history ending just before `before`.
+
+    The backend is asked for `limit` turns; a backend that ignores paging
+    returns the full history, which is then windowed locally instead.
+
+    Returns:
+        (turns, next_cursor) on success, None on a non-200 response
+    """
+    params = {"limit": limit * 2}
+    if session_id:
+        params["session_id"] = session_id
+    if before:
+        params["before"] = before
+
+    response = backend_client.client.get(f"/chat/{agent_id}/history", params=params, timeout=10.0)
+    if response.status_code != 200:
+        return None
+
+    result = response.json()
+    return pair_messages(result.get('messages', [])), result.get('next_cursor')
+
+
+def open_window(agent_id: str, session_id: Optional[str]) -> Optional[HistoryWindow]:
+    """Load the most recent page of a conversation."""
+    page = fetch_page(agent_id, session_id)
+    if page is None:
+        return None
+
+    turns, cursor = page
+    return HistoryWindow(turns, visible=min(len(turns), HISTORY_PAGE_TURNS), cursor=cursor)
+
+
+def load_older(window: HistoryWindow, agent_id: str, session_id: Optional[str]) -> HistoryWindow:
+    """
+    Reveal the next page of older turns.
+
+    Buffered turns are shown first; the backend is only asked for the page
+    behind the cursor once the local buffer is exhausted.
+    """
+    if window.visible < len(window.turns):
+        window.visible = min(len(window.turns), window.visible + HISTORY_PAGE_TURNS)
+        return window
+
+    if window.cursor:
+        page = fetch_page(agent_id, session_id, before=window.cursor)
+        if page is not None:
+            turns, cursor = page
+            window.prepend(turns)
+            window.cursor = cursor
+
+    return window
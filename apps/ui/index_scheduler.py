@@ -0,0 +1,299 @@
+"""
+Client-side scheduler for folder indexing jobs.
+
+Index requests are queued in a small SQLite database instead of hitting
+POST /folders/{folder_id}/index directly, so a burst of clicks can't flood
+the backend's GraphRAG indexer. A background thread dispatches queued jobs
+by priority under a global concurrency cap and polls running folders until
+the backend reports them finished.
+
+Several frontend worker processes may share the database (see
+apps.ui.server): queue updates and job claims run in IMMEDIATE
+transactions, so each job is started and finished exactly once. A claimed
+job stays 'starting' - holding its slot, but not polled - until its index
+request has been accepted and the folder's baseline recorded; only then is
+it 'running' and can any worker finish it.
+"""
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from apps.ui import backend_client, folder_events
+
+QUEUE_DB_PATH = os.getenv("INDEX_QUEUE_DB", os.path.join("data", "index_queue.db"))
+
+# Folders indexed at the same time
+MAX_CONCURRENT = int(os.getenv("INDEX_MAX_CONCURRENT", "2"))
+
+# Seconds between dispatch/poll passes
+POLL_INTERVAL = float(os.getenv("INDEX_POLL_INTERVAL", "10"))
+
+# A running job is failed if the backend hasn't finished it by then
+RUN_TIMEOUT = float(os.getenv("INDEX_RUN_TIMEOUT", str(2 * 60 * 60)))
+
+# If the folder never reports 'indexing', treat the job as done after this long
+START_GRACE = 60.0
+
+# A job still 'starting' after this long lost its worker mid-request; it is requeued
+START_TIMEOUT = 120.0
+
+# States that hold a concurrency slot
+ACTIVE_STATES = "('starting', 'running')"
+
+PRIORITIES = {'high': 0, 'normal': 1, 'low': 2}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS index_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    folder_id TEXT NOT NULL,
+    folder_name TEXT,
+    priority INTEGER NOT NULL,
+    method TEXT NOT NULL,
+    state TEXT NOT NULL,
+    rerun INTEGER NOT NULL DEFAULT 0,
+    enqueued_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    baseline_indexed TEXT,
+    job_id TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_index_jobs_state ON index_jobs (state, priority, enqueued_at);
+"""
+
+
+class IndexScheduler:
+    """
+    Persistent priority queue of indexing jobs with per-folder dedup.
+
+    A folder has at most one queued and one running job. Requesting a folder
+    that is already queued only raises its priority; requesting one that is
+    running marks it for a single follow-up run, so documents uploaded
+    mid-run are still indexed without piling up duplicate jobs.
+    """
+
+    def __init__(self, db_path: str = QUEUE_DB_PATH, max_concurrent: int = MAX_CONCURRENT,
+                 poll_interval: float = POLL_INTERVAL):
+        self.db_path = db_path
+        self.max_concurrent = max_concurrent
+        self.poll_interval = poll_interval
+        self._lock = threading.RLock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, timeout=30.0, check_same_thread=False, isolation_level=None)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def enqueue(self, folder_id: str, priority: str = 'normal', method: str = "fast",
+                folder_name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Request indexing for a folder.
+
+        Args:
+            folder_id: Folder to index
+            priority: 'high', 'normal' or 'low'
+            method: Indexing method sent to the backend
+            folder_name: Optional display name
+
+        Returns:
+            Dictionary with the job 'id' and 'outcome': 'queued', 'merged'
+            (already queued) or 'rerun' (already running, follow-up scheduled)
+        """
+        rank = PRIORITIES.get(priority, PRIORITIES['normal'])
+        with self._lock, self._transaction() as db:
+            queued = db.execute(
+                "SELECT id, priority FROM index_jobs WHERE folder_id = ? AND state = 'queued'",
+                (folder_id,)
+            ).fetchone()
+            if queued:
+                db.execute(
+                    "UPDATE index_jobs SET priority = MIN(priority, ?) WHERE id = ?",
+                    (rank, queued['id'])
+                )
+                return {'id': queued['id'], 'outcome': 'merged'}
+
+            running = db.execute(
+                f"SELECT id FROM index_jobs WHERE folder_id = ? AND state IN {ACTIVE_STATES}",
+                (folder_id,)
+            ).fetchone()
+            if running:
+                db.execute("UPDATE index_jobs SET rerun = 1 WHERE id = ?", (running['id'],))
+                return {'id': running['id'], 'outcome': 'rerun'}
+
+            cursor = db.execute(
+                "INSERT INTO index_jobs (folder_id, folder_name, priority, method, state, enqueued_at) "
+                "VALUES (?, ?, ?, ?, 'queued', ?)",
+                (folder_id, folder_name, rank, method, time.time())
+            )
+            job_id = cursor.lastrowid
+
+        self._wakeup.set()
+        return {'id': job_id, 'outcome': 'queued'}
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Write transaction that also excludes other processes sharing the database."""
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    @staticmethod
+    def priority_name(rank: int) -> str:
+        """Map a stored priority rank back to its name."""
+        return next((name for name, value in PRIORITIES.items() if value == rank), 'normal')
+
+    def cancel(self, folder_id: str) -> bool:
+        """Remove a folder's queued job. Running jobs can't be cancelled."""
+        with self._lock:
+            cursor = self._db().execute(
+                "DELETE FROM index_jobs WHERE folder_id = ? AND state = 'queued'",
+                (folder_id,)
+            )
+            return cursor.rowcount > 0
+
+    def jobs(self, finished_limit: int = 20) -> List[Dict[str, Any]]:
+        """Starting, running and queued jobs in dispatch order, then the most recent finished ones."""
+        with self._lock:
+            db = self._db()
+            active = db.execute(
+                "SELECT * FROM index_jobs WHERE state IN ('starting', 'running', 'queued') "
+                "ORDER BY state = 'queued', priority, enqueued_at"
+            ).fetchall()
+            finished = db.execute(
+                "SELECT * FROM index_jobs WHERE state IN ('done', 'failed') "
+                "ORDER BY finished_at DESC LIMIT ?",
+                (finished_limit,)
+            ).fetchall()
+        return [dict(row) for row in [*active, *finished]]
+
+    def clear_finished(self) -> int:
+        """Delete finished jobs from the history."""
+        with self._lock:
+            return self._db().execute("DELETE FROM index_jobs WHERE state IN ('done', 'failed')").rowcount
+
+    def start(self) -> None:
+        """Start the background dispatcher (idempotent)."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="index-scheduler", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"⚠️ Index scheduler error: {e}")
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def tick(self) -> None:
+        """One scheduling pass: finish completed jobs, then fill free slots."""
+        self._poll_running()
+        self._dispatch()
+
+    def _poll_running(self) -> None:
+        with self._lock:
+            db = self._db()
+            # Jobs whose worker died between claiming and recording the start
+            db.execute(
+                "UPDATE index_jobs SET state = 'queued', started_at = NULL "
+                "WHERE state = 'starting' AND started_at < ?",
+                (time.time() - START_TIMEOUT,)
+            )
+            running = db.execute("SELECT * FROM index_jobs WHERE state = 'running'").fetchall()
+
+        now = time.time()
+        for job in running:
+            status = backend_client.try_get_json(f"/folders/{job['folder_id']}/status")
+            elapsed = now - (job['started_at'] or now)
+            state = (status or {}).get('status')
+
+            if state == 'failed':
+                error = status.get('error_message') or status.get('error') or "Indexing failed"
+                self._finish(job, 'failed', error)
+            elif state == 'indexing':
+                if elapsed > RUN_TIMEOUT:
+                    self._finish(job, 'failed', f"Still indexing after {RUN_TIMEOUT:.0f}s")
+            elif status is not None and (status.get('last_indexed') != job['baseline_indexed'] or elapsed > START_GRACE):
+                self._finish(job, 'done', None)
+            elif status is None and elapsed > RUN_TIMEOUT:
+                self._finish(job, 'failed', "Folder status unavailable")
+
+    def _finish(self, job: sqlite3.Row, state: str, error: Optional[str]) -> None:
+        with self._lock, self._transaction() as db:
+            finished = db.execute(
+                f"UPDATE index_jobs SET state = ?, error = ?, finished_at = ? WHERE id = ? AND state IN {ACTIVE_STATES}",
+                (state, error, time.time(), job['id'])
+            ).rowcount
+            rerun = db.execute("SELECT rerun FROM index_jobs WHERE id = ?", (job['id'],)).fetchone()
+        if not finished:
+            return  # already finished by another worker
+        if state == 'done':
+            folder_events.folder_changed(job['folder_id'])
+        if rerun and rerun['rerun']:
+            self.enqueue(job['folder_id'], self.priority_name(job['priority']), job['method'], job['folder_name'])
+
+    def _dispatch(self) -> None:
+        while True:
+            with self._lock, self._transaction() as db:
+                active = db.execute(f"SELECT COUNT(*) FROM index_jobs WHERE state IN {ACTIVE_STATES}").fetchone()[0]
+                if active >= self.max_concurrent:
+                    return
+                job = db.execute(
+                    "SELECT * FROM index_jobs WHERE state = 'queued' "
+                    f"AND folder_id NOT IN (SELECT folder_id FROM index_jobs WHERE state IN {ACTIVE_STATES}) "
+                    "ORDER BY priority, enqueued_at LIMIT 1"
+                ).fetchone()
+                if job is None:
+                    return
+                db.execute(
+                    "UPDATE index_jobs SET state = 'starting', started_at = ? WHERE id = ?",
+                    (time.time(), job['id'])
+                )
+            self._start_job(job)
+
+    def _start_job(self, job: sqlite3.Row) -> None:
+        """Send a claimed ('starting') job's index request and mark it running once accepted."""
+        folder_id = job['folder_id']
+        status = backend_client.try_get_json(f"/folders/{folder_id}/status") or {}
+        try:
+            response = backend_client.client.post(
+                f"/folders/{folder_id}/index",
+                json={"method": job['method']},
+                timeout=30.0
+            )
+            if response.status_code in (200, 202):
+                with self._lock:
+                    self._db().execute(
+                        "UPDATE index_jobs SET state = 'running', started_at = ?, job_id = ?, baseline_indexed = ?, "
+                        "folder_name = COALESCE(folder_name, ?) WHERE id = ? AND state = 'starting'",
+                        (time.time(), response.json().get('job_id'), status.get('last_indexed'), status.get('name'),
+                         job['id'])
+                    )
+                return
+            error = f"HTTP {response.status_code}: {backend_client.error_detail(response)}"
+        except Exception as e:
+            error = f"{type(e).__name__}: {str(e)}"
+        self._finish(job, 'failed', error)
+
+
+scheduler = IndexScheduler()
@@ -0,0 +1,164 @@
+"""
+Typed, compact models for backend responses.
+
+Responses are validated once when they are decoded; afterwards handlers
+use attribute access on `__slots__` dataclasses, which need no per-row
+__dict__ and are noticeably smaller than the raw JSON dicts. List
+endpoints are parsed by backend_client's parse hook, so its response store
+keeps the model list instead of the raw JSON: when a list is revalidated
+with a 304, the same model list is returned without parsing again.
+
+Run `python -m apps.ui.models_benchmark` to compare against raw dicts.
+"""
+import functools
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, TypeVar
+
+from apps.ui import backend_client
+
+T = TypeVar("T")
+
+
+@dataclass(slots=True)
+class Folder:
+    folder_id: str
+    name: str
+    status: str = "not_indexed"
+    document_count: int = 0
+    last_indexed: Optional[str] = None
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "Folder":
+        return cls(
+            data['folder_id'],
+            data['name'],
+            data.get('status') or "not_indexed",
+            data.get('document_count') or 0,
+            data.get('last_indexed')
+        )
+
+
+@dataclass(slots=True)
+class Document:
+    doc_id: str
+    title: str
+    status: str = ""
+    size: int = 0
+    uploaded_at: Optional[str] = None
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "Document":
+        return cls(
+            data['doc_id'],
+            data['title'],
+            data.get('status') or "",
+            data.get('size') or 0,
+            data.get('uploaded_at')
+        )
+
+
+@dataclass(slots=True)
+class Agent:
+    agent_id: str
+    name: str
+    folder_access: Tuple[str, ...] = ()
+    llm_model: str = "?"
+    retrieval_method: str = "?"
+    top_k: Optional[int] = None
+    temperature: Optional[float] = None
+    role_instructions: str = ""
+    created_at: Optional[str] = None
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "Agent":
+        return cls(
+            data['agent_id'],
+            data['name'],
+            tuple(data.get('folder_access') or ()),
+            data.get('llm_model') or "?",
+            data.get('retrieval_method') or "?",
+            data.get('top_k'),
+            data.get('temperature'),
+            data.get('role_instructions') or "",
+            data.get('created_at')
+        )
+
+
+@dataclass(slots=True)
+class ChatMessage:
+    role: str
+    content: str
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "ChatMessage":
+        return cls(data.get('role') or "", data['content'])
+
+
+@dataclass(slots=True)
+class Citation:
+    folder_name: str = "Unknown"
+    title: str = "Unknown"
+    snippet: str = ""
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "Citation":
+        return cls(
+            data.get('folder_name') or "Unknown",
+            data.get('title') or "Unknown",
+            data.get('snippet') or ""
+        )
+
+
+def parse_list(model: Type[T], items: Any) -> List[T]:
+    """
+    Validate and convert a decoded JSON list.
+
+    Raises:
+        ValueError: if the payload isn't a list of objects or an object
+            lacks a required field
+    """
+    if not isinstance(items, list):
+        raise ValueError(f"Expected a list of {model.__name__} objects, got {type(items).__name__}")
+    from_json = model.from_json
+    try:
+        return [from_json(item) for item in items]
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"Invalid {model.__name__} in backend response: {e!r}") from None
+
+
+@functools.lru_cache(maxsize=None)
+def list_parser(model: Type[T]) -> Callable[[Any], List[T]]:
+    """parse_list for one model, as the same object every time (a stable response store key)."""
+    return functools.partial(parse_list, model)
+
+
+def get_models(path: str, model: Type[T]) -> Optional[List[T]]:
+    """
+    Fetch a list endpoint as typed models.
+
+    Returns:
+        Parsed models on success, None on a non-200 response
+    """
+    return backend_client.get_json(path, parse=list_parser(model))
+
+
+def try_get_models(path: str, model: Type[T]) -> Optional[List[T]]:
+    """Like get_models, but returns None on connection or validation errors as well."""
+    try:
+        return get_models(path, model)
+    except Exception:
+        return None
+
+
+def get_model(path: str, model: Type[T]) -> Optional[T]:
+    """Fetch a single-object endpoint as a typed model (None on a non-200 response)."""
+    raw = backend_client.get_json(path)
+    return None if raw is None else parse_list(model, [raw])[0]
+
+
+def try_get_model(path: str, model: Type[T]) -> Optional[T]:
+    """Like get_model, but returns None on connection or validation errors as well."""
+    try:
+        return get_model(path, model)
+    except Exception:
+        return None
@@ -0,0 +1,119 @@
+"""
+Benchmark typed response models against raw JSON dicts.
+
+Measures decode + row-building time and retained memory per row for a
+synthetic /folders/{id}/documents and /agents/list response.
+
+Usage:
+    python -m apps.ui.models_benchmark [--rows 20000] [--repeat 5]
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from typing import Any, Callable, List, Optional, Tuple
+
+from apps.ui import models
+
+
+def sample_documents(rows: int) -> bytes:
+    return json.dumps([{
+        'doc_id': f"{i:08x}-0000-4000-8000-000000000000",
+        'title': f"document_{i}.pdf",
+        'status': "parsed",
+        'size': 1024 * (i % 500 + 1),
+        'uploaded_at': "2025-11-12T05:00:00Z"
+    } for i in range(rows)]).encode()
+
+
+def sample_agents(rows: int) -> bytes:
+    return json.dumps([{
+        'agent_id': f"{i:08x}-0000-4000-8000-000000000000",
+        'name': f"Agent {i}",
+        'folder_access': [f"{j:08x}-folder" for j in range(3)],
+        'llm_model': "gpt-4o-mini",
+        'temperature': 0.7,
+        'retrieval_method': "global",
+        'top_k': 10,
+        'role_instructions': "You are a helpful assistant.",
+        'created_at': "2025-11-12T05:00:00Z"
+    } for i in range(rows)]).encode()
+
+
+def dict_document_rows(body: bytes) -> List[list]:
+    """Current approach: decode and index raw dicts."""
+    return [[
+        d['title'],
+        f"{d.get('size', 0) / 1024:.1f} KB" if d.get('size') else "N/A",
+        d['status'],
+        d['uploaded_at'][:19] if d.get('uploaded_at') else "N/A"
+    ] for d in json.loads(body)]
+
+
+def model_document_rows(body: bytes) -> List[list]:
+    """Typed approach: decode, validate once into models, then use attributes."""
+    return [[
+        d.title,
+        f"{d.size / 1024:.1f} KB" if d.size else "N/A",
+        d.status,
+        d.uploaded_at[:19] if d.uploaded_at else "N/A"
+    ] for d in models.parse_list(models.Document, json.loads(body))]
+
+
+def time_best(func: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def retained_bytes(build: Callable[[], Any]) -> Tuple[int, Any]:
+    """Bytes still allocated by `build`'s result once temporaries are freed."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark typed response models against raw dicts.")
+    parser.add_argument("--rows", type=int, default=20000, help="Rows per synthetic response")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repetitions (best is reported)")
+    args = parser.parse_args(argv)
+
+    docs_body = sample_documents(args.rows)
+    agents_body = sample_agents(args.rows)
+    print(f"{args.rows} rows per response, best of {args.repeat}\n")
+
+    dict_time = time_best(lambda: dict_document_rows(docs_body), args.repeat)
+    model_time = time_best(lambda: model_document_rows(docs_body), args.repeat)
+    raw = json.loads(docs_body)
+    parse_time = time_best(lambda: models.parse_list(models.Document, raw), args.repeat)
+    parsed = models.parse_list(models.Document, raw)
+    rows_time = time_best(lambda: [[d.title, d.status] for d in parsed], args.repeat)
+    dict_rows_time = time_best(lambda: [[d['title'], d['status']] for d in raw], args.repeat)
+
+    print("Documents: decode + build dataframe rows")
+    print(f"  raw dicts:        {dict_time * 1000:8.1f} ms")
+    print(f"  typed models:     {model_time * 1000:8.1f} ms  (of which validation {parse_time * 1000:.1f} ms)")
+    print(f"  re-render, dicts: {dict_rows_time * 1000:8.1f} ms  (no refetch)")
+    print(f"  re-render, typed: {rows_time * 1000:8.1f} ms  (no refetch; a 304 reuses the parsed list)\n")
+
+    for label, body, model in (("Documents", docs_body, models.Document), ("Agents", agents_body, models.Agent)):
+        dict_bytes, _ = retained_bytes(lambda: json.loads(body))
+        model_bytes, _ = retained_bytes(lambda: models.parse_list(model, json.loads(body)))
+        print(f"{label}: retained memory per row")
+        print(f"  raw dicts:    {dict_bytes / args.rows:8.0f} B")
+        print(f"  typed models: {model_bytes / args.rows:8.0f} B  ({model_bytes / dict_bytes:.0%} of dicts)\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
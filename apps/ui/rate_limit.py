@@ -0,0 +1,195 @@
+"""
+Token-bucket rate limiting of UI actions per browser session and client IP.
+
+Nothing stopped one user - or a script driving the Gradio API - from
+firing chat messages, uploads or admin mutations as fast as it could, and
+every one of them lands on the backend shared by everyone. Each kind of
+action now has its own budget:
+
+- chat: messages sent to agents (playground and comparison)
+- upload: upload batches
+- admin: folder, agent, indexing and sync mutations
+
+Every caller gets a bucket per Gradio session and one per client IP. The
+IP bucket is RATE_LIMIT_IP_FACTOR times larger, because a script can open
+any number of sessions while several people may share one address (an
+office NAT, or a proxy that doesn't forward the client's IP).
+
+Session hashes and X-Forwarded-For values are chosen by the client, so
+the IP bucket is what actually bounds a script. The IP is the connection's
+peer address unless the deployment declares trusted proxies: each trusted
+proxy (and the multi-worker router, see apps.ui.server) appends the address
+it saw to X-Forwarded-For, so the client IP is the entry that many places
+from the right - anything further left is client-supplied.
+
+Buckets live in process memory; in a multi-worker deployment a session
+always reaches the same worker, while an IP's budget applies per worker.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+# Actions per minute (refill rate) and burst size (bucket capacity) per session;
+# a rate of 0 turns the limit off
+CHAT_PER_MINUTE = float(os.getenv("RATE_LIMIT_CHAT_PER_MIN", "20"))
+CHAT_BURST = float(os.getenv("RATE_LIMIT_CHAT_BURST", "5"))
+UPLOAD_PER_MINUTE = float(os.getenv("RATE_LIMIT_UPLOAD_PER_MIN", "10"))
+UPLOAD_BURST = float(os.getenv("RATE_LIMIT_UPLOAD_BURST", "3"))
+ADMIN_PER_MINUTE = float(os.getenv("RATE_LIMIT_ADMIN_PER_MIN", "30"))
+ADMIN_BURST = float(os.getenv("RATE_LIMIT_ADMIN_BURST", "10"))
+
+# Per-IP budgets are this many times the per-session ones
+IP_FACTOR = float(os.getenv("RATE_LIMIT_IP_FACTOR", "5"))
+
+# Take the client IP from X-Forwarded-For, as appended by RATE_LIMIT_TRUSTED_PROXIES
+# reverse proxies in front of the UI (enable only when such proxies exist)
+TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() in ("1", "true", "yes")
+TRUSTED_PROXIES = int(os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "1"))
+
+# Set by apps.ui.server for its workers: the router appends one more hop
+BEHIND_ROUTER = os.getenv("FRONTEND_BEHIND_ROUTER", "").lower() in ("1", "true", "yes")
+
+# Buckets kept per limiter; idle ones are dropped first (LRU)
+MAX_BUCKETS = 10000
+
+
+class RateLimited(Exception):
+    """Raised when an action exceeds its budget."""
+
+    def __init__(self, kind: str, retry_after: float):
+        super().__init__(f"Too many {kind} requests - please wait {retry_after:.0f}s and try again")
+        self.kind = kind
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Bucket of `capacity` tokens refilled at `rate` tokens per second."""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated_at")
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = now
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, cost: float, now: float) -> float:
+        """Seconds until `cost` tokens are available (0 if they are now)."""
+        self._refill(now)
+        if self.tokens >= cost:
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+    def take(self, cost: float) -> None:
+        self.tokens -= cost
+
+
+class RateLimiter:
+    """Per-session and per-IP token buckets for one kind of action."""
+
+    def __init__(self, kind: str, per_minute: float, burst: float,
+                 ip_factor: float = IP_FACTOR, max_buckets: int = MAX_BUCKETS):
+        self.kind = kind
+        self.enabled = per_minute > 0
+        self.rate = per_minute / 60.0
+        self.burst = max(1.0, burst)
+        self.ip_factor = ip_factor
+        self.max_buckets = max_buckets
+        self._buckets: "OrderedDict[Tuple[str, str], TokenBucket]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._allowed = 0
+        self._limited = 0
+        self._limited_by: Dict[str, int] = {"session": 0, "ip": 0}
+
+    def _bucket(self, scope: str, key: str, now: float) -> TokenBucket:
+        bucket = self._buckets.get((scope, key))
+        if bucket is None:
+            factor = self.ip_factor if scope == "ip" else 1.0
+            bucket = self._buckets[(scope, key)] = TokenBucket(self.rate * factor, self.burst * factor, now)
+            while len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end((scope, key))
+        return bucket
+
+    def check(self, session: Optional[str], ip: Optional[str], cost: float = 1.0) -> None:
+        """
+        Charge one action, worth `cost` tokens, to the caller's buckets.
+
+        Tokens are only taken when every bucket can pay, so a rejected
+        action doesn't use up budget. A cost above the burst size is
+        charged as a full bucket.
+
+        Raises:
+            RateLimited: if the session's or the IP's bucket is empty
+        """
+        if not self.enabled:
+            return
+        cost = min(cost, self.burst)
+        keys = [(scope, key) for scope, key in (("session", session), ("ip", ip)) if key]
+        now = time.monotonic()
+        with self._lock:
+            buckets = [(scope, self._bucket(scope, key, now)) for scope, key in keys]
+            waits = [(bucket.wait_time(cost, now), scope) for scope, bucket in buckets]
+            wait, scope = max(waits, default=(0.0, None))
+            if wait > 0:
+                self._limited += 1
+                self._limited_by[scope] += 1
+                raise RateLimited(self.kind, max(1.0, wait))
+            for _, bucket in buckets:
+                bucket.take(cost)
+            self._allowed += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "allowed": self._allowed,
+                "limited": self._limited,
+                "limited_by_session": self._limited_by["session"],
+                "limited_by_ip": self._limited_by["ip"],
+                "buckets": len(self._buckets)
+            }
+
+
+limiters = {
+    "chat": RateLimiter("chat", CHAT_PER_MINUTE, CHAT_BURST),
+    "upload": RateLimiter("upload", UPLOAD_PER_MINUTE, UPLOAD_BURST),
+    "admin": RateLimiter("admin", ADMIN_PER_MINUTE, ADMIN_BURST)
+}
+
+
+def trusted_hops() -> int:
+    """X-Forwarded-For entries, counted from the right, added by proxies we trust."""
+    return (max(0, TRUSTED_PROXIES) if TRUST_FORWARDED else 0) + (1 if BEHIND_ROUTER else 0)
+
+
+def client_ip(request, hops: Optional[int] = None) -> Optional[str]:
+    """
+    Client address of a gr.Request.
+
+    With `hops` trusted proxies in front, the client is the `hops`-th
+    X-Forwarded-For entry from the right; entries left of it were supplied
+    by the client and are ignored.
+    """
+    if request is None:
+        return None
+    hops = trusted_hops() if hops is None else hops
+    client = getattr(request, "client", None)
+    if hops <= 0:
+        return getattr(client, "host", None)
+    headers = getattr(request, "headers", None) or {}
+    values = headers.getlist("x-forwarded-for") if hasattr(headers, "getlist") else [headers.get("x-forwarded-for") or ""]
+    addresses = [address.strip() for value in values for address in value.split(",") if address.strip()]
+    if not addresses:
+        return getattr(client, "host", None)
+    return addresses[-hops] if len(addresses) >= hops else addresses[0]
+
+
+def stats() -> Dict[str, dict]:
+    return {kind: limiter.stats() for kind, limiter in limiters.items()}
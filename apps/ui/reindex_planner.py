@@ -0,0 +1,140 @@
+"""
+Incremental reindex planning.
+
+Compares each folder's documents against the folder's last index time and
+only dispatches indexing for folders with new or changed content.
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from apps.ui import backend_client
+from apps.ui.index_scheduler import scheduler
+
+# Folder statuses that always need (re)indexing when the folder has documents
+STALE_FOLDER_STATUSES = {'not_indexed', 'failed', 'parsed'}
+
+# Document statuses that indexing cannot fix
+UNINDEXABLE_DOC_STATUSES = {'failed', 'error'}
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Parse an ISO-8601 timestamp from the API, treating naive values as UTC."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def plan_folder(folder: Dict[str, Any], docs: Optional[List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    Decide whether a folder needs indexing.
+
+    Args:
+        folder: Folder entry from /folders/list
+        docs: Documents from /folders/{id}/documents, or None if unavailable
+
+    Returns:
+        Plan entry with folder_id, name, action ('index' or 'skip'), reason,
+        changed_docs, changed_bytes and total_docs
+    """
+    entry = {
+        'folder_id': folder['folder_id'],
+        'name': folder['name'],
+        'action': 'skip',
+        'reason': "",
+        'changed_docs': 0,
+        'changed_bytes': 0,
+        'total_docs': 0
+    }
+
+    if docs is None:
+        entry['reason'] = "Could not load documents"
+        return entry
+
+    indexable = [d for d in docs if d.get('status') not in UNINDEXABLE_DOC_STATUSES]
+    entry['total_docs'] = len(indexable)
+
+    if folder.get('status') == 'indexing':
+        entry['reason'] = "Indexing already in progress"
+        return entry
+
+    if not indexable:
+        entry['reason'] = "No indexable documents"
+        return entry
+
+    last_indexed = parse_timestamp(folder.get('last_indexed'))
+    if last_indexed is None:
+        changed = indexable
+        entry['reason'] = "Never indexed"
+    else:
+        changed = [
+            d for d in indexable
+            if (parse_timestamp(d.get('uploaded_at')) or last_indexed) > last_indexed
+        ]
+        if changed:
+            entry['reason'] = f"{len(changed)} new or changed document(s)"
+        elif folder.get('status') in STALE_FOLDER_STATUSES:
+            # e.g. deletions or a failed run: timestamps alone don't show it
+            changed = indexable
+            entry['reason'] = f"Folder status is '{folder.get('status')}'"
+
+    if not changed:
+        entry['reason'] = "Up to date"
+        return entry
+
+    entry['action'] = 'index'
+    entry['changed_docs'] = len(changed)
+    entry['changed_bytes'] = sum(d.get('size') or 0 for d in changed)
+    return entry
+
+
+def build_plan() -> List[Dict[str, Any]]:
+    """
+    Build a reindex plan for every folder.
+
+    Document lists for all folders are fetched concurrently.
+
+    Returns:
+        Plan entries, folders that need indexing first
+    """
+    folders = backend_client.get_json("/folders/list")
+    if folders is None:
+        raise RuntimeError("Failed to load folder list")
+
+    doc_lists = backend_client.run_parallel(*[
+        (lambda fid=f['folder_id']: backend_client.try_get_json(f"/folders/{fid}/documents"))
+        for f in folders
+    ])
+
+    plan = [plan_folder(folder, docs) for folder, docs in zip(folders, doc_lists)]
+    plan.sort(key=lambda entry: (entry['action'] != 'index', entry['name'].lower()))
+    return plan
+
+
+def execute_plan(plan: List[Dict[str, Any]], method: str = "fast") -> List[Dict[str, Any]]:
+    """
+    Queue indexing for the folders the plan marks as changed.
+
+    Jobs go through the index scheduler, so they respect its concurrency
+    cap and collapse with requests already queued for the same folder.
+
+    Args:
+        plan: Entries from build_plan
+        method: Indexing method sent to /folders/{id}/index
+
+    Returns:
+        One result per folder with folder_id, name and the scheduler outcome
+        ('queued', 'merged' or 'rerun')
+    """
+    results = []
+    for entry in plan:
+        if entry['action'] != 'index':
+            continue
+        job = scheduler.enqueue(entry['folder_id'], method=method, folder_name=entry['name'])
+        results.append({'folder_id': entry['folder_id'], 'name': entry['name'], 'outcome': job['outcome']})
+    return results
@@ -0,0 +1,113 @@
+"""
+Per-session fingerprints of the last data rendered into list components.
+
+Refresh handlers rebuild whole Dataframes and choice lists even when nothing
+changed, and Gradio ships every one of them over the websocket and
+re-renders it in the browser. Handlers record a fingerprint of the data they
+send for each component; when a refresh produces the same data as the last
+render in that session, they return `gr.update()` instead and nothing is
+sent.
+
+A page reload gets a new Gradio session hash, so a freshly built page is
+never mistaken for one that already shows the data. With a shared state
+database configured, fingerprints live there, so whichever worker handles
+the next refresh knows what the browser is showing.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from apps.ui.shared_state import SharedStore, shared_store
+
+# Maximum number of browser sessions whose fingerprints are kept (LRU)
+MAX_SESSIONS = int(os.getenv("RENDER_CACHE_MAX_SESSIONS", "1000"))
+
+
+def fingerprint(data: Any) -> bytes:
+    """Stable digest of plain render data (lists, tuples, strings, numbers)."""
+    return hashlib.blake2b(repr(data).encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+class RenderCache:
+    """
+    LRU map of session hash -> {component key: fingerprint of the last render},
+    kept in memory or, when `store` is given, in the shared state database.
+    """
+
+    NAMESPACE = "renders"
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS, store: Optional[SharedStore] = None):
+        self.max_sessions = max_sessions
+        self.store = store
+        self._sessions: "OrderedDict[str, Dict[str, bytes]]" = OrderedDict()
+        self._skipped = 0
+        self._sent = 0
+        self._lock = threading.Lock()
+
+    def changed(self, session: Optional[str], key: str, data: Any) -> bool:
+        """
+        Record `data` as the latest render of a component in a session.
+
+        Returns:
+            False if the session's last render of `key` had the same data
+            (the update can be skipped), True otherwise. Calls without a
+            session always count as changed.
+        """
+        if not session:
+            return True
+        digest = fingerprint(data)
+        if self.store is not None:
+            return self._changed_shared(session, key, digest.hex())
+        with self._lock:
+            renders = self._sessions.get(session)
+            if renders is None:
+                renders = self._sessions[session] = {}
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            else:
+                self._sessions.move_to_end(session)
+
+            if renders.get(key) == digest:
+                self._skipped += 1
+                return False
+            renders[key] = digest
+            self._sent += 1
+            return True
+
+    def _changed_shared(self, session: str, key: str, digest: str) -> bool:
+        entry = f"{session}:{key}"
+        unchanged = self.store.get(self.NAMESPACE, entry) == digest
+        with self._lock:
+            if unchanged:
+                self._skipped += 1
+            else:
+                self._sent += 1
+        if not unchanged:
+            self.store.put(self.NAMESPACE, entry, digest)
+            # Components per session are few, so an entry cap approximates the session cap
+            if self._sent % 100 == 0:
+                self.store.evict(self.NAMESPACE, max_entries=self.max_sessions * 16)
+        return not unchanged
+
+    def forget(self, session: Optional[str], key: Optional[str] = None) -> None:
+        """Drop a session's fingerprints (or one component's), forcing the next render."""
+        if self.store is not None:
+            if key is None:
+                self.store.delete(self.NAMESPACE, prefix=f"{session}:")
+            else:
+                self.store.delete(self.NAMESPACE, f"{session}:{key}")
+            return
+        with self._lock:
+            if key is None:
+                self._sessions.pop(session, None)
+            elif session in self._sessions:
+                self._sessions[session].pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"sessions": len(self._sessions), "sent": self._sent, "skipped": self._skipped}
+
+
+render_cache = RenderCache(store=shared_store)
@@ -0,0 +1,316 @@
+"""
+Multi-worker deployment of the Gradio UI.
+
+Each worker is a separate process serving the UI mounted on a FastAPI app
+(uvicorn on a private Unix socket), so request handling spreads across
+cores. This parent process accepts client connections and forwards every
+request to a worker:
+
+- Gradio keeps a session's queued events in the process that accepted
+  them (POST /queue/join, then the GET /queue/data event stream), so
+  requests that carry a session hash go to the worker chosen by that hash.
+  Upload progress follows its upload ID and cancel/poll requests follow
+  the event they name.
+- Everything else (page, assets, config, uploads, files) goes round-robin.
+
+Session state and caches live in the shared SQLite store (SHARED_STATE_DB)
+and uploads in the shared Gradio temp directory, so no worker holds
+anything a session depends on beyond its in-flight events. The load
+balancer in front needs no sticky sessions, and a crashed worker is
+restarted with its sessions intact.
+
+Usage:
+    python -m apps.ui.server [--workers N] [--host HOST] [--port PORT]
+"""
+import argparse
+import ctypes
+import itertools
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import httpx
+from starlette.background import BackgroundTask
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+
+# Worker processes; defaults to one per CPU
+FRONTEND_WORKERS = int(os.getenv("FRONTEND_WORKERS", "0")) or os.cpu_count() or 1
+
+DEFAULT_STATE_DB = os.path.join("data", "frontend_state.db")
+
+# Headers that describe a single connection and must not be forwarded
+HOP_BY_HOP = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailer", "trailers", "transfer-encoding", "upgrade"
+}
+
+# POST endpoints whose JSON body names the session or event
+JSON_ROUTES = ("/queue/join", "/reset", "/run/", "/api/", "/call/", "/component_server")
+
+# Event IDs remembered for routing cancel and result requests
+MAX_TRACKED_EVENTS = 10000
+
+
+def create_worker_app():
+    """uvicorn factory for one worker: the UI mounted on a FastAPI app."""
+    import gradio as gr
+    from fastapi import FastAPI
+
+    from apps.ui.app import create_ui
+
+    return gr.mount_gradio_app(FastAPI(), create_ui(), path="/")
+
+
+def _die_with_parent() -> None:
+    """Ask Linux to SIGTERM a worker when the parent process dies, however it dies."""
+    try:
+        ctypes.CDLL(None, use_errno=True).prctl(1, signal.SIGTERM)  # PR_SET_PDEATHSIG
+    except (OSError, AttributeError):
+        pass
+
+
+class Worker:
+    """One uvicorn worker process listening on a Unix socket."""
+
+    def __init__(self, index: int, socket_path: str, env: Dict[str, str]):
+        self.index = index
+        self.socket_path = socket_path
+        self.env = env
+        self.process: Optional[subprocess.Popen] = None
+        self.restarts = 0
+        self.client = httpx.AsyncClient(
+            transport=httpx.AsyncHTTPTransport(uds=socket_path),
+            base_url="http://worker",
+            timeout=httpx.Timeout(None, connect=5.0)
+        )
+
+    def spawn(self) -> None:
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "--factory", "apps.ui.server:create_worker_app",
+             "--uds", self.socket_path, "--log-level", "warning"],
+            env=self.env,
+            preexec_fn=_die_with_parent if sys.platform.startswith("linux") else None
+        )
+
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def stop(self) -> None:
+        if self.alive():
+            self.process.terminate()
+
+    def wait(self, timeout: float) -> None:
+        if self.process is None:
+            return
+        try:
+            self.process.wait(max(0.0, timeout))
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+class SessionRouter:
+    """ASGI app that forwards requests to workers by session hash."""
+
+    def __init__(self, workers: List[Worker]):
+        self.workers = workers
+        self._round_robin = itertools.count()
+        self._events: "OrderedDict[str, int]" = OrderedDict()
+
+    def _by_key(self, key: str) -> Worker:
+        return self.workers[zlib.crc32(key.encode()) % len(self.workers)]
+
+    def _pick(self, request: Request, body: Optional[dict]) -> Worker:
+        path = request.url.path
+        event_id = (body or {}).get("event_id")
+        if path.startswith("/call/") and request.method == "GET":
+            event_id = path.rstrip("/").rsplit("/", 1)[-1]
+        if event_id in self._events:
+            return self.workers[self._events[event_id]]
+
+        session = (body or {}).get("session_hash") or request.query_params.get("session_hash")
+        if not session and path.startswith("/stream/"):
+            session = path.split("/")[2]
+        if session:
+            return self._by_key(session)
+
+        upload_id = request.query_params.get("upload_id")
+        if upload_id:
+            return self._by_key(upload_id)
+        return self.workers[next(self._round_robin) % len(self.workers)]
+
+    def _track_event(self, content: bytes, worker: Worker) -> None:
+        try:
+            event_id = json.loads(content).get("event_id")
+        except (ValueError, AttributeError):
+            return
+        if event_id:
+            self._events[event_id] = worker.index
+            while len(self._events) > MAX_TRACKED_EVENTS:
+                self._events.popitem(last=False)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    for worker in self.workers:
+                        await worker.client.aclose()
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return  # Gradio 4 talks HTTP + server-sent events only
+
+        response = await self.forward(Request(scope, receive))
+        await response(scope, receive, send)
+
+    async def forward(self, request: Request) -> Response:
+        path = request.url.path
+        if path == "/_frontend/workers":
+            return JSONResponse(self.status())
+
+        body = content = None
+        if request.method == "POST" and path.startswith(JSON_ROUTES):
+            content = await request.body()
+            try:
+                body = json.loads(content)
+            except ValueError:
+                body = None
+            if not isinstance(body, dict):
+                body = None
+
+        worker = self._pick(request, body)
+        headers = [(k, v) for k, v in request.headers.items() if k not in HOP_BY_HOP and k != "x-forwarded-for"]
+        # One X-Forwarded-For with this hop appended, so workers can tell the
+        # address the router saw from whatever the client put in front of it
+        forwarded = [v.strip() for v in request.headers.getlist("x-forwarded-for") if v.strip()]
+        if request.client:
+            forwarded.append(request.client.host)
+        if forwarded:
+            headers.append(("x-forwarded-for", ", ".join(forwarded)))
+        target = (request.scope.get("raw_path") or path.encode()).decode("latin-1")
+        if request.url.query:
+            target += "?" + request.url.query
+        upstream = worker.client.build_request(
+            request.method,
+            target,
+            headers=headers,
+            content=content if content is not None or request.method in ("GET", "HEAD") else request.stream()
+        )
+        try:
+            response = await worker.client.send(upstream, stream=True)
+        except httpx.TransportError as e:
+            return JSONResponse({"detail": f"Frontend worker {worker.index} unavailable: {e}"}, status_code=502)
+
+        response_headers = {k: v for k, v in response.headers.items() if k not in HOP_BY_HOP}
+        response_headers["x-frontend-worker"] = str(worker.index)
+        if response.status_code == 200 and request.method == "POST" and path.startswith(("/queue/join", "/call/")):
+            data = await response.aread()
+            await response.aclose()
+            self._track_event(data, worker)
+            return Response(data, status_code=response.status_code, headers=response_headers)
+
+        return StreamingResponse(
+            response.aiter_raw(),
+            status_code=response.status_code,
+            headers=response_headers,
+            background=BackgroundTask(response.aclose)
+        )
+
+    def status(self) -> List[dict]:
+        return [{
+            'worker': worker.index,
+            'pid': worker.process.pid if worker.process else None,
+            'alive': worker.alive(),
+            'restarts': worker.restarts
+        } for worker in self.workers]
+
+
+def supervise(workers: List[Worker], stop: threading.Event, interval: float = 1.0) -> None:
+    """Restart workers that exit until `stop` is set."""
+    while not stop.wait(interval):
+        for worker in workers:
+            if not worker.alive():
+                code = worker.process.returncode if worker.process else None
+                print(f"⚠️ Frontend worker {worker.index} exited (code {code}) - restarting")
+                worker.restarts += 1
+                worker.spawn()
+
+
+def wait_ready(workers: List[Worker], timeout: float = 120.0) -> None:
+    """Block until every worker answers on its socket."""
+    deadline = time.monotonic() + timeout
+    for worker in workers:
+        with httpx.Client(transport=httpx.HTTPTransport(uds=worker.socket_path), base_url="http://worker") as client:
+            while True:
+                if not worker.alive():
+                    raise RuntimeError(f"Frontend worker {worker.index} failed to start")
+                try:
+                    if client.get("/config", timeout=5.0).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Frontend worker {worker.index} not ready after {timeout:.0f}s")
+                time.sleep(0.5)
+
+
+def main(argv: Optional[list] = None) -> int:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the UI from several worker processes.")
+    parser.add_argument("--workers", type=int, default=FRONTEND_WORKERS, help="Worker processes")
+    parser.add_argument("--host", default=os.getenv("GRADIO_SERVER_NAME", "0.0.0.0"))
+    parser.add_argument("--port", type=int,
+                        default=int(os.getenv("GRADIO_SERVER_PORT", os.getenv("PORT", "7860"))))
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ)
+    env.setdefault("SHARED_STATE_DB", os.path.abspath(DEFAULT_STATE_DB))
+    # Workers see the router as their peer; it appends the real one to X-Forwarded-For
+    env["FRONTEND_BEHIND_ROUTER"] = "1"
+    socket_dir = tempfile.mkdtemp(prefix="frontend-workers-")
+    workers = [Worker(i, os.path.join(socket_dir, f"worker-{i}.sock"), env) for i in range(max(1, args.workers))]
+
+    def terminate(signum, frame):
+        raise SystemExit(0)
+
+    # uvicorn restores this handler and re-raises SIGTERM once it has shut down
+    signal.signal(signal.SIGTERM, terminate)
+    stop = threading.Event()
+    try:
+        for worker in workers:
+            worker.spawn()
+        wait_ready(workers)
+        threading.Thread(target=supervise, args=(workers, stop), name="supervisor", daemon=True).start()
+        print(f"🚀 Serving {len(workers)} frontend workers on http://{args.host}:{args.port} "
+              f"(shared state: {env['SHARED_STATE_DB']})")
+        uvicorn.run(SessionRouter(workers), host=args.host, port=args.port, log_level="warning")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        for worker in workers:
+            worker.stop()
+        deadline = time.monotonic() + 10.0
+        for worker in workers:
+            worker.wait(deadline - time.monotonic())
+        shutil.rmtree(socket_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,207 @@
+"""
+End-to-end check of the multi-worker deployment without sticky sessions.
+
+Starts `apps.ui.server` with several workers against the configured
+backend and drives Gradio's queue protocol the way a browser does, but over
+a fresh connection for every request, as a non-sticky load balancer would
+deliver them. It verifies that:
+
+- sessions are spread across workers,
+- per-session state (render fingerprints, chat transcripts) carries over
+  between requests, and
+- a session survives its worker being killed and restarted.
+
+Usage:
+    python -m apps.ui.server_check [--workers 3] [--sessions 8] [--agent-id ID]
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from apps.ui import backend_client
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class GradioSession:
+    """One simulated browser tab talking to the UI through a non-sticky path."""
+
+    def __init__(self, base_url: str, config: Dict[str, Any]):
+        self.base_url = base_url
+        self.session_hash = uuid.uuid4().hex[:11]
+        self.fn_index = {dep.get('api_name'): i for i, dep in enumerate(config['dependencies'])}
+
+    def _client(self) -> httpx.Client:
+        # No connection reuse: every request may land anywhere
+        return httpx.Client(base_url=self.base_url, timeout=60.0,
+                            limits=httpx.Limits(max_keepalive_connections=0))
+
+    def run(self, api_name: str, data: List[Any]) -> Tuple[Any, str]:
+        """
+        Run one event through /queue/join and /queue/data.
+
+        Returns:
+            (output data, index of the worker that accepted the event)
+        """
+        with self._client() as client:
+            joined = client.post("/queue/join", json={
+                'data': data,
+                'fn_index': self.fn_index[api_name],
+                'session_hash': self.session_hash,
+                'event_data': None,
+                'trigger_id': None
+            })
+            joined.raise_for_status()
+            event_id = joined.json()['event_id']
+            worker = joined.headers.get('x-frontend-worker', '?')
+
+        with self._client() as client:
+            with client.stream("GET", "/queue/data", params={'session_hash': self.session_hash}) as stream:
+                for line in stream.iter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    message = json.loads(line[5:])
+                    if message.get('event_id') != event_id or message.get('msg') != 'process_completed':
+                        continue
+                    if not message.get('success'):
+                        raise RuntimeError(f"{api_name} failed: {message.get('output')}")
+                    return message['output']['data'], worker
+        raise RuntimeError(f"{api_name}: event stream ended without a result")
+
+
+def is_skipped(output: Any) -> bool:
+    return isinstance(output, dict) and output.get('__type__') == 'update' and len(output) == 1
+
+
+def chat_turns(output: Any) -> int:
+    if isinstance(output, dict):
+        output = output.get('value')
+    return len(output or [])
+
+
+def workers_status(base_url: str) -> List[Dict[str, Any]]:
+    return httpx.get(f"{base_url}/_frontend/workers", timeout=10.0).json()
+
+
+def wait_for(condition, timeout: float, message: str) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise TimeoutError(message)
+        time.sleep(0.5)
+
+
+def session_ready(session: GradioSession) -> bool:
+    try:
+        session.run("get_folder_choices", [])
+        return True
+    except (httpx.HTTPError, RuntimeError):
+        return False
+
+
+def first_agent_id() -> Optional[str]:
+    agents = backend_client.try_get_json("/agents/list")
+    return agents[0]['agent_id'] if agents else None
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check the multi-worker UI without sticky sessions.")
+    parser.add_argument("--workers", type=int, default=3, help="Worker processes to start")
+    parser.add_argument("--sessions", type=int, default=8, help="Simulated browser sessions")
+    parser.add_argument("--agent-id", help="Agent used for the chat check (default: first agent)")
+    args = parser.parse_args(argv)
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    state_dir = tempfile.mkdtemp(prefix="frontend-check-")
+    env = dict(os.environ, SHARED_STATE_DB=os.path.join(state_dir, "state.db"))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "apps.ui.server", "--workers", str(args.workers),
+         "--host", "127.0.0.1", "--port", str(port)],
+        env=env
+    )
+    failures = []
+
+    def check(ok: bool, label: str) -> None:
+        print(f"{'✅' if ok else '❌'} {label}")
+        if not ok:
+            failures.append(label)
+
+    try:
+        def server_up() -> bool:
+            try:
+                return httpx.get(f"{base_url}/config", timeout=2.0).status_code == 200
+            except httpx.TransportError:
+                return False
+
+        wait_for(server_up, 180.0, "Server did not start")
+        config = httpx.get(f"{base_url}/config", timeout=10.0).json()
+        print(f"🚀 {args.workers} workers up on {base_url}\n")
+
+        # Render state carries over between independent requests
+        sessions = [GradioSession(base_url, config) for _ in range(args.sessions)]
+        used_workers = set()
+        skipped = 0
+        for session in sessions:
+            first, worker = session.run("list_folders", [])
+            second, _ = session.run("list_folders", [])
+            used_workers.add(worker)
+            skipped += int(not is_skipped(first[0]) and is_skipped(second[0]))
+        check(len(used_workers) > 1 or args.workers == 1,
+              f"Sessions spread over {len(used_workers)} of {args.workers} workers")
+        check(skipped == len(sessions), f"Unchanged refresh skipped in {skipped}/{len(sessions)} sessions")
+
+        agent_id = args.agent_id or first_agent_id()
+        if not agent_id:
+            print("⚠️ No agents on the backend - skipping the chat checks")
+            return 1 if failures else 0
+
+        # Chat transcript survives the serving worker being killed
+        session = sessions[0]
+        output, worker = session.run("send_chat_message", [agent_id, "First question", "", ""])
+        backend_session = output[2] or ""
+        check(chat_turns(output[0]) == 1, "First chat turn rendered")
+
+        victim = next(w for w in workers_status(base_url) if str(w['worker']) == worker)
+        os.kill(victim['pid'], signal.SIGKILL)
+        print(f"💥 Killed worker {worker} (pid {victim['pid']})")
+
+        def restarted() -> bool:
+            status = next(w for w in workers_status(base_url) if str(w['worker']) == worker)
+            return status['alive'] and status['pid'] != victim['pid']
+
+        wait_for(restarted, 30.0, f"Worker {worker} was not restarted")
+        wait_for(server_up, 120.0, "Server unavailable after restart")
+        wait_for(lambda: session_ready(session), 120.0, f"Worker {worker} not serving after restart")
+
+        output, _ = session.run("send_chat_message", [agent_id, "Second question", backend_session, ""])
+        check(chat_turns(output[0]) == 2, f"Transcript continued on the restarted worker ({chat_turns(output[0])} turns)")
+        refresh, _ = session.run("list_folders", [])
+        check(is_skipped(refresh[0]), "Render fingerprints survived the restart")
+    finally:
+        server.terminate()
+        try:
+            server.wait(30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+    print(f"\n{'✅ All checks passed' if not failures else f'❌ {len(failures)} check(s) failed'}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,121 @@
+"""
+Bounded server-side store for per-session chat transcripts.
+
+The browser only receives the rendered window of a conversation; the full
+buffer lives here, keyed by Gradio session hash, so request payloads stay
+constant as conversations grow. With a shared state database configured
+(multi-worker deployments) the buffers live there instead, so any worker
+can continue a conversation.
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from apps.ui.history_window import HistoryWindow
+from apps.ui.shared_state import SharedStore, shared_store
+
+# Maximum number of browser sessions kept in memory
+MAX_SESSIONS = int(os.getenv("CHAT_STORE_MAX_SESSIONS", "500"))
+
+# Total transcript text kept across all sessions, in characters
+MAX_CHARS = int(os.getenv("CHAT_STORE_MAX_CHARS", str(64 * 1024 * 1024)))
+
+
+class SessionStore:
+    """
+    LRU map of session key -> HistoryWindow with a global size cap.
+
+    Windows are mutated in place by handlers; call `put` again afterwards so
+    the store can re-account their size and evict least-recently-used
+    sessions when over budget.
+    """
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS, max_chars: int = MAX_CHARS):
+        self.max_sessions = max_sessions
+        self.max_chars = max_chars
+        self._windows: "OrderedDict[str, HistoryWindow]" = OrderedDict()
+        self._sizes = {}
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Optional[str]) -> Optional[HistoryWindow]:
+        """Return the session's window and mark it most recently used."""
+        if not key:
+            return None
+        with self._lock:
+            window = self._windows.get(key)
+            if window is not None:
+                self._windows.move_to_end(key)
+            return window
+
+    def put(self, key: Optional[str], window: HistoryWindow) -> None:
+        """Store (or re-account) a session's window and enforce the caps."""
+        if not key:
+            return
+        with self._lock:
+            # A single session may use at most half the budget
+            window.trim(self.max_chars // 2)
+            self._total -= self._sizes.get(key, 0)
+            self._windows[key] = window
+            self._windows.move_to_end(key)
+            self._sizes[key] = window.size
+            self._total += window.size
+            self._evict()
+
+    def discard(self, key: Optional[str]) -> None:
+        """Forget a session's transcript."""
+        with self._lock:
+            if key in self._windows:
+                del self._windows[key]
+                self._total -= self._sizes.pop(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"sessions": len(self._windows), "chars": self._total}
+
+    def _evict(self) -> None:
+        while self._windows and (len(self._windows) > self.max_sessions or self._total > self.max_chars):
+            key, _ = self._windows.popitem(last=False)
+            self._total -= self._sizes.pop(key)
+
+
+class SharedSessionStore:
+    """SessionStore backed by the cross-process shared state database."""
+
+    NAMESPACE = "transcripts"
+
+    def __init__(self, store: SharedStore, max_sessions: int = MAX_SESSIONS, max_chars: int = MAX_CHARS):
+        self.store = store
+        self.max_sessions = max_sessions
+        self.max_chars = max_chars
+
+    def get(self, key: Optional[str]) -> Optional[HistoryWindow]:
+        if not key:
+            return None
+        data = self.store.get(self.NAMESPACE, key)
+        if data is None:
+            return None
+        return HistoryWindow([tuple(turn) for turn in data["turns"]], data["visible"], data["cursor"])
+
+    def put(self, key: Optional[str], window: HistoryWindow) -> None:
+        if not key:
+            return
+        window.trim(self.max_chars // 2)
+        self.store.put(
+            self.NAMESPACE, key,
+            {"turns": window.turns, "visible": window.visible, "cursor": window.cursor},
+            size=window.size
+        )
+        self.store.evict(self.NAMESPACE, self.max_sessions, self.max_chars)
+
+    def discard(self, key: Optional[str]) -> None:
+        if key:
+            self.store.delete(self.NAMESPACE, key)
+
+    def stats(self) -> dict:
+        usage = self.store.usage(self.NAMESPACE)
+        return {"sessions": usage["entries"], "chars": usage["size"]}
+
+
+transcripts = SharedSessionStore(shared_store) if shared_store else SessionStore()
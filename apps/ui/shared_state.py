@@ -0,0 +1,155 @@
+"""
+Cross-process store for per-session state and small caches.
+
+A single UI process keeps sessions, render fingerprints and prefetched
+results in memory. When several worker processes serve the UI (see
+apps.ui.server), any of them may handle a given request, so that state has
+to live outside the process: this module keeps it in a local SQLite
+database in WAL mode, which every worker on the host opens directly - no
+external service is involved.
+
+Values are stored as JSON, so tuples come back as lists.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+# Database shared by all frontend workers; unset keeps state in process memory
+SHARED_STATE_DB = os.getenv("SHARED_STATE_DB", "")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS state (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL DEFAULT 0,
+    expires_at REAL,
+    touched_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_state_touched ON state (namespace, touched_at);
+"""
+
+
+class SharedStore:
+    """
+    Namespaced key/value store in a SQLite database shared between processes.
+
+    Each thread gets its own connection. Entries may carry a TTL and a size
+    (in whatever unit the namespace accounts in) so callers can enforce
+    count and size caps with `evict`.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        db = self._db()
+        db.execute("PRAGMA journal_mode=WAL")
+        db.executescript(_SCHEMA)
+
+    def _db(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        """Return a value and mark it recently used, or `default` if missing or expired."""
+        now = time.time()
+        db = self._db()
+        row = db.execute(
+            "SELECT value, expires_at FROM state WHERE namespace = ? AND key = ?",
+            (namespace, key)
+        ).fetchone()
+        if row is None:
+            return default
+        if row[1] is not None and row[1] < now:
+            db.execute("DELETE FROM state WHERE namespace = ? AND key = ?", (namespace, key))
+            return default
+        db.execute(
+            "UPDATE state SET touched_at = ? WHERE namespace = ? AND key = ?",
+            (now, namespace, key)
+        )
+        return json.loads(row[0])
+
+    def put(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None, size: int = 0) -> None:
+        """Store a JSON-serializable value."""
+        now = time.time()
+        self._db().execute(
+            "INSERT OR REPLACE INTO state (namespace, key, value, size, expires_at, touched_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (namespace, key, json.dumps(value, separators=(",", ":")), size,
+             now + ttl if ttl is not None else None, now)
+        )
+
+    def pop(self, namespace: str, key: str, default: Any = None) -> Any:
+        """Remove and return a value atomically, so only one worker ever receives it."""
+        row = self._db().execute(
+            "DELETE FROM state WHERE namespace = ? AND key = ? RETURNING value, expires_at",
+            (namespace, key)
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] < time.time()):
+            return default
+        return json.loads(row[0])
+
+    def delete(self, namespace: str, key: Optional[str] = None, prefix: Optional[str] = None) -> None:
+        """Delete one key, every key starting with `prefix`, or the whole namespace."""
+        db = self._db()
+        if key is not None:
+            db.execute("DELETE FROM state WHERE namespace = ? AND key = ?", (namespace, key))
+        elif prefix is not None:
+            db.execute(
+                "DELETE FROM state WHERE namespace = ? AND substr(key, 1, ?) = ?",
+                (namespace, len(prefix), prefix)
+            )
+        else:
+            db.execute("DELETE FROM state WHERE namespace = ?", (namespace,))
+
+    def usage(self, namespace: str) -> dict:
+        """Entry count and total accounted size of a namespace."""
+        count, size = self._db().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM state WHERE namespace = ?",
+            (namespace,)
+        ).fetchone()
+        return {"entries": count, "size": size}
+
+    def evict(self, namespace: str, max_entries: Optional[int] = None, max_size: Optional[int] = None) -> int:
+        """
+        Drop expired entries, then least recently used ones until the
+        namespace is within its caps.
+
+        Returns:
+            Number of entries removed
+        """
+        db = self._db()
+        removed = db.execute(
+            "DELETE FROM state WHERE namespace = ? AND expires_at < ?",
+            (namespace, time.time())
+        ).rowcount
+        usage = self.usage(namespace)
+        count, size = usage["entries"], usage["size"]
+        if (max_entries is None or count <= max_entries) and (max_size is None or size <= max_size):
+            return removed
+
+        for key, entry_size in db.execute(
+            "SELECT key, size FROM state WHERE namespace = ? ORDER BY touched_at",
+            (namespace,)
+        ).fetchall():
+            if (max_entries is None or count <= max_entries) and (max_size is None or size <= max_size):
+                break
+            db.execute("DELETE FROM state WHERE namespace = ? AND key = ?", (namespace, key))
+            count -= 1
+            size -= entry_size
+            removed += 1
+        return removed
+
+
+shared_store = SharedStore(SHARED_STATE_DB) if SHARED_STATE_DB else None
@@ -0,0 +1,166 @@
+"""
+Lifecycle management for Gradio's upload temp directory.
+
+Gradio stores every uploaded file as <upload dir>/<content hash>/<name> and
+never removes it. Uploaded files are released as soon as the backend has
+accepted them, and a background sweep expires old entries and enforces a
+disk quota by evicting the oldest entries first.
+"""
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from apps.ui.file_utils import clear_folder_contents, get_folder_size, safe_delete_file
+
+UPLOAD_TEMP_DIR = os.getenv("UPLOAD_TEMP_DIR") or os.getenv("GRADIO_TEMP_DIR") or \
+    os.path.join(tempfile.gettempdir(), "gradio")
+
+# Disk quota for the upload temp directory
+QUOTA_BYTES = int(os.getenv("UPLOAD_TEMP_QUOTA_MB", "1024")) * 1024 * 1024
+
+# Entries older than this are removed regardless of the quota
+MAX_AGE = float(os.getenv("UPLOAD_TEMP_MAX_AGE", str(24 * 60 * 60)))
+
+# Seconds between background sweeps
+SWEEP_INTERVAL = float(os.getenv("UPLOAD_TEMP_SWEEP_INTERVAL", "600"))
+
+# Entries younger than this are never evicted, so uploads still being
+# processed by a handler aren't pulled out from under it
+MIN_AGE = 300.0
+
+
+class TempStorage:
+    """Releases, expires and quota-limits files in an upload temp directory."""
+
+    def __init__(self, root: str = UPLOAD_TEMP_DIR, quota_bytes: int = QUOTA_BYTES,
+                 max_age: float = MAX_AGE, sweep_interval: float = SWEEP_INTERVAL):
+        self.root = os.path.realpath(root)
+        self.quota_bytes = quota_bytes
+        self.max_age = max_age
+        self.sweep_interval = sweep_interval
+        self.last_sweep: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def owns(self, file_path: str) -> bool:
+        """True if a path lives inside the managed directory."""
+        path = os.path.realpath(file_path)
+        return os.path.commonpath([path, self.root]) == self.root and path != self.root
+
+    def release(self, file_paths: Iterable[str]) -> int:
+        """
+        Delete uploaded files that are no longer needed.
+
+        Paths outside the managed directory are ignored, so callers can pass
+        any file list. The per-upload hash directory is removed once empty.
+
+        Returns:
+            Number of files deleted
+        """
+        released = 0
+        for file_path in file_paths:
+            if not file_path or not self.owns(file_path):
+                continue
+            try:
+                safe_delete_file(file_path)
+                released += 1
+            except (FileNotFoundError, OSError):
+                continue
+            parent = os.path.dirname(os.path.realpath(file_path))
+            if parent != self.root:
+                try:
+                    os.rmdir(parent)
+                except OSError:
+                    pass  # not empty: another upload with the same content
+        return released
+
+    def usage(self) -> int:
+        """Bytes currently used by the managed directory."""
+        if not os.path.isdir(self.root):
+            return 0
+        return get_folder_size(self.root)
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        """Top-level entries as (mtime, size, path), oldest first."""
+        entries = []
+        with os.scandir(self.root) as items:
+            for item in items:
+                try:
+                    if item.is_dir(follow_symlinks=False):
+                        size = get_folder_size(item.path)
+                    else:
+                        size = item.stat(follow_symlinks=False).st_size
+                    entries.append((item.stat(follow_symlinks=False).st_mtime, size, item.path))
+                except OSError:
+                    continue
+        entries.sort()
+        return entries
+
+    def _remove(self, path: str) -> None:
+        if os.path.isdir(path) and not os.path.islink(path):
+            result = clear_folder_contents(path)
+            if result['errors']:
+                raise OSError(result['errors'][0]['error'])
+            os.rmdir(path)
+        else:
+            safe_delete_file(path)
+
+    def sweep(self) -> Dict[str, Any]:
+        """
+        Remove expired entries, then evict the oldest ones until usage is
+        under the quota.
+
+        Returns:
+            Dictionary with removed (entries), freed (bytes), usage (bytes
+            after the sweep) and errors
+        """
+        result = {'removed': 0, 'freed': 0, 'usage': 0, 'errors': []}
+        if not os.path.isdir(self.root):
+            self.last_sweep = result
+            return result
+
+        with self._lock:
+            now = time.time()
+            entries = self._entries()
+            usage = sum(size for _, size, _ in entries)
+
+            for mtime, size, path in entries:
+                age = now - mtime
+                if age < MIN_AGE:
+                    break  # sorted oldest first: everything after is younger
+                if age <= self.max_age and usage <= self.quota_bytes:
+                    break
+                try:
+                    self._remove(path)
+                except Exception as e:
+                    result['errors'].append({'path': path, 'error': str(e)})
+                    continue
+                usage -= size
+                result['removed'] += 1
+                result['freed'] += size
+
+            result['usage'] = usage
+        result['finished_at'] = now
+        self.last_sweep = result
+        return result
+
+    def start(self) -> None:
+        """Start background sweeps (idempotent)."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="temp-sweeper", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"⚠️ Temp sweep error: {e}")
+            time.sleep(self.sweep_interval)
+
+
+temp_storage = TempStorage()
@@ -0,0 +1,244 @@
+"""
+Local full-text index of chat transcripts.
+
+Finding an earlier answer used to mean scrolling the conversation or asking
+the agent again, which costs an LLM call. Every answered chat turn - the
+question, the answer and its citations - is now also written to a SQLite
+FTS5 index on disk, tagged with the agent, browser, backend session and
+time, and the Chat Playground's search panel queries it directly. Searches never reach the backend; FTS5 answers them from its
+inverted index in milliseconds even with hundreds of thousands of turns.
+
+The UI has no user accounts, so a search only covers turns asked from the
+caller's own browser: turns are keyed by a random ID each browser keeps in
+localStorage (see apps.ui.app), which outlives page loads, so answers from
+earlier visits can be found again. A browser's turns are dropped once it
+hasn't chatted for TRANSCRIPT_INDEX_RETENTION_DAYS, or when it asks to
+forget them; beyond TRANSCRIPT_INDEX_MAX_TURNS the oldest go first.
+
+Several frontend workers can share the database file (WAL mode); each
+thread uses its own connection. The index is off when TRANSCRIPT_INDEX_DB
+is empty.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+# SQLite file holding the transcript index; empty turns indexing off
+TRANSCRIPT_INDEX_DB = os.getenv("TRANSCRIPT_INDEX_DB", os.path.join("data", "transcript_index.db"))
+
+# Turns kept in the index; the oldest are pruned beyond this
+MAX_TURNS = int(os.getenv("TRANSCRIPT_INDEX_MAX_TURNS", "500000"))
+
+# Days a browser's turns are kept after its last indexed turn
+RETENTION_DAYS = float(os.getenv("TRANSCRIPT_INDEX_RETENTION_DAYS", "7"))
+
+# Results returned by one search
+MAX_RESULTS = 50
+
+# Turns recorded, or seconds elapsed, between two pruning passes
+PRUNE_EVERY = 1000
+PRUNE_INTERVAL = 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS turns (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    agent_id TEXT NOT NULL,
+    session_key TEXT NOT NULL DEFAULT '',
+    session_id TEXT,
+    created_at REAL NOT NULL,
+    question TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    citations TEXT NOT NULL,
+    sources TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_turns_created ON turns (created_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS turns_fts USING fts5(
+    question, answer, sources,
+    content='turns', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS turns_ai AFTER INSERT ON turns BEGIN
+    INSERT INTO turns_fts (rowid, question, answer, sources)
+    VALUES (new.id, new.question, new.answer, new.sources);
+END;
+CREATE TRIGGER IF NOT EXISTS turns_ad AFTER DELETE ON turns BEGIN
+    INSERT INTO turns_fts (turns_fts, rowid, question, answer, sources)
+    VALUES ('delete', old.id, old.question, old.answer, old.sources);
+END;
+"""
+
+# Added after the first release; databases created before get the column.
+# session_key holds the browser key the turn was asked from.
+_SESSION_INDEX = "CREATE INDEX IF NOT EXISTS idx_turns_session ON turns (session_key, agent_id)"
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def match_query(text: str) -> Optional[str]:
+    """
+    Turn free text into an FTS5 query matching turns that contain every word.
+
+    Words are quoted so FTS5 operators in the input are taken literally; the
+    last word also matches as a prefix, so results appear while typing.
+
+    Returns:
+        The MATCH expression, or None if the text has no words
+    """
+    words = _WORD.findall(text or "")
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+class TranscriptIndex:
+    """Answered chat turns with an FTS5 index over their text."""
+
+    def __init__(self, db_path: str = TRANSCRIPT_INDEX_DB, max_turns: int = MAX_TURNS,
+                 retention_days: float = RETENTION_DAYS):
+        self.db_path = db_path
+        self.max_turns = max_turns
+        self.retention = retention_days * 86400
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._since_prune = 0
+        self._pruned_at = time.monotonic()
+        self._counters = {"recorded": 0, "searches": 0, "errors": 0}
+        self._search_ms = 0.0
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        db = self._db()
+        db.execute("PRAGMA journal_mode=WAL")
+        db.executescript(_SCHEMA)
+        columns = {row["name"] for row in db.execute("PRAGMA table_info(turns)")}
+        if "session_key" not in columns:
+            db.execute("ALTER TABLE turns ADD COLUMN session_key TEXT NOT NULL DEFAULT ''")
+        db.execute(_SESSION_INDEX)
+        self.prune()
+
+    def _db(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def record(self, session_key: str, agent_id: str, session_id: Optional[str], question: str, answer: str,
+               citations: List[List[str]]) -> None:
+        """
+        Index one answered turn.
+
+        Args:
+            session_key: Browser that asked (its persistent browser ID)
+            agent_id: Agent that answered
+            session_id: Backend chat session, if any
+            question: User message
+            answer: Agent reply
+            citations: Citation rows as shown in the playground (folder, document, snippet)
+        """
+        # Citation cells are indexed as plain text; the rows are kept for display
+        sources = " | ".join(" ".join(str(cell) for cell in row if cell) for row in citations)
+        # The turns_ai trigger adds the row to the full-text index
+        self._db().execute(
+            "INSERT INTO turns (agent_id, session_key, session_id, created_at, question, answer, citations, sources) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (agent_id, session_key, session_id, time.time(), question, answer,
+             json.dumps(citations, ensure_ascii=False), sources)
+        )
+        with self._lock:
+            self._counters["recorded"] += 1
+            self._since_prune += 1
+            prune = self._since_prune >= PRUNE_EVERY or time.monotonic() - self._pruned_at > PRUNE_INTERVAL
+            if prune:
+                self._since_prune = 0
+                self._pruned_at = time.monotonic()
+        if prune:
+            self.prune()
+
+    def prune(self) -> int:
+        """
+        Drop the turns of browsers idle past the retention period, then the
+        oldest beyond `max_turns`; returns how many went.
+        """
+        db = self._db()
+        # The turns_ad trigger removes the rows from the full-text index
+        removed = db.execute(
+            "DELETE FROM turns WHERE session_key IN "
+            "(SELECT session_key FROM turns GROUP BY session_key HAVING MAX(created_at) < ?)",
+            (time.time() - self.retention,)
+        ).rowcount
+        row = db.execute(
+            "SELECT id FROM turns ORDER BY id DESC LIMIT 1 OFFSET ?", (self.max_turns,)
+        ).fetchone()
+        if row is not None:
+            removed += db.execute("DELETE FROM turns WHERE id <= ?", (row["id"],)).rowcount
+        return removed
+
+    def forget_session(self, session_key: str) -> int:
+        """Remove a browser's turns; returns how many were removed."""
+        if not session_key:
+            return 0
+        return self._db().execute("DELETE FROM turns WHERE session_key = ?", (session_key,)).rowcount
+
+    def search(self, text: str, session_key: str, agent_id: Optional[str] = None,
+               limit: int = MAX_RESULTS) -> List[Dict[str, Any]]:
+        """
+        Find turns whose question, answer or citations contain every word of `text`.
+
+        Args:
+            text: Words to look for (the last one may be a prefix)
+            session_key: Browser whose turns are searched
+            agent_id: Only search this agent's turns
+            limit: Maximum number of results
+
+        Returns:
+            Best matches first, each with agent_id, session_id, created_at,
+            question, answer, citations and a highlighted snippet
+        """
+        query = match_query(text)
+        if query is None or not session_key:
+            return []
+        sql = (
+            "SELECT t.agent_id, t.session_id, t.created_at, t.question, t.answer, t.citations, "
+            "snippet(turns_fts, -1, '**', '**', '…', 16) AS snippet "
+            "FROM turns_fts JOIN turns t ON t.id = turns_fts.rowid "
+            "WHERE turns_fts MATCH ? AND t.session_key = ?"
+        )
+        params: List[Any] = [query, session_key]
+        if agent_id:
+            sql += " AND t.agent_id = ?"
+            params.append(agent_id)
+        sql += " ORDER BY turns_fts.rank LIMIT ?"
+        params.append(limit)
+
+        started = time.perf_counter()
+        try:
+            rows = self._db().execute(sql, params).fetchall()
+        except sqlite3.OperationalError:
+            with self._lock:
+                self._counters["errors"] += 1
+            raise
+        with self._lock:
+            self._counters["searches"] += 1
+            self._search_ms += (time.perf_counter() - started) * 1000
+        return [dict(row, citations=json.loads(row["citations"])) for row in rows]
+
+    def stats(self) -> dict:
+        turns = self._db().execute("SELECT COUNT(*) FROM turns").fetchone()[0]
+        with self._lock:
+            searches = self._counters["searches"]
+            return {
+                **self._counters,
+                "turns": turns,
+                "avg_search_ms": round(self._search_ms / searches, 2) if searches else 0.0
+            }
+
+
+transcript_index = TranscriptIndex() if TRANSCRIPT_INDEX_DB else None
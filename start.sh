@@ -5,5 +5,9 @@ echo "Starting Gradio Frontend..."
 echo "API Backend: ${API_BASE_URL:-http://localhost:8000}"
 echo "Port: ${PORT:-7860}"
 
-# Start Gradio
+# Start Gradio (several worker processes when FRONTEND_WORKERS > 1)
+if [ "${FRONTEND_WORKERS:-1}" -gt 1 ]; then
+    echo "Workers: ${FRONTEND_WORKERS}"
+    exec python -m apps.ui.server --workers "${FRONTEND_WORKERS}"
+fi
 python -m apps.ui.app